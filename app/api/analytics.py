@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.dependencies import get_db
+from app.schemas.analytics import FunnelResponse
+from app.services.analytics import get_funnel
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get("/funnel", response_model=FunnelResponse)
+async def funnel(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    request_id: str | None = Query(None, min_length=1),
+    role: str | None = Query(None, min_length=1),
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    group_by: str = Query("none", pattern="^(none|request|role|week)$"),
+) -> FunnelResponse:
+    return await get_funnel(
+        db,
+        request_id=request_id,
+        role=role,
+        date_from=date_from,
+        date_to=date_to,
+        group_by=group_by,
+    )
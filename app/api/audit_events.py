@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.consts import DEFAULT_PAGE_SIZE
+from app.dependencies import get_db
+from app.schemas.audit_event import AuditEventListResponse
+from app.services.audit_history import list_audit_events
+
+router = APIRouter(prefix="/audit-events", tags=["audit"])
+
+
+@router.get("", response_model=AuditEventListResponse)
+async def audit_events(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    entity_type: str | None = Query(None, min_length=1),
+    entity_id: str | None = Query(None, min_length=1),
+    action: str | None = Query(None, min_length=1),
+    created_after: datetime | None = Query(None),
+    created_before: datetime | None = Query(None),
+    size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100),
+    cursor: str | None = Query(None, min_length=1),
+) -> AuditEventListResponse:
+    return await list_audit_events(
+        db,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        action=action,
+        created_after=created_after,
+        created_before=created_before,
+        size=size,
+        cursor=cursor,
+    )
@@ -15,6 +15,7 @@ from app.dependencies import get_db
 from app.schemas.developer import (
     DeveloperInDB,
     DeveloperListResponse,
+    DeveloperLookupResponse,
     DeveloperPatchPayload,
     DeveloperUploadResponse,
 )
@@ -24,6 +25,7 @@ from app.services.developers import (
     get_developer_by_id,
     get_developer_resume,
     list_developers as list_developers_service,
+    lookup_developers,
     update_developer as update_developer_service,
 )
 
@@ -38,20 +40,26 @@ async def list_developers(
     page: int = Query(1, ge=1),
     size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100),
     offset: int | None = Query(None, ge=0),
+    cursor: str | None = Query(None, min_length=1),
     q: str | None = Query(None, min_length=1),
     role: str | None = Query(None),
     grade: str | None = Query(None),
     work_format: str | None = Query(None),
+    exact_total: bool = Query(False),
+    in_resume: bool = Query(False),
 ) -> DeveloperListResponse:
     return await list_developers_service(
         db,
         page=page,
         size=size,
         offset=offset,
+        cursor=cursor,
         q=q,
         role=role,
         grade=grade,
         work_format=work_format,
+        exact_total=exact_total,
+        in_resume=in_resume,
     )
 
 
@@ -78,6 +86,16 @@ async def create_developer(
     return await create_developer_service(db, resume=resume)
 
 
+@router.get("/lookup", response_model=DeveloperLookupResponse)
+async def lookup(
+    q: str = Query(..., min_length=1),
+    threshold: float | None = Query(None, gt=0, le=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> DeveloperLookupResponse:
+    return await lookup_developers(db, q=q, threshold=threshold, limit=limit)
+
+
 @router.get("/{developer_id}", response_model=DeveloperInDB)
 async def get_developer(
     developer_id: str,
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.dependencies import get_db
 from app.schemas.kanban import KanbanResponse
 from app.services.kanban import get_kanban
+from app.services.kanban_stream import KanbanSubscription, stream_kanban
 
 router = APIRouter(prefix="/kanban", tags=["kanban"])
 
@@ -17,6 +21,8 @@ async def kanban(
     grade: str | None = Query(None),
     work_format: str | None = Query(None),
     has_deadline: bool | None = Query(None),
+    deadline_after: datetime | None = Query(None),
+    deadline_before: datetime | None = Query(None),
 ) -> KanbanResponse:
     return await get_kanban(
         db,
@@ -24,4 +30,31 @@ async def kanban(
         grade=grade,
         work_format=work_format,
         has_deadline=has_deadline,
+        deadline_after=deadline_after,
+        deadline_before=deadline_before,
+    )
+
+
+@router.get("/stream")
+async def kanban_stream(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    role: str | None = Query(None),
+    grade: str | None = Query(None),
+    work_format: str | None = Query(None),
+    has_deadline: bool | None = Query(None),
+    deadline_after: datetime | None = Query(None),
+    deadline_before: datetime | None = Query(None),
+) -> StreamingResponse:
+    subscription = KanbanSubscription(
+        role=role,
+        grade=grade,
+        work_format=work_format,
+        has_deadline=has_deadline,
+        deadline_after=deadline_after,
+        deadline_before=deadline_before,
+    )
+    return StreamingResponse(
+        stream_kanban(db, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from app.schemas.metrics import AuditSinkMetrics, MetricsResponse
+from app.services.audit import audit_sink
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", response_model=MetricsResponse)
+async def metrics() -> MetricsResponse:
+    return MetricsResponse(audit_sink=AuditSinkMetrics(**audit_sink.metrics()))
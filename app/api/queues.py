@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from app.schemas.queue import QueueStatsItem, QueueStatsResponse
+from app.services.task_queue import list_queue_stats
+
+router = APIRouter(prefix="/queues", tags=["queues"])
+
+
+@router.get("", response_model=QueueStatsResponse)
+async def queues() -> QueueStatsResponse:
+    stats = await list_queue_stats()
+    return QueueStatsResponse(
+        items=[QueueStatsItem(**item.as_dict()) for item in stats]
+    )
@@ -1,50 +1,144 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.dependencies import get_db
+from app.consts import DEFAULT_PAGE_SIZE
+from app.dependencies import get_db, get_loaders
 from bson import ObjectId
 
 from app.schemas.request import (
+    RequestCandidateListResponse,
     RequestDeleteResponse,
     RequestDetailResponse,
     RequestInDB,
+    RequestListResponse,
+    RequestLookupResponse,
     RequestPatchPayload,
+    RequestPatchResponse,
 )
+from app.services.loaders import Loaders
+from app.services.request_cache import etag_matches
 from app.services.requests import (
     delete_request_by_id,
-    get_request_by_id,
+    get_cached_request_detail,
+    list_all_requests,
+    list_request_candidates,
     list_requests as list_requests_service,
+    lookup_requests,
+    parse_expand,
+    stream_requests,
     update_request,
 )
 
 router = APIRouter(prefix="/requests", tags=["requests"])
 
 
-@router.get("", response_model=list[RequestInDB])
+@router.get(
+    "",
+    response_model=RequestListResponse | list[RequestInDB],
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {}},
+            "description": (
+                "JSON page with size, cursor or view; without them every match "
+                "as a plain list in the full view; NDJSON with format=ndjson"
+            ),
+        }
+    },
+)
 async def list_requests(
     db: AsyncIOMotorDatabase = Depends(get_db),
     role: str | None = Query(None),
     grade: str | None = Query(None),
     work_format: str | None = Query(None),
     has_deadline: bool | None = Query(None),
-) -> list[RequestInDB]:
+    deadline_after: datetime | None = Query(None),
+    deadline_before: datetime | None = Query(None),
+    sort: Literal["created_at", "deadline"] = Query("created_at"),
+    size: int | None = Query(None, ge=1, le=100),
+    cursor: str | None = Query(None, min_length=1),
+    view: Literal["summary", "full"] | None = Query(None),
+    format: Literal["json", "ndjson"] = Query("json"),
+) -> RequestListResponse | list[RequestInDB] | StreamingResponse:
+    filters = {
+        "role": role,
+        "grade": grade,
+        "work_format": work_format,
+        "has_deadline": has_deadline,
+        "deadline_after": deadline_after,
+        "deadline_before": deadline_before,
+        "sort": sort,
+    }
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_requests(db, **filters, cursor=cursor, view=view or "summary"),
+            media_type="application/x-ndjson",
+        )
+    if size is None and cursor is None and view is None:
+        # Existing clients get the original response: a list of everything.
+        return await list_all_requests(db, **filters)
     return await list_requests_service(
         db,
-        role=role,
-        grade=grade,
-        work_format=work_format,
-        has_deadline=has_deadline,
+        **filters,
+        size=size or DEFAULT_PAGE_SIZE,
+        cursor=cursor,
+        view=view or "summary",
     )
 
 
-@router.get("/{request_id}", response_model=RequestDetailResponse)
+@router.get("/lookup", response_model=RequestLookupResponse)
+async def lookup(
+    q: str = Query(..., min_length=1),
+    threshold: float | None = Query(None, gt=0, le=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> RequestLookupResponse:
+    return await lookup_requests(db, q=q, threshold=threshold, limit=limit)
+
+
+@router.get(
+    "/{request_id}",
+    response_model=RequestDetailResponse,
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "ETag совпал с If-None-Match"},
+    },
+)
 async def get_request(
     request_id: str,
     db: AsyncIOMotorDatabase = Depends(get_db),
-) -> RequestDetailResponse:
-    return await get_request_by_id(db, request_id=request_id)
+    loaders: Loaders = Depends(get_loaders),
+    if_none_match: str | None = Header(None),
+) -> Response:
+    detail = await get_cached_request_detail(db, request_id=request_id, loaders=loaders)
+    # no-cache: clients keep the body but revalidate it on every use.
+    headers = {"ETag": detail.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, detail.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=detail.body, media_type="application/json", headers=headers)
+
+
+@router.get("/{request_id}/candidates", response_model=RequestCandidateListResponse)
+async def get_request_candidates(
+    request_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
+    size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100),
+    cursor: str | None = Query(None, min_length=1),
+    include_description: bool = Query(True),
+) -> RequestCandidateListResponse:
+    return await list_request_candidates(
+        db,
+        request_id=request_id,
+        size=size,
+        cursor=cursor,
+        include_description=include_description,
+        loaders=loaders,
+    )
 
 
 @router.delete("/{request_id}", response_model=RequestDeleteResponse)
@@ -62,9 +156,12 @@ async def delete_request(
 
 @router.patch(
     "/{request_id}",
-    response_model=RequestDetailResponse,
+    response_model=RequestPatchResponse,
     summary="Обновление заявки",
-    description="Обновляет status и/или name",
+    description=(
+        "Обновляет status и/или name и возвращает поля заявки; "
+        "expand=candidates,responses добавляет кандидатов и отклики"
+    ),
     responses={
         status.HTTP_404_NOT_FOUND: {"description": "Заявка не найдена"},
         status.HTTP_422_UNPROCESSABLE_ENTITY: {"description": "Некорректное тело запроса"},
@@ -74,10 +171,14 @@ async def patch_request(
     request_id: str,
     payload: RequestPatchPayload,
     db: AsyncIOMotorDatabase = Depends(get_db),
-) -> RequestDetailResponse:
+    loaders: Loaders = Depends(get_loaders),
+    expand: str | None = Query(None),
+) -> RequestPatchResponse:
     return await update_request(
         db,
         request_id=request_id,
         status_value=payload.status,
         name=payload.name,
+        expand=parse_expand(expand),
+        loaders=loaders,
     )
@@ -3,18 +3,24 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, Response, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.dependencies import get_db
+from app.dependencies import get_db, get_loaders
 from app.schemas.response import (
     ResponseCreatePayload,
     ResponseDetailResponse,
     ResponseInDB,
     ResponsePatchPayload,
+    ResponseStageDurationsResponse,
+    ResponseStageMovePayload,
+    ResponseStageMoveResponse,
     ResponseWithAllowed,
 )
+from app.services.audit_history import get_response_stage_durations
+from app.services.loaders import Loaders
 from app.services.responses import (
     create_response,
     delete_response,
     get_response_detail,
+    move_response_stages,
     update_response,
 )
 
@@ -29,6 +35,14 @@ async def post_response(
     return await create_response(db, payload=payload)
 
 
+@router.post("/stage-moves", response_model=ResponseStageMoveResponse)
+async def post_stage_moves(
+    payload: ResponseStageMovePayload,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> ResponseStageMoveResponse:
+    return await move_response_stages(db, items=payload.items)
+
+
 @router.patch("/{response_id}", response_model=ResponseWithAllowed)
 async def patch_response(
     response_id: str,
@@ -40,6 +54,7 @@ async def patch_response(
         response_id=response_id,
         stage=payload.stage,
         rate=payload.rate,
+        version=payload.version,
     )
 
 
@@ -61,5 +76,17 @@ async def delete_response_endpoint(
 async def get_response(
     response_id: str,
     db: AsyncIOMotorDatabase = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
 ) -> ResponseDetailResponse:
-    return await get_response_detail(db, response_id=response_id)
+    return await get_response_detail(db, response_id=response_id, loaders=loaders)
+
+
+@router.get(
+    "/{response_id}/stage-durations",
+    response_model=ResponseStageDurationsResponse,
+)
+async def get_stage_durations(
+    response_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> ResponseStageDurationsResponse:
+    return await get_response_stage_durations(db, response_id=response_id)
@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends
 
+from app.api.analytics import router as analytics_router
+from app.api.audit_events import router as audit_events_router
 from app.api.auth_telegram import router as auth_telegram_router
 from app.api.developers import router as developers_router
 from app.api.kanban import router as kanban_router
+from app.api.metrics import router as metrics_router
+from app.api.queues import router as queues_router
 from app.api.roles import router as roles_router
 from app.api.requests import router as requests_router
 from app.api.responses import router as responses_router
@@ -17,4 +21,8 @@ protected_router.include_router(roles_router)
 protected_router.include_router(requests_router)
 protected_router.include_router(responses_router)
 protected_router.include_router(kanban_router)
+protected_router.include_router(queues_router)
+protected_router.include_router(metrics_router)
+protected_router.include_router(audit_events_router)
+protected_router.include_router(analytics_router)
 api_router.include_router(protected_router)
@@ -0,0 +1,32 @@
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.core.config import settings
+
+
+class RedisClient:
+    def __init__(self) -> None:
+        self._client: Redis | None = None
+
+    def connect(self) -> Redis:
+        if self._client is None:
+            # Blocking pool: when every connection is busy, callers wait up
+            # to redis_pool_timeout_seconds instead of opening new sockets.
+            pool = BlockingConnectionPool.from_url(
+                settings.redis_url,
+                max_connections=settings.redis_max_connections,
+                timeout=settings.redis_pool_timeout_seconds,
+                socket_timeout=settings.redis_socket_timeout_seconds,
+                socket_connect_timeout=settings.redis_connect_timeout_seconds,
+                health_check_interval=settings.redis_health_check_interval_seconds,
+                decode_responses=True,
+            )
+            self._client = Redis(connection_pool=pool)
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose(close_connection_pool=True)
+            self._client = None
+
+
+redis_client = RedisClient()
@@ -5,7 +5,33 @@ class Settings(BaseSettings):
     app_name: str = "website_backend"
     mongodb_uri: str = "mongodb://mongo:27017"
     mongodb_db: str = "website_backend"
+    mongodb_transactions: bool | None = None
     redis_url: str = "redis://redis:6379/0"
+    redis_max_connections: int = 20
+    redis_pool_timeout_seconds: float = 5
+    redis_socket_timeout_seconds: float = 5
+    redis_connect_timeout_seconds: float = 2
+    redis_health_check_interval_seconds: int = 30
+    task_queue_backend: str = "list"
+    task_queue_group: str = "resume_parser"
+    task_queue_stream_maxlen: int = 100_000
+    task_queue_max_depth: int = 1000
+    task_queue_max_lag_seconds: float = 600
+    task_queue_retry_after_seconds: int = 30
+    task_queue_stats_cache_seconds: float = 2
+    outbox_relay_interval_seconds: float = 1
+    outbox_batch_size: int = 200
+    outbox_lease_seconds: float = 30
+    outbox_max_backoff_seconds: float = 60
+    audit_sink_durable: bool = False
+    audit_sink_max_buffer: int = 10_000
+    audit_sink_batch_size: int = 500
+    audit_sink_flush_seconds: float = 1
+    audit_archive_after_days: int = 0
+    audit_archive_target: str = "collection"
+    audit_archive_dir: str = "archive/audit"
+    audit_archive_interval_seconds: float = 3600
+    audit_archive_batch_size: int = 1000
     uploads_dir: str = "uploads"
     auth_jwt_secret: str = "change_me"
     auth_jwt_alg: str = "HS256"
@@ -16,6 +42,17 @@ class Settings(BaseSettings):
     cors_allow_origins: str = "http://localhost:3000"
     admin_username: str | None = None
     admin_password: str | None = None
+    kanban_read_model: bool = True
+    kanban_card_sync_seconds: float = 30
+    developer_total_cache_ttl_seconds: float = 30
+    request_detail_cache_seconds: float = 300
+    request_detail_candidates: int = 20
+    derived_fields_sync_seconds: float = 60
+    fuzzy_similarity_threshold: float = 0.3
+    kanban_stream_source: str = "auto"
+    kanban_stream_debounce_ms: int = 200
+    kanban_stream_heartbeat_seconds: int = 15
+    kanban_stream_queue_size: int = 1000
 
     model_config = SettingsConfigDict(
         env_file=".env",
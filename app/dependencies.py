@@ -7,6 +7,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.clients.mongo import mongo_client
 from app.core.config import settings
+from app.services.loaders import Loaders
 
 
 async def get_db() -> AsyncGenerator[AsyncIOMotorDatabase, None]:
@@ -17,6 +18,11 @@ async def get_db() -> AsyncGenerator[AsyncIOMotorDatabase, None]:
         pass
 
 
+def get_loaders(db: AsyncIOMotorDatabase = Depends(get_db)) -> Loaders:
+    """One set of loaders per HTTP request; FastAPI caches the dependency."""
+    return Loaders(db)
+
+
 security = HTTPBearer(auto_error=False)
 
 
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
@@ -7,26 +8,76 @@ from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.api.router import api_router
-from app.repositories.candidate import CandidateRepository
-from app.repositories.response import ResponseRepository
-from app.repositories.role import RoleRepository
+from app.repositories.indexes import log_index_reports, reconcile_indexes
 from app.repositories.request import RequestRepository
 from app.clients.mongo import mongo_client
+from app.clients.redis import redis_client
 from app.core.config import settings
-from app.repositories.telegram_login_session import (
-    TelegramLoginSessionRepository,
-)
+from app.services.audit import audit_sink
+from app.services.audit_archive import run_audit_archiver
+from app.services.derived_fields import run_derived_fields_sync
+from app.services.kanban import run_kanban_card_sync
+from app.services.kanban_stream import kanban_hub
+from app.services.outbox import outbox_relay, transactions_supported
+from app.services.task_queue import ensure_queue_groups, task_publisher
+
+
+async def _reconcile_indexes(db) -> None:
+    log_index_reports(await reconcile_indexes(db))
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    mongo_client.connect()
     db = mongo_client.connect()
-    tg_repo = TelegramLoginSessionRepository(db)
-    await tg_repo.ensure_indexes()
+    redis_client.connect()
+    audit_sink.start()
+    await ensure_queue_groups()
+    await RequestRepository(db).ensure_validator()
+    # Missing indexes are built in the background so startup is not blocked.
+    index_task = asyncio.create_task(_reconcile_indexes(db))
+    await transactions_supported(db)
+    await kanban_hub.start(db)
+    relay_task = asyncio.create_task(
+        outbox_relay.run(db, settings.outbox_relay_interval_seconds)
+    )
+    archive_task = None
+    if settings.audit_archive_after_days > 0:
+        archive_task = asyncio.create_task(
+            run_audit_archiver(
+                db,
+                settings.audit_archive_interval_seconds,
+                older_than_days=settings.audit_archive_after_days,
+                target=settings.audit_archive_target,
+                archive_dir=settings.audit_archive_dir,
+                batch_size=settings.audit_archive_batch_size,
+            )
+        )
+    # The first pass on a fresh database builds every card.
+    card_sync_task = None
+    if settings.kanban_card_sync_seconds > 0:
+        card_sync_task = asyncio.create_task(
+            run_kanban_card_sync(db, settings.kanban_card_sync_seconds)
+        )
+    sync_task = None
+    if settings.derived_fields_sync_seconds > 0:
+        sync_task = asyncio.create_task(
+            run_derived_fields_sync(db, settings.derived_fields_sync_seconds)
+        )
     try:
         yield
     finally:
+        index_task.cancel()
+        relay_task.cancel()
+        if card_sync_task is not None:
+            card_sync_task.cancel()
+        if sync_task is not None:
+            sync_task.cancel()
+        if archive_task is not None:
+            archive_task.cancel()
+        await kanban_hub.stop()
+        await task_publisher.close()
+        await audit_sink.close()
+        await redis_client.close()
         await mongo_client.close()
 
 
@@ -53,19 +104,6 @@ async def healthz() -> dict[str, bool]:
     return {"ok": True}
 
 
-@app.on_event("startup")
-async def startup() -> None:
-    db = mongo_client.connect()
-    role_repo = RoleRepository(db)
-    await role_repo.ensure_indexes()
-    response_repo = ResponseRepository(db)
-    await response_repo.ensure_indexes()
-    candidate_repo = CandidateRepository(db)
-    await candidate_repo.ensure_indexes()
-    request_repo = RequestRepository(db)
-    await request_repo.ensure_indexes()
-
-
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(
     request: Request,
@@ -83,6 +121,7 @@ async def http_exception_handler(
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=exc.headers,
     )
 
 
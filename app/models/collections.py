@@ -6,6 +6,11 @@ REQUESTS_COLLECTION = "requests"
 RESPONSES_COLLECTION = "responses"
 CANDIDATES_COLLECTION = "candidates"
 AUDIT_EVENTS_COLLECTION = "audit_events"
+AUDIT_EVENTS_ARCHIVE_COLLECTION = "audit_events_archive"
 USERS_COLLECTION = "users"
 TELEGRAM_LOGIN_SESSIONS_COLLECTION = "telegram_login_sessions"
 ROLES_COLLECTION = "roles"
+KANBAN_CARDS_COLLECTION = "kanban_cards"
+OUTBOX_COLLECTION = "outbox"
+FUNNEL_COUNTERS_COLLECTION = "response_funnel_counters"
+SYNC_STATE_COLLECTION = "sync_state"
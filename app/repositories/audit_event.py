@@ -1,6 +1,74 @@
-from app.models.collections import AUDIT_EVENTS_COLLECTION
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+from pymongo import IndexModel
+
+from app.models.collections import (
+    AUDIT_EVENTS_ARCHIVE_COLLECTION,
+    AUDIT_EVENTS_COLLECTION,
+)
 from app.repositories.base import BaseRepository
 
+AUDIT_HISTORY_SORT = [("created_at", -1), ("_id", -1)]
+
 
 class AuditEventRepository(BaseRepository):
     collection_name = AUDIT_EVENTS_COLLECTION
+    indexes = [
+        IndexModel(
+            [("entity_type", 1), ("entity_id", 1), ("created_at", -1), ("_id", -1)],
+            name="idx_audit_entity_created_id",
+        ),
+        IndexModel(
+            [("action", 1), ("created_at", -1), ("_id", -1)],
+            name="idx_audit_action_created_id",
+        ),
+        # Range scans of the archiver over the oldest events.
+        IndexModel([("created_at", 1)], name="idx_audit_created"),
+    ]
+
+    @staticmethod
+    def before_cursor_filter(created_at: datetime, event_id: ObjectId) -> dict[str, Any]:
+        """Events that sort after (created_at, _id) in AUDIT_HISTORY_SORT."""
+        return {
+            "$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": event_id}},
+            ]
+        }
+
+    async def list_entity_events(
+        self,
+        entity_type: str,
+        entity_id: str,
+        *,
+        actions: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Full history of one entity, oldest first."""
+        filters: dict[str, Any] = {"entity_type": entity_type, "entity_id": entity_id}
+        if actions:
+            filters["action"] = {"$in": actions}
+        return await self.list(
+            filters=filters,
+            sort=[("created_at", 1), ("_id", 1)],
+            limit=0,
+        )
+
+
+class AuditEventArchiveRepository(AuditEventRepository):
+    """Cold storage for events moved out of audit_events by the archiver;
+    same documents and queries, fewer indexes.
+
+    The archiver copies a batch before deleting it from audit_events, so an
+    interrupted run can leave events in both collections; readers of both
+    drop duplicates by _id.
+    """
+
+    collection_name = AUDIT_EVENTS_ARCHIVE_COLLECTION
+    indexes = [
+        IndexModel(
+            [("entity_type", 1), ("entity_id", 1), ("created_at", -1)],
+            name="idx_audit_archive_entity_created",
+        ),
+    ]
@@ -1,31 +1,49 @@
+from __future__ import annotations
+
 from typing import Any
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel, ReturnDocument
 
 from app.utils.mongo import serialize_document
 
 
 class BaseRepository:
     collection_name: str
+    indexes: list[IndexModel] = []
 
     def __init__(self, db: AsyncIOMotorDatabase) -> None:
         self._collection = db[self.collection_name]
 
+    async def ensure_indexes(self) -> None:
+        if self.indexes:
+            await self._collection.create_indexes(self.indexes)
+
     async def create(
         self,
         payload: dict[str, Any],
         *,
         session: Any | None = None,
     ) -> dict[str, Any]:
-        result = await self._collection.insert_one(payload, session=session)
-        document = await self._collection.find_one(
-            {"_id": result.inserted_id},
+        document = dict(payload)
+        result = await self._collection.insert_one(document, session=session)
+        document["_id"] = result.inserted_id
+        return serialize_document(document)
+
+    async def create_many(
+        self,
+        payloads: list[dict[str, Any]],
+        *,
+        session: Any | None = None,
+    ) -> list[str]:
+        if not payloads:
+            return []
+        result = await self._collection.insert_many(
+            [dict(payload) for payload in payloads],
             session=session,
         )
-        if document:
-            return serialize_document(document)
-        return {"id": str(result.inserted_id)}
+        return [str(item) for item in result.inserted_ids]
 
     async def get_by_id(
         self,
@@ -44,16 +62,26 @@ class BaseRepository:
         item_id: str,
         payload: dict[str, Any],
         *,
+        conditions: dict[str, Any] | None = None,
+        return_previous: bool = False,
+        projection: dict[str, Any] | None = None,
         session: Any | None = None,
     ) -> dict[str, Any] | None:
+        """Apply $set in one call and return the document after it (or
+        before it, with return_previous). None when the id or the extra
+        conditions did not match."""
         if not payload:
             return await self.get_by_id(item_id, session=session)
-        await self._collection.update_one(
-            {"_id": ObjectId(item_id)},
+        document = await self._collection.find_one_and_update(
+            {"_id": ObjectId(item_id), **(conditions or {})},
             {"$set": payload},
+            projection=projection,
+            return_document=(
+                ReturnDocument.BEFORE if return_previous else ReturnDocument.AFTER
+            ),
             session=session,
         )
-        return await self.get_by_id(item_id, session=session)
+        return serialize_document(document) if document else None
 
     async def delete_by_id(self, item_id: str, *, session: Any | None = None) -> bool:
         result = await self._collection.delete_one(
@@ -62,6 +90,18 @@ class BaseRepository:
         )
         return result.deleted_count == 1
 
+    async def find_and_delete_by_id(
+        self,
+        item_id: str,
+        *,
+        session: Any | None = None,
+    ) -> dict[str, Any] | None:
+        document = await self._collection.find_one_and_delete(
+            {"_id": ObjectId(item_id)},
+            session=session,
+        )
+        return serialize_document(document) if document else None
+
     async def list(
         self,
         *,
@@ -69,10 +109,15 @@ class BaseRepository:
         limit: int = 50,
         sort: list[tuple[str, int]] | None = None,
         filters: dict[str, Any] | None = None,
+        projection: dict[str, Any] | None = None,
         session: Any | None = None,
     ) -> list[dict[str, Any]]:
         query = filters or {}
-        cursor = self._collection.find(query, session=session).skip(skip).limit(limit)
+        cursor = (
+            self._collection.find(query, projection, session=session)
+            .skip(skip)
+            .limit(limit)
+        )
         if sort:
             cursor = cursor.sort(sort)
         return [serialize_document(doc) async for doc in cursor]
@@ -85,3 +130,46 @@ class BaseRepository:
     ) -> int:
         query = filters or {}
         return await self._collection.count_documents(query, session=session)
+
+    async def estimated_count(self) -> int:
+        return await self._collection.estimated_document_count()
+
+    async def similar_by_trigrams(
+        self,
+        query_trigrams: list[str],
+        *,
+        threshold: float,
+        limit: int,
+        projection: dict[str, Any],
+        field_name: str = "name_trigrams",
+    ) -> list[dict[str, Any]]:
+        """Jaccard similarity over a precomputed, multikey-indexed trigram
+        array; only documents sharing at least one trigram are examined."""
+        if not query_trigrams:
+            return []
+        shared = {"$size": {"$setIntersection": [f"${field_name}", query_trigrams]}}
+        union = {
+            "$subtract": [
+                {"$add": [{"$size": f"${field_name}"}, len(query_trigrams)]},
+                "$$shared",
+            ]
+        }
+        pipeline = [
+            {"$match": {field_name: {"$in": query_trigrams}}},
+            {
+                "$project": {
+                    **projection,
+                    "similarity": {
+                        "$let": {
+                            "vars": {"shared": shared},
+                            "in": {"$divide": ["$$shared", union]},
+                        }
+                    },
+                }
+            },
+            {"$match": {"similarity": {"$gte": threshold}}},
+            {"$sort": {"similarity": -1, "_id": -1}},
+            {"$limit": limit},
+        ]
+        cursor = self._collection.aggregate(pipeline)
+        return [serialize_document(doc) async for doc in cursor]
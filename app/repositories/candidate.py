@@ -1,15 +1,69 @@
+from typing import Any
+
+from bson import ObjectId
+from pymongo import IndexModel
+
 from app.models.collections import CANDIDATES_COLLECTION
 from app.repositories.base import BaseRepository
+from app.utils.mongo import serialize_document
+
+# Best match first; ties (and score-less candidates, which sort last) by _id.
+CANDIDATE_SORT = [("score", -1), ("_id", -1)]
 
 
 class CandidateRepository(BaseRepository):
     collection_name = CANDIDATES_COLLECTION
-
-    async def ensure_indexes(self) -> None:
-        await self._collection.create_index([("request_id", 1)], name="idx_candidate_request")
-        await self._collection.create_index([("developer_id", 1)], name="idx_candidate_developer")
-        await self._collection.create_index(
+    # Lookups by request_id alone use the prefix of the score index.
+    indexes = [
+        IndexModel(
+            [("request_id", 1), ("score", -1), ("_id", -1)],
+            name="idx_candidate_request_score",
+        ),
+        IndexModel([("developer_id", 1)], name="idx_candidate_developer"),
+        IndexModel(
             [("request_id", 1), ("developer_id", 1)],
             unique=True,
             name="uniq_candidate_request_developer",
+        ),
+    ]
+
+    async def list_request_ids_by_developer(self, developer_id: str) -> list[str]:
+        return await self._collection.distinct("request_id", {"developer_id": developer_id})
+
+    @staticmethod
+    def after_cursor_filter(
+        score: float | None,
+        candidate_id: ObjectId,
+    ) -> dict[str, Any]:
+        """Documents that sort after (score, _id) in CANDIDATE_SORT."""
+        if score is None:
+            return {"score": None, "_id": {"$lt": candidate_id}}
+        return {
+            "$or": [
+                {"score": {"$lt": score}},
+                {"score": score, "_id": {"$lt": candidate_id}},
+                {"score": None},
+            ]
+        }
+
+    async def list_top_for_request(
+        self,
+        request_id: str,
+        *,
+        limit: int,
+        include_description: bool = True,
+        after: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """The request's best-scored candidates, read from the
+        (request_id, score, _id) index without sorting in memory."""
+        filters: dict[str, Any] = {"request_id": request_id}
+        if after:
+            filters = {"$and": [filters, after]}
+        projection = None if include_description else {"description": 0}
+        cursor = (
+            self._collection.find(filters, projection)
+            .sort(CANDIDATE_SORT)
+            .limit(limit)
+            .batch_size(limit)
         )
+        return [serialize_document(document) async for document in cursor]
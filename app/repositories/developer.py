@@ -1,10 +1,124 @@
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+from pymongo import IndexModel
+
 from app.models.collections import DEVELOPERS_COLLECTION
 from app.repositories.base import BaseRepository
+from app.utils.mongo import serialize_document
+from app.utils.search import prefix_match_filter, prefix_score_expression
+
+DEVELOPER_LIST_PROJECTION = {
+    "full_name": 1,
+    "role": 1,
+    "status": 1,
+    "rate": 1,
+    "stack": 1,
+    "experience_years": 1,
+    "parsing_status": 1,
+    "created_at": 1,
+    "grade": 1,
+    "work_format": 1,
+}
+DEVELOPER_LIST_SORT = [("created_at", -1), ("_id", -1)]
+SEARCH_FIELD_WEIGHTS = {
+    "$search.name": 3.0,
+    "$search.role": 2.0,
+    "$search.stack": 1.0,
+}
+TEXT_INDEX_WEIGHTS = {
+    "full_name": 10,
+    "role": 5,
+    "stack.core": 3,
+    "stack.additional": 2,
+    "resume_text": 1,
+}
 
 
 class DeveloperRepository(BaseRepository):
     collection_name = DEVELOPERS_COLLECTION
+    indexes = [
+        IndexModel(DEVELOPER_LIST_SORT, name="idx_developer_created"),
+        IndexModel(
+            [("role", 1), *DEVELOPER_LIST_SORT],
+            name="idx_developer_role_created",
+        ),
+        IndexModel(
+            [("grade", 1), *DEVELOPER_LIST_SORT],
+            name="idx_developer_grade_created",
+        ),
+        IndexModel(
+            [("work_format", 1), *DEVELOPER_LIST_SORT],
+            name="idx_developer_work_format_created",
+        ),
+        IndexModel([("updated_at", 1), ("_id", 1)], name="idx_developer_updated_id"),
+        IndexModel([("search_tokens", 1)], name="idx_developer_search_tokens"),
+        IndexModel([("name_trigrams", 1)], name="idx_developer_name_trigrams"),
+        IndexModel(
+            [(field_name, "text") for field_name in TEXT_INDEX_WEIGHTS],
+            weights=TEXT_INDEX_WEIGHTS,
+            default_language="none",
+            name="txt_developer_search",
+        ),
+    ]
 
     async def list_distinct_values(self, field_name: str) -> list[str]:
         values = await self._collection.distinct(field_name)
         return [value for value in values if isinstance(value, str) and value.strip()]
+
+    @staticmethod
+    def after_cursor_filter(
+        created_at: datetime | None,
+        developer_id: ObjectId,
+    ) -> dict[str, Any]:
+        """Documents that sort after (created_at, _id) in DEVELOPER_LIST_SORT."""
+        if created_at is None:
+            return {"created_at": None, "_id": {"$lt": developer_id}}
+        return {
+            "$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": developer_id}},
+                {"created_at": None},
+            ]
+        }
+
+    async def search(
+        self,
+        *,
+        filters: dict[str, Any],
+        terms: list[str] | None = None,
+        text_query: str | None = None,
+        skip: int = 0,
+        limit: int = 50,
+        projection: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Relevance-ranked search: prefix matching over the precomputed
+        profile tokens, or $text over every field including resume_text."""
+        if text_query:
+            match = {**filters, "$text": {"$search": text_query}}
+            score: dict[str, Any] = {"$meta": "textScore"}
+        else:
+            match = {**filters, **prefix_match_filter(terms or [])}
+            score = prefix_score_expression(terms or [], SEARCH_FIELD_WEIGHTS)
+        pipeline: list[dict[str, Any]] = [
+            {"$match": match},
+            {"$addFields": {"search_score": score}},
+            {"$sort": {"search_score": -1, "created_at": -1, "_id": -1}},
+            {"$skip": skip},
+            {"$limit": limit},
+        ]
+        if projection:
+            pipeline.append({"$project": projection})
+        cursor = self._collection.aggregate(pipeline)
+        return [serialize_document(doc) async for doc in cursor]
+
+    @staticmethod
+    def search_filter(
+        *,
+        terms: list[str] | None = None,
+        text_query: str | None = None,
+    ) -> dict[str, Any]:
+        if text_query:
+            return {"$text": {"$search": text_query}}
+        return prefix_match_filter(terms or [])
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Any
+
+from pymongo import IndexModel, UpdateOne
+
+from app.models.collections import FUNNEL_COUNTERS_COLLECTION
+from app.repositories.base import BaseRepository
+from app.utils.funnel import COUNTER_GROUPS, Delta
+
+
+class FunnelCounterRepository(BaseRepository):
+    """Response stage counters, one document per (request_id, day)."""
+
+    collection_name = FUNNEL_COUNTERS_COLLECTION
+    indexes = [
+        IndexModel(
+            [("request_id", 1), ("day", 1)],
+            unique=True,
+            name="uniq_funnel_request_day",
+        ),
+        IndexModel([("day", 1)], name="idx_funnel_day"),
+    ]
+
+    async def increment_many(self, increments: list[tuple[str, datetime, Delta]]) -> None:
+        operations = [
+            UpdateOne(
+                {"request_id": request_id, "day": day},
+                {"$inc": delta},
+                upsert=True,
+            )
+            for request_id, day, delta in increments
+            if request_id and delta
+        ]
+        if operations:
+            await self._collection.bulk_write(operations, ordered=False)
+
+    async def list_counters(
+        self,
+        *,
+        request_ids: list[str] | None = None,
+        day_from: datetime | None = None,
+        day_to: datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        filters: dict[str, Any] = {}
+        if request_ids is not None:
+            filters["request_id"] = {"$in": request_ids}
+        day_range: dict[str, datetime] = {}
+        if day_from is not None:
+            day_range["$gte"] = day_from
+        if day_to is not None:
+            day_range["$lte"] = day_to
+        if day_range:
+            filters["day"] = day_range
+        projection = {"request_id": 1, "day": 1, **{group: 1 for group in COUNTER_GROUPS}}
+        cursor = self._collection.find(filters, projection)
+        return [document async for document in cursor]
+
+    async def replace_all(
+        self,
+        documents: list[dict[str, Any]],
+        *,
+        batch_size: int = 1000,
+    ) -> None:
+        await self._collection.delete_many({})
+        for start in range(0, len(documents), batch_size):
+            await self._collection.insert_many(
+                documents[start : start + batch_size],
+                ordered=False,
+            )
@@ -0,0 +1,163 @@
+"""Registry of the indexes every repository declares, and a reconciler that
+compares them with what the database actually has."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+from typing import Any
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from app.repositories.audit_event import (
+    AuditEventArchiveRepository,
+    AuditEventRepository,
+)
+from app.repositories.candidate import CandidateRepository
+from app.repositories.developer import DeveloperRepository
+from app.repositories.funnel_counter import FunnelCounterRepository
+from app.repositories.kanban_card import KanbanCardRepository
+from app.repositories.outbox import OutboxRepository
+from app.repositories.request import RequestRepository
+from app.repositories.response import ResponseRepository
+from app.repositories.role import RoleRepository
+from app.repositories.telegram_login_session import TelegramLoginSessionRepository
+
+logger = logging.getLogger(__name__)
+
+INDEXED_REPOSITORIES = [
+    AuditEventArchiveRepository,
+    AuditEventRepository,
+    CandidateRepository,
+    DeveloperRepository,
+    FunnelCounterRepository,
+    KanbanCardRepository,
+    OutboxRepository,
+    RequestRepository,
+    ResponseRepository,
+    RoleRepository,
+    TelegramLoginSessionRepository,
+]
+
+
+@dataclass
+class IndexReport:
+    collection: str
+    missing: list[str] = field(default_factory=list)
+    conflicting: list[str] = field(default_factory=list)
+    extra: list[str] = field(default_factory=list)
+    unused: list[str] = field(default_factory=list)
+    built: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.conflicting
+
+
+def _key_of(document: dict[str, Any]) -> tuple:
+    return tuple((name, direction) for name, direction in dict(document["key"]).items())
+
+
+def _is_text(document: dict[str, Any]) -> bool:
+    return any(
+        direction == "text" or name == "_fts"
+        for name, direction in dict(document["key"]).items()
+    )
+
+
+async def _unused_index_names(collection: Any) -> list[str]:
+    """Indexes with no recorded access since the server (re)started."""
+    try:
+        stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+    except OperationFailure:
+        return []
+    return sorted(
+        item["name"]
+        for item in stats
+        if item.get("name") != "_id_" and (item.get("accesses") or {}).get("ops", 0) == 0
+    )
+
+
+async def diff_indexes(
+    db: AsyncIOMotorDatabase,
+    collection_name: str,
+    declared: list[IndexModel],
+) -> tuple[IndexReport, list[IndexModel]]:
+    collection = db[collection_name]
+    existing = {item["name"]: item async for item in collection.list_indexes()}
+    existing_keys = {
+        _key_of(item): name for name, item in existing.items() if not _is_text(item)
+    }
+    existing_text = [name for name, item in existing.items() if _is_text(item)]
+    report = IndexReport(collection=collection_name)
+    to_build: list[IndexModel] = []
+    matched: set[str] = {"_id_"}
+    for model in declared:
+        document = model.document
+        name = document["name"]
+        if name in existing:
+            if not _is_text(document) and _key_of(existing[name]) != _key_of(document):
+                report.conflicting.append(name)
+            matched.add(name)
+            continue
+        if _is_text(document) and existing_text:
+            # A collection can only have one text index; a differently named
+            # one means the declaration changed.
+            report.conflicting.append(name)
+            matched.update(existing_text)
+            continue
+        same_key = existing_keys.get(_key_of(document))
+        if same_key is not None:
+            matched.add(same_key)
+            continue
+        report.missing.append(name)
+        to_build.append(model)
+    report.extra = sorted(name for name in existing if name not in matched)
+    report.unused = [
+        name for name in await _unused_index_names(collection) if name in existing
+    ]
+    return report, to_build
+
+
+async def reconcile_indexes(
+    db: AsyncIOMotorDatabase,
+    *,
+    build: bool = True,
+) -> list[IndexReport]:
+    reports = []
+    for repository in INDEXED_REPOSITORIES:
+        report, to_build = await diff_indexes(
+            db,
+            repository.collection_name,
+            repository.indexes,
+        )
+        if build and to_build:
+            try:
+                report.built = await db[repository.collection_name].create_indexes(
+                    to_build
+                )
+                report.missing = []
+            except OperationFailure:
+                logger.exception(
+                    "Index build failed for %s", repository.collection_name
+                )
+        reports.append(report)
+    return reports
+
+
+def log_index_reports(reports: list[IndexReport]) -> None:
+    for report in reports:
+        if report.built:
+            logger.info("Built indexes on %s: %s", report.collection, report.built)
+        if report.missing or report.conflicting:
+            logger.warning(
+                "Index drift on %s: missing=%s conflicting=%s",
+                report.collection,
+                report.missing,
+                report.conflicting,
+            )
+        if report.extra:
+            logger.info("Undeclared indexes on %s: %s", report.collection, report.extra)
+        if report.unused:
+            logger.info("Unused indexes on %s: %s", report.collection, report.unused)
@@ -0,0 +1,82 @@
+from typing import Any
+
+from pymongo import IndexModel, ReplaceOne
+
+from app.models.collections import KANBAN_CARDS_COLLECTION
+from app.repositories.base import BaseRepository
+from app.schemas.response_stage import ResponseStage
+
+CARD_PROJECTION = {
+    "name": 1,
+    "status": 1,
+    "rate": 1,
+    "application_deadline": 1,
+    "deadline_at": 1,
+    "updated_at": 1,
+    "responses_by_stage": 1,
+}
+
+
+class KanbanCardRepository(BaseRepository):
+    collection_name = KANBAN_CARDS_COLLECTION
+    indexes = [
+        IndexModel([("created_at", -1)], name="idx_kanban_card_created"),
+        IndexModel(
+            [("role", 1), ("created_at", -1)],
+            name="idx_kanban_card_role_created",
+        ),
+        IndexModel([("deadline_at", 1)], name="idx_kanban_card_deadline"),
+        IndexModel([("developer_ids", 1)], name="idx_kanban_card_developer"),
+        IndexModel([("response_ids", 1)], name="idx_kanban_card_response"),
+    ]
+
+    async def list_cards(self, filters: dict[str, Any]) -> list[dict[str, Any]]:
+        cursor = self._collection.find(filters, CARD_PROJECTION).sort("created_at", -1)
+        return [doc async for doc in cursor]
+
+    async def replace_cards(self, cards: list[dict[str, Any]]) -> None:
+        if not cards:
+            return
+        await self._collection.bulk_write(
+            [ReplaceOne({"_id": card["_id"]}, card, upsert=True) for card in cards],
+            ordered=False,
+        )
+
+    async def delete_cards(self, card_ids: list[Any]) -> None:
+        if card_ids:
+            await self._collection.delete_many({"_id": {"$in": card_ids}})
+
+    async def delete_refreshed_before(self, refreshed_at: Any) -> int:
+        result = await self._collection.delete_many(
+            {"refreshed_at": {"$lt": refreshed_at}}
+        )
+        return result.deleted_count
+
+    async def list_ids_by_developer(self, developer_id: str) -> list[Any]:
+        cursor = self._collection.find({"developer_ids": developer_id}, {"_id": 1})
+        return [doc["_id"] async for doc in cursor]
+
+    async def list_ids_by_developers(self, developer_ids: list[str]) -> list[Any]:
+        if not developer_ids:
+            return []
+        cursor = self._collection.find({"developer_ids": {"$in": developer_ids}}, {"_id": 1})
+        return [doc["_id"] async for doc in cursor]
+
+    async def list_ids_by_response(self, response_id: str) -> list[Any]:
+        cursor = self._collection.find({"response_ids": response_id}, {"_id": 1})
+        return [doc["_id"] async for doc in cursor]
+
+    async def set_developer_fields(
+        self,
+        developer_id: str,
+        fields: dict[str, Any],
+    ) -> None:
+        update: dict[str, Any] = {}
+        for stage in ResponseStage:
+            for key, value in fields.items():
+                update[f"responses_by_stage.{stage.value}.$[item].{key}"] = value
+        await self._collection.update_many(
+            {"developer_ids": developer_id},
+            {"$set": update},
+            array_filters=[{"item.developer_id": developer_id}],
+        )
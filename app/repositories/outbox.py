@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+import uuid
+
+from pymongo import IndexModel
+
+from app.models.collections import OUTBOX_COLLECTION
+from app.repositories.base import BaseRepository
+
+
+class OutboxRepository(BaseRepository):
+    """Queue tasks waiting to be relayed to Redis. Each entry is inserted in
+    the same transaction as the entity change that produced it and deleted
+    once published."""
+
+    collection_name = OUTBOX_COLLECTION
+    indexes = [
+        IndexModel([("task_id", 1)], unique=True, name="uniq_outbox_task_id"),
+        IndexModel([("available_at", 1)], name="idx_outbox_available"),
+    ]
+
+    async def claim_batch(
+        self,
+        *,
+        limit: int,
+        lease_seconds: float,
+    ) -> list[dict[str, Any]]:
+        """Lease up to limit due entries to this caller so concurrent relays
+        do not publish the same entry; an unreleased lease expires on its own."""
+        now = datetime.now(timezone.utc)
+        due = await self._collection.find(
+            {"available_at": {"$lte": now}},
+            {"_id": 1},
+        ).sort("available_at", 1).limit(limit).to_list(length=limit)
+        if not due:
+            return []
+        claim = str(uuid.uuid4())
+        await self._collection.update_many(
+            {
+                "_id": {"$in": [document["_id"] for document in due]},
+                "available_at": {"$lte": now},
+            },
+            {
+                "$set": {
+                    "available_at": now + timedelta(seconds=lease_seconds),
+                    "claim": claim,
+                }
+            },
+        )
+        cursor = self._collection.find({"claim": claim}).sort("available_at", 1)
+        return await cursor.to_list(length=limit)
+
+    async def delete_entries(self, entry_ids: list[Any]) -> int:
+        if not entry_ids:
+            return 0
+        result = await self._collection.delete_many({"_id": {"$in": entry_ids}})
+        return result.deleted_count
+
+    async def retry_later(
+        self,
+        entry_ids: list[Any],
+        *,
+        delay_seconds: float,
+        error: str,
+    ) -> None:
+        if not entry_ids:
+            return
+        await self._collection.update_many(
+            {"_id": {"$in": entry_ids}},
+            {
+                "$set": {
+                    "available_at": datetime.now(timezone.utc)
+                    + timedelta(seconds=delay_seconds),
+                    "last_error": error,
+                },
+                "$unset": {"claim": ""},
+                "$inc": {"attempts": 1},
+            },
+        )
@@ -1,11 +1,58 @@
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+from pymongo import IndexModel
+
 from app.models.collections import REQUESTS_COLLECTION
 from app.repositories.base import BaseRepository
+from app.utils.mongo import serialize_document
+
+REQUEST_LIST_SORT = [("created_at", -1), ("_id", -1)]
+# Soonest deadline first; only requests whose deadline could be parsed.
+REQUEST_DEADLINE_SORT = [("deadline_at", 1), ("_id", 1)]
+REQUEST_SORTS = {"created_at": REQUEST_LIST_SORT, "deadline": REQUEST_DEADLINE_SORT}
+# List views leave out the large free-text fields and the search helpers.
+REQUEST_SUMMARY_PROJECTION = {
+    "raw_text": 0,
+    "meta": 0,
+    "name_trigrams": 0,
+    "search_indexed_at": 0,
+}
+REQUEST_FULL_PROJECTION = {"name_trigrams": 0, "search_indexed_at": 0}
 
 
 class RequestRepository(BaseRepository):
     collection_name = REQUESTS_COLLECTION
+    indexes = [
+        IndexModel([("created_at", -1), ("_id", -1)], name="idx_request_created_id"),
+        IndexModel(
+            [("status", 1), ("created_at", -1)],
+            name="idx_request_status_created",
+        ),
+        IndexModel(
+            [("vacancy.role", 1), ("status", 1), ("created_at", -1)],
+            name="idx_request_role_status_created",
+        ),
+        IndexModel(
+            [("vacancy.grade", 1), ("created_at", -1)],
+            name="idx_request_grade_created",
+        ),
+        IndexModel(
+            [("vacancy.work_format", 1), ("created_at", -1)],
+            name="idx_request_work_format_created",
+        ),
+        IndexModel([("updated_at", 1), ("_id", 1)], name="idx_request_updated_id"),
+        IndexModel([("deadline_at", 1), ("_id", 1)], name="idx_request_deadline_id"),
+        IndexModel(
+            [("has_deadline", 1), ("created_at", -1), ("_id", -1)],
+            name="idx_request_has_deadline_created_id",
+        ),
+        IndexModel([("name_trigrams", 1)], name="idx_request_name_trigrams"),
+    ]
 
-    async def ensure_indexes(self) -> None:
+    async def ensure_validator(self) -> None:
         validator = {
             "$jsonSchema": {
                 "bsonType": "object",
@@ -35,20 +82,61 @@ class RequestRepository(BaseRepository):
             except Exception:
                 pass
 
+    async def ensure_indexes(self) -> None:
+        await self.ensure_validator()
+        await super().ensure_indexes()
+
     async def get_request_by_id(self, request_id: str) -> dict | None:
         return await self.get_by_id(request_id)
 
     async def delete_request_by_id(self, request_id: str) -> bool:
         return await self.delete_by_id(request_id)
 
-    async def list_requests(
+    @staticmethod
+    def after_cursor_filter(
+        created_at: datetime | None,
+        request_id: ObjectId,
+    ) -> dict[str, Any]:
+        """Documents that sort after (created_at, _id) in REQUEST_LIST_SORT."""
+        if created_at is None:
+            return {"created_at": None, "_id": {"$lt": request_id}}
+        return {
+            "$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": request_id}},
+                {"created_at": None},
+            ]
+        }
+
+    @staticmethod
+    def after_deadline_cursor_filter(
+        deadline_at: datetime,
+        request_id: ObjectId,
+    ) -> dict[str, Any]:
+        """Documents that sort after (deadline_at, _id) in REQUEST_DEADLINE_SORT."""
+        return {
+            "$or": [
+                {"deadline_at": {"$gt": deadline_at}},
+                {"deadline_at": deadline_at, "_id": {"$gt": request_id}},
+            ]
+        }
+
+    async def iter_requests(
         self,
-        filters: dict | None = None,
+        filters: dict[str, Any] | None = None,
         *,
-        sort: list[tuple[str, int]] | None = None,
-    ) -> list[dict]:
-        query = filters or {}
-        cursor = self._collection.find(query)
-        if sort:
-            cursor = cursor.sort(sort)
-        return [doc async for doc in cursor]
+        projection: dict[str, Any] | None = None,
+        sort: list[tuple[str, int]] = REQUEST_LIST_SORT,
+        limit: int = 0,
+        batch_size: int = 200,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Serialized requests in the given order, fetched from the server
+        batch by batch rather than materialized up front."""
+        cursor = (
+            self._collection.find(filters or {}, projection)
+            .sort(sort)
+            .limit(limit)
+            .batch_size(batch_size)
+        )
+        async for document in cursor:
+            yield serialize_document(document)
@@ -1,16 +1,74 @@
+import asyncio
+from typing import Any
+
+from bson import ObjectId
+from pymongo import IndexModel, ReturnDocument
+
 from app.models.collections import RESPONSES_COLLECTION
 from app.repositories.base import BaseRepository
+from app.schemas.response_stage import ResponseStage
+from app.utils.funnel import next_reached_stage_expression
+from app.utils.mongo import serialize_document
+from app.utils.response_stage import next_max_stage_expression, transition_source_filter
+
+
+def version_filter(expected_version: int | None) -> dict[str, Any]:
+    if expected_version is None:
+        return {}
+    if expected_version == 0:
+        # Responses written before versioning have no field at all.
+        return {"version": {"$in": [0, None]}}
+    return {"version": expected_version}
+
+
+def change_filter(
+    response_id: str,
+    *,
+    stage: ResponseStage | None,
+    expected_version: int | None,
+) -> dict[str, Any]:
+    filters: dict[str, Any] = {"_id": ObjectId(response_id)}
+    if stage is not None:
+        filters.update(transition_source_filter(stage))
+    filters.update(version_filter(expected_version))
+    return filters
+
+
+def change_pipeline(
+    *,
+    stage: ResponseStage | None,
+    fields: dict[str, Any],
+) -> list[dict[str, Any]]:
+    values: dict[str, Any] = {
+        key: {"$literal": value} for key, value in fields.items()
+    }
+    if stage is not None:
+        values["stage"] = stage.value
+        values["max_stage"] = next_max_stage_expression(stage)
+        values["reached_stage"] = next_reached_stage_expression(stage)
+        # Restarted only by an actual move; feeds time-in-stage analytics.
+        values["stage_entered_at"] = {
+            "$cond": [
+                {"$eq": ["$stage", stage.value]},
+                "$stage_entered_at",
+                values.get("updated_at", "$$NOW"),
+            ]
+        }
+    values["version"] = {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+    return [{"$set": values}]
 
 
 class ResponseRepository(BaseRepository):
     collection_name = RESPONSES_COLLECTION
-
-    async def ensure_indexes(self) -> None:
-        await self._collection.create_index(
+    # Lookups by request_id alone use the prefix of the unique index.
+    indexes = [
+        IndexModel(
             [("request_id", 1), ("developer_id", 1)],
             unique=True,
             name="uniq_response_request_developer",
-        )
+        ),
+        IndexModel([("developer_id", 1)], name="idx_response_developer"),
+    ]
 
     async def get_by_request_developer(
         self,
@@ -23,3 +81,78 @@ class ResponseRepository(BaseRepository):
             {"request_id": request_id, "developer_id": developer_id},
             session=session,
         )
+
+    async def apply_change(
+        self,
+        response_id: str,
+        *,
+        stage: ResponseStage | None,
+        fields: dict[str, Any],
+        expected_version: int | None = None,
+        session: Any | None = None,
+    ) -> dict[str, Any] | None:
+        """Validate the stage move and the version and write in one call.
+
+        Returns the document as it was before the change, or None when the
+        response is gone, the move is not allowed from its current stage or
+        the version no longer matches.
+        """
+        document = await self._collection.find_one_and_update(
+            change_filter(response_id, stage=stage, expected_version=expected_version),
+            change_pipeline(stage=stage, fields=fields),
+            return_document=ReturnDocument.BEFORE,
+            session=session,
+        )
+        return serialize_document(document) if document else None
+
+    async def list_request_ids_by_developer(self, developer_id: str) -> list[str]:
+        return await self._collection.distinct("request_id", {"developer_id": developer_id})
+
+    async def list_assigned_developer_ids(
+        self,
+        request_id: str,
+        developer_ids: list[str],
+    ) -> list[str]:
+        if not developer_ids:
+            return []
+        cursor = self._collection.find(
+            {"request_id": request_id, "developer_id": {"$in": developer_ids}},
+            {"_id": 0, "developer_id": 1},
+        )
+        return [document["developer_id"] async for document in cursor]
+
+    async def list_by_ids(self, response_ids: list[str]) -> list[dict[str, Any]]:
+        if not response_ids:
+            return []
+        return await self.list(
+            filters={"_id": {"$in": [ObjectId(item) for item in response_ids]}},
+            limit=len(response_ids),
+        )
+
+    async def apply_stage_moves(
+        self,
+        moves: list[dict[str, Any]],
+    ) -> list[dict[str, Any] | None]:
+        """Pre-validated moves, one conditional find_one_and_update each,
+        sent concurrently.
+
+        Each move carries the stage and version it was validated against.
+        The result, in move order, is the document right after that move, or
+        None when the response changed since then (or is gone); it comes from
+        the move's own write, whatever other writers do afterwards.
+        """
+        documents = await asyncio.gather(
+            *(
+                self._collection.find_one_and_update(
+                    {
+                        "_id": ObjectId(move["response_id"]),
+                        "stage": move["from_stage"],
+                        **version_filter(move["from_version"]),
+                    },
+                    {"$set": move["fields"]},
+                    return_document=ReturnDocument.AFTER,
+                )
+                for move in moves
+            )
+        )
+        return [serialize_document(document) if document else None for document in documents]
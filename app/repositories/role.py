@@ -1,16 +1,12 @@
+from pymongo import IndexModel
+
 from app.models.collections import ROLES_COLLECTION
 from app.repositories.base import BaseRepository
 
 
 class RoleRepository(BaseRepository):
     collection_name = ROLES_COLLECTION
-
-    async def ensure_indexes(self) -> None:
-        await self._collection.create_index(
-            [("name", 1)],
-            unique=True,
-            name="uniq_role_name",
-        )
+    indexes = [IndexModel([("name", 1)], unique=True, name="uniq_role_name")]
 
     async def get_by_name(self, name: str) -> dict | None:
         return await self._collection.find_one({"name": name})
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from app.models.collections import SYNC_STATE_COLLECTION
+from app.repositories.base import BaseRepository
+from app.utils.dates import as_utc
+
+# A pass resumes this much before the previous watermark, so writes committed
+# late or stamped by a skewed clock are not missed.
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+
+class SyncStateRepository(BaseRepository):
+    """Watermarks of the background syncs, one document per sync keyed by name."""
+
+    collection_name = SYNC_STATE_COLLECTION
+
+    async def get_since(self, name: str) -> datetime | None:
+        """Where the next pass of the sync starts: its watermark minus
+        WATERMARK_OVERLAP, or None when it has never completed."""
+        document = await self._collection.find_one({"_id": name}, {"watermark": 1})
+        watermark = as_utc((document or {}).get("watermark"))
+        return watermark - WATERMARK_OVERLAP if watermark else None
+
+    async def set_watermark(self, name: str, watermark: datetime) -> None:
+        await self._collection.update_one(
+            {"_id": name},
+            {"$set": {"watermark": watermark}},
+            upsert=True,
+        )
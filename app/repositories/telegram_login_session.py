@@ -1,20 +1,20 @@
 from typing import Any
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo import ReturnDocument
+from pymongo import IndexModel, ReturnDocument
 
 from app.models.collections import TELEGRAM_LOGIN_SESSIONS_COLLECTION
 
 
 class TelegramLoginSessionRepository:
+    collection_name = TELEGRAM_LOGIN_SESSIONS_COLLECTION
+    indexes = [IndexModel([("expires_at", 1)], expireAfterSeconds=0)]
+
     def __init__(self, db: AsyncIOMotorDatabase) -> None:
         self._collection = db[TELEGRAM_LOGIN_SESSIONS_COLLECTION]
 
     async def ensure_indexes(self) -> None:
-        await self._collection.create_index(
-            [("expires_at", 1)],
-            expireAfterSeconds=0,
-        )
+        await self._collection.create_indexes(self.indexes)
 
     async def create_session(self, payload: dict[str, Any]) -> None:
         await self._collection.insert_one(payload)
@@ -37,8 +37,8 @@ class TelegramLoginSessionRepository:
         login_token: str,
         payload: dict[str, Any],
     ) -> dict[str, Any] | None:
-        await self._collection.update_one(
+        return await self._collection.find_one_and_update(
             {"_id": login_token},
             {"$set": payload},
+            return_document=ReturnDocument.AFTER,
         )
-        return await self.get_by_id(login_token)
@@ -0,0 +1,29 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+from app.schemas.response_stage import ResponseStage
+
+
+class FunnelStage(BaseModel):
+    stage: ResponseStage
+    reached: int
+    entered: int
+    exited: int
+    deleted: int
+    conversion_from_start: float | None = None
+    conversion_from_previous: float | None = None
+    avg_seconds_in_stage: float | None = None
+
+
+class FunnelGroup(BaseModel):
+    key: str | None = None
+    total: int
+    stages: list[FunnelStage]
+
+
+class FunnelResponse(BaseModel):
+    group_by: str
+    date_from: date | None = None
+    date_to: date | None = None
+    groups: list[FunnelGroup]
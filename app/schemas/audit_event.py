@@ -10,3 +10,9 @@ class AuditEventInDB(BaseModel):
     action: str
     payload_json: dict
     created_at: datetime | None = None
+
+
+class AuditEventListResponse(BaseModel):
+    items: list[AuditEventInDB]
+    size: int
+    next_cursor: str | None = None
@@ -80,8 +80,21 @@ class DeveloperListItem(BaseModel):
 class DeveloperListResponse(BaseModel):
     items: list[DeveloperListItem]
     total: int
+    total_is_estimate: bool = False
     page: int
     size: int
+    next_cursor: str | None = None
+
+
+class DeveloperLookupItem(BaseModel):
+    id: str
+    full_name: str
+    role: str | None = None
+    similarity: float
+
+
+class DeveloperLookupResponse(BaseModel):
+    items: list[DeveloperLookupItem]
 
 
 class DeveloperOptionsResponse(BaseModel):
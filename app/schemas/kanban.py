@@ -12,6 +12,7 @@ class KanbanResponseItem(BaseModel):
     rate: str | None = None
     developer_role: str | None = None
     updated_at: datetime | None = None
+    version: int = 0
     allowed_stages: list[ResponseStage] = Field(default_factory=list)
 
 
@@ -21,6 +22,7 @@ class KanbanRequestItem(BaseModel):
     status: str | None = None
     rate: str | None = None
     application_deadline: str | None = None
+    deadline_at: datetime | None = None
     updated_at: datetime | None = None
     responses_by_stage: dict[ResponseStage, list[KanbanResponseItem]] = Field(
         default_factory=dict
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class AuditSinkMetrics(BaseModel):
+    durable: bool
+    buffer_depth: int
+    buffer_capacity: int
+    written: int
+    dropped: int
+    failed_flushes: int
+    last_flush_at: datetime | None = None
+
+
+class MetricsResponse(BaseModel):
+    audit_sink: AuditSinkMetrics
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class QueueStatsItem(BaseModel):
+    name: str
+    backend: str
+    depth: int
+    pending: int
+    lag: int
+    oldest_age_seconds: float
+
+
+class QueueStatsResponse(BaseModel):
+    items: list[QueueStatsItem]
@@ -95,10 +95,18 @@ class RequestInDB(BaseModel):
     vacancy: RequestVacancy | None = None
     meta: RequestMeta | None = None
     raw_text: str | None = None
+    has_deadline: bool | None = None
+    deadline_at: datetime | None = None
     created_at: datetime | None = None
     updated_at: datetime | None = None
 
 
+class RequestListResponse(BaseModel):
+    items: list[RequestInDB]
+    size: int
+    next_cursor: str | None = None
+
+
 class RequestCandidateDeveloper(BaseModel):
     id: str
     full_name: str
@@ -114,6 +122,12 @@ class RequestCandidateItem(BaseModel):
     already_assigned: bool = False
 
 
+class RequestCandidateListResponse(BaseModel):
+    items: list[RequestCandidateItem]
+    size: int
+    next_cursor: str | None = None
+
+
 class RequestResponseItem(BaseModel):
     id: str
     developer_id: str
@@ -130,12 +144,40 @@ class RequestDetailResponse(BaseModel):
     vacancy: RequestVacancy | None = None
     meta: RequestMeta | None = None
     raw_text: str | None = None
+    has_deadline: bool | None = None
+    deadline_at: datetime | None = None
     created_at: datetime | None = None
     updated_at: datetime | None = None
     candidates: list[RequestCandidateItem] = Field(default_factory=list)
+    candidates_next_cursor: str | None = None
     responses: list[RequestResponseItem] = Field(default_factory=list)
 
 
+class RequestPatchResponse(BaseModel):
+    id: str
+    status: RequestStatus | None = None
+    name: str | None = None
+    vacancy: RequestVacancy | None = None
+    has_deadline: bool | None = None
+    deadline_at: datetime | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    candidates: list[RequestCandidateItem] | None = None
+    candidates_next_cursor: str | None = None
+    responses: list[RequestResponseItem] | None = None
+
+
+class RequestLookupItem(BaseModel):
+    id: str
+    name: str | None = None
+    status: RequestStatus | None = None
+    similarity: float
+
+
+class RequestLookupResponse(BaseModel):
+    items: list[RequestLookupItem]
+
+
 class RequestPatchPayload(BaseModel):
     status: RequestStatus | None = None
     name: str | None = Field(default=None, max_length=150)
@@ -15,6 +15,7 @@ class ResponseCreatePayload(BaseModel):
 class ResponsePatchPayload(BaseModel):
     stage: ResponseStage | None = None
     rate: str | None = None
+    version: int | None = None
 
     @model_validator(mode="after")
     def validate_payload(self) -> "ResponsePatchPayload":
@@ -30,6 +31,7 @@ class ResponseInDB(BaseModel):
     rate: str | None = None
     stage: ResponseStage
     max_stage: int | None = None
+    version: int = 0
     created_at: datetime | None = None
     updated_at: datetime | None = None
 
@@ -38,6 +40,28 @@ class ResponseWithAllowed(ResponseInDB):
     allowed_stages: list[ResponseStage] = Field(default_factory=list)
 
 
+class ResponseStageMoveItem(BaseModel):
+    response_id: str
+    stage: ResponseStage
+    version: int | None = None
+
+
+class ResponseStageMovePayload(BaseModel):
+    items: list[ResponseStageMoveItem] = Field(min_length=1, max_length=500)
+
+
+class ResponseStageMoveResult(BaseModel):
+    response_id: str
+    ok: bool
+    status_code: int
+    detail: str | None = None
+    response: ResponseWithAllowed | None = None
+
+
+class ResponseStageMoveResponse(BaseModel):
+    results: list[ResponseStageMoveResult]
+
+
 class ResponseDeveloper(BaseModel):
     id: str
     full_name: str
@@ -60,3 +84,18 @@ class ResponseDetailResponse(BaseModel):
     developer: ResponseDeveloper
     request: ResponseRequest
     candidate: ResponseCandidate | None = None
+
+
+class ResponseStagePeriod(BaseModel):
+    stage: ResponseStage
+    entered_at: datetime
+    left_at: datetime | None = None
+    seconds: float
+
+
+class ResponseStageDurationsResponse(BaseModel):
+    response_id: str
+    current_stage: ResponseStage | None = None
+    periods: list[ResponseStagePeriod]
+    seconds_by_stage: dict[str, float]
+    truncated: bool = False
@@ -0,0 +1,309 @@
+"""Response funnel analytics served from incrementally maintained counters.
+
+Every response create, stage move and delete adds its increments to the
+(request_id, day) counter document, so a funnel query reads at most one
+small document per request and day in the range, however many responses or
+audit events there are. rebuild_funnel_counters() recomputes the counters
+from the audit trail after a bug or a data fix."""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+import logging
+from pathlib import Path
+from typing import Any
+
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from app.core.config import settings
+from app.models.collections import (
+    AUDIT_EVENTS_ARCHIVE_COLLECTION,
+    AUDIT_EVENTS_COLLECTION,
+    REQUESTS_COLLECTION,
+    RESPONSES_COLLECTION,
+)
+from app.repositories.funnel_counter import FunnelCounterRepository
+from app.schemas.analytics import FunnelGroup, FunnelResponse, FunnelStage
+from app.schemas.response_stage import ResponseStage
+from app.utils.dates import as_utc
+from app.utils.funnel import (
+    COUNTER_GROUPS,
+    Delta,
+    created_delta,
+    day_bucket,
+    deleted_delta,
+    merge_delta,
+    next_reached_stage,
+    stage_change_delta,
+)
+from app.utils.response_stage import (
+    STAGE_ORDER,
+    TERMINAL_STAGES,
+    can_transition,
+    parse_stage,
+)
+
+logger = logging.getLogger(__name__)
+
+FUNNEL_GROUPINGS = ("none", "request", "role", "week")
+REACHED_STAGE_BATCH_SIZE = 1000
+FUNNEL_STAGES = [stage for stage in STAGE_ORDER if stage not in TERMINAL_STAGES]
+
+
+def seconds_in_stage(response: dict[str, Any], now: datetime) -> float | None:
+    """Time since the response entered its current stage, from a stored
+    (serialized) document; None for responses written before it was tracked."""
+    entered_at = as_utc(response.get("stage_entered_at"))
+    if entered_at is None:
+        return None
+    return (now - entered_at).total_seconds()
+
+
+async def record_funnel_changes(
+    db: AsyncIOMotorDatabase,
+    changes: list[tuple[str, datetime, Delta]],
+) -> None:
+    """Apply (request_id, moment, delta) increments. The entity change has
+    already been written, so a failure here is logged rather than surfaced;
+    the counters can be rebuilt from audit events."""
+    increments = [
+        (request_id, day_bucket(moment), delta)
+        for request_id, moment, delta in changes
+        if delta
+    ]
+    if not increments:
+        return
+    try:
+        await FunnelCounterRepository(db).increment_many(increments)
+    except PyMongoError:
+        logger.exception("Funnel counter update failed")
+
+
+def _ratio(numerator: float, denominator: float) -> float | None:
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def _funnel_group(key: str | None, totals: dict[str, dict[str, float]]) -> FunnelGroup:
+    def value(group: str, stage: ResponseStage) -> float:
+        return totals.get(group, {}).get(stage.value, 0)
+
+    start = value("reached", ResponseStage.CV_SELECTED)
+    stages = []
+    previous: float | None = None
+    for stage in STAGE_ORDER:
+        reached = value("reached", stage)
+        timed = value("timed", stage)
+        in_funnel = stage in FUNNEL_STAGES
+        stages.append(
+            FunnelStage(
+                stage=stage,
+                reached=int(reached),
+                entered=int(value("entered", stage)),
+                exited=int(value("exited", stage)),
+                deleted=int(value("deleted", stage)),
+                conversion_from_start=_ratio(reached, start) if in_funnel else None,
+                conversion_from_previous=(
+                    _ratio(reached, previous) if in_funnel and previous is not None else None
+                ),
+                avg_seconds_in_stage=(
+                    round(value("seconds", stage) / timed, 1) if timed else None
+                ),
+            )
+        )
+        if in_funnel:
+            previous = reached
+    return FunnelGroup(key=key, total=int(start), stages=stages)
+
+
+async def _request_roles(
+    db: AsyncIOMotorDatabase,
+    request_ids: list[str],
+) -> dict[str, str | None]:
+    object_ids = [ObjectId(item) for item in request_ids if ObjectId.is_valid(item)]
+    cursor = db[REQUESTS_COLLECTION].find(
+        {"_id": {"$in": object_ids}},
+        {"vacancy.role": 1},
+    )
+    return {
+        str(document["_id"]): (document.get("vacancy") or {}).get("role")
+        async for document in cursor
+    }
+
+
+def _week_of(day: datetime) -> str:
+    return (day.date() - timedelta(days=day.weekday())).isoformat()
+
+
+async def get_funnel(
+    db: AsyncIOMotorDatabase,
+    *,
+    request_id: str | None = None,
+    role: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    group_by: str = "none",
+) -> FunnelResponse:
+    if group_by not in FUNNEL_GROUPINGS:
+        raise HTTPException(status_code=400, detail="Некорректная группировка")
+    request_ids: list[str] | None = None
+    if request_id is not None:
+        request_ids = [request_id]
+    if role:
+        cursor = db[REQUESTS_COLLECTION].find({"vacancy.role": role}, {"_id": 1})
+        role_ids = [str(document["_id"]) async for document in cursor]
+        request_ids = (
+            role_ids if request_ids is None else [i for i in request_ids if i in role_ids]
+        )
+    counters = await FunnelCounterRepository(db).list_counters(
+        request_ids=request_ids,
+        day_from=(
+            datetime.combine(date_from, time.min, tzinfo=timezone.utc) if date_from else None
+        ),
+        day_to=(
+            datetime.combine(date_to, time.min, tzinfo=timezone.utc) if date_to else None
+        ),
+    )
+    roles: dict[str, str | None] = {}
+    if group_by == "role":
+        roles = await _request_roles(db, sorted({doc["request_id"] for doc in counters}))
+    grouped: dict[str | None, dict[str, dict[str, float]]] = {}
+    for document in counters:
+        if group_by == "request":
+            key = document["request_id"]
+        elif group_by == "role":
+            key = roles.get(document["request_id"])
+        elif group_by == "week":
+            key = _week_of(document["day"])
+        else:
+            key = None
+        totals = grouped.setdefault(key, {})
+        for group in COUNTER_GROUPS:
+            for stage, amount in (document.get(group) or {}).items():
+                merge_delta(totals, {f"{group}.{stage}": amount})
+    if group_by == "none" and not grouped:
+        grouped[None] = {}
+    return FunnelResponse(
+        group_by=group_by,
+        date_from=date_from,
+        date_to=date_to,
+        groups=[
+            _funnel_group(key, totals)
+            for key, totals in sorted(grouped.items(), key=lambda item: str(item[0]))
+        ],
+    )
+
+
+async def rebuild_funnel_counters(db: AsyncIOMotorDatabase) -> int:
+    """Recompute all counters by replaying response audit events in order,
+    archived ones included. Live increments made while it runs may be lost;
+    run it when writes are quiet. Returns the number of counter documents
+    written. Refuses to run when events were archived to files, which it
+    cannot replay."""
+    if settings.audit_archive_target != "collection" and any(
+        Path(settings.audit_archive_dir).glob("audit_events-*.ndjson.gz")
+    ):
+        raise RuntimeError(
+            "Audit events were archived to files; the rebuild would drop their counts"
+        )
+    request_of: dict[str, str] = {}
+    async for document in db[RESPONSES_COLLECTION].find({}, {"request_id": 1}):
+        request_of[str(document["_id"])] = document.get("request_id")
+    counters: dict[tuple[str, datetime], dict[str, dict[str, float]]] = {}
+    reached_of: dict[str, int] = {}
+    state: dict[str, Any] = {"response_id": None}
+
+    def add(response_id: str, moment: datetime, delta: Delta) -> None:
+        request_id = request_of.get(response_id)
+        if request_id and delta:
+            merge_delta(counters.setdefault((request_id, day_bucket(moment)), {}), delta)
+
+    events = [
+        {"$match": {"entity_type": "response"}},
+        {"$project": {"entity_id": 1, "action": 1, "payload_json": 1, "created_at": 1}},
+    ]
+    pipeline = [
+        *events,
+        {"$unionWith": {"coll": AUDIT_EVENTS_ARCHIVE_COLLECTION, "pipeline": events}},
+        {"$sort": {"entity_id": -1, "created_at": 1, "_id": 1}},
+    ]
+    cursor = db[AUDIT_EVENTS_COLLECTION].aggregate(pipeline, allowDiskUse=True)
+    previous_event_id = None
+    async for event in cursor:
+        # Duplicates by _id, see AuditEventArchiveRepository.
+        if event["_id"] == previous_event_id:
+            continue
+        previous_event_id = event["_id"]
+        response_id = event.get("entity_id")
+        moment = as_utc(event.get("created_at"))
+        if not response_id or moment is None:
+            continue
+        if state["response_id"] != response_id:
+            state = {
+                "response_id": response_id,
+                "stage": None,
+                "max_stage": 1,
+                "reached_stage": 1,
+                "entered_at": None,
+            }
+        payload = event.get("payload_json") or {}
+        action = event.get("action")
+        if payload.get("request_id"):
+            request_of.setdefault(response_id, payload["request_id"])
+        if action == "response_created":
+            stage = parse_stage(payload.get("stage")) or ResponseStage.CV_SELECTED
+            add(response_id, moment, created_delta(stage))
+            state.update(stage=stage, max_stage=1, reached_stage=1, entered_at=moment)
+        elif action == "response_stage_changed":
+            to_stage = parse_stage(payload.get("to"))
+            if to_stage is None:
+                continue
+            from_stage = state["stage"] or parse_stage(payload.get("from"))
+            _, next_max_stage = can_transition(from_stage, to_stage, state["max_stage"])
+            entered_at = state["entered_at"]
+            add(
+                response_id,
+                moment,
+                stage_change_delta(
+                    from_stage,
+                    to_stage,
+                    previous_reached_stage=state["reached_stage"],
+                    seconds_in_stage=(
+                        (moment - entered_at).total_seconds() if entered_at else None
+                    ),
+                ),
+            )
+            if from_stage != to_stage:
+                state["entered_at"] = moment
+            state.update(
+                stage=to_stage,
+                max_stage=next_max_stage,
+                reached_stage=next_reached_stage(state["reached_stage"], to_stage),
+            )
+            reached_of[response_id] = state["reached_stage"]
+        elif action == "response_deleted":
+            add(
+                response_id,
+                moment,
+                deleted_delta(state["stage"] or parse_stage(payload.get("stage"))),
+            )
+    documents = [
+        {"request_id": request_id, "day": day, **groups}
+        for (request_id, day), groups in counters.items()
+    ]
+    await FunnelCounterRepository(db).replace_all(documents)
+    # Responses written before reached_stage get it from their history, so
+    # live increments continue from the same point as the rebuilt counters.
+    reached_updates = [
+        UpdateOne({"_id": ObjectId(response_id)}, {"$max": {"reached_stage": reached_stage}})
+        for response_id, reached_stage in reached_of.items()
+        if ObjectId.is_valid(response_id)
+    ]
+    for start in range(0, len(reached_updates), REACHED_STAGE_BATCH_SIZE):
+        await db[RESPONSES_COLLECTION].bulk_write(
+            reached_updates[start : start + REACHED_STAGE_BATCH_SIZE],
+            ordered=False,
+        )
+    return len(documents)
@@ -0,0 +1,155 @@
+"""Write-behind sink for audit events.
+
+Services hand events to audit_sink instead of inserting them: they are
+buffered in process and written with insert_many when a batch fills up or
+the flush interval passes, so an audit record costs the request no
+round-trip. The buffer is bounded; when Mongo cannot keep up, new events are
+dropped and counted rather than growing memory. Events written inside a
+transaction, and all events with AUDIT_SINK_DURABLE=true or before the sink
+is started (scripts), are inserted synchronously instead."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+import logging
+from typing import Any
+
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+
+from app.core.config import settings
+from app.repositories.audit_event import AuditEventRepository
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink:
+    def __init__(self) -> None:
+        # Buffered events per database name, so scripts running services
+        # against a throwaway database do not leak events into another one.
+        self._buffers: dict[str, tuple[AsyncIOMotorDatabase, list[dict[str, Any]]]] = {}
+        self._depth = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.dropped = 0
+        self.written = 0
+        self.failed_flushes = 0
+        self.last_flush_at: datetime | None = None
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flush loop and write out whatever is still buffered."""
+        if self._task is not None:
+            # Let the loop finish its current flush instead of cancelling it
+            # with a batch in flight.
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def record(
+        self,
+        db: AsyncIOMotorDatabase,
+        event: dict[str, Any],
+        *,
+        session: AsyncIOMotorClientSession | None = None,
+    ) -> None:
+        await self.record_many(db, [event], session=session)
+
+    async def record_many(
+        self,
+        db: AsyncIOMotorDatabase,
+        events: list[dict[str, Any]],
+        *,
+        session: AsyncIOMotorClientSession | None = None,
+    ) -> None:
+        if not events:
+            return
+        if session is not None or settings.audit_sink_durable or self._task is None:
+            await AuditEventRepository(db).create_many(events, session=session)
+            return
+        room = settings.audit_sink_max_buffer - self._depth
+        if room < len(events):
+            self.dropped += len(events) - max(room, 0)
+            events = events[: max(room, 0)]
+        if not events:
+            return
+        self._buffers.setdefault(db.name, (db, []))[1].extend(events)
+        self._depth += len(events)
+        if self._depth >= settings.audit_sink_batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        buffers, self._buffers = self._buffers, {}
+        self._depth = 0
+        written = 0
+        batch_size = settings.audit_sink_batch_size
+        for db, events in buffers.values():
+            repo = AuditEventRepository(db)
+            for start in range(0, len(events), batch_size):
+                batch = events[start : start + batch_size]
+                try:
+                    await repo.create_many(batch)
+                except PyMongoError:
+                    self.failed_flushes += 1
+                    logger.exception("Audit flush to %s failed", db.name)
+                    self._requeue(db, events[start:])
+                    break
+                written += len(batch)
+        self.written += written
+        self.last_flush_at = datetime.now(timezone.utc)
+        return written
+
+    def _requeue(self, db: AsyncIOMotorDatabase, events: list[dict[str, Any]]) -> None:
+        room = max(settings.audit_sink_max_buffer - self._depth, 0)
+        self.dropped += max(len(events) - room, 0)
+        kept = events[:room]
+        if kept:
+            buffered = self._buffers.setdefault(db.name, (db, []))[1]
+            buffered[:0] = kept
+            self._depth += len(kept)
+
+    async def _run(self) -> None:
+        reported_drops = 0
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), settings.audit_sink_flush_seconds
+                )
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._depth:
+                await self.flush()
+            if self.dropped > reported_drops:
+                logger.warning(
+                    "Audit sink dropped %s events (buffer full)",
+                    self.dropped - reported_drops,
+                )
+                reported_drops = self.dropped
+            if self._closing:
+                return
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "durable": settings.audit_sink_durable,
+            "buffer_depth": self._depth,
+            "buffer_capacity": settings.audit_sink_max_buffer,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_at": self.last_flush_at,
+        }
+
+
+audit_sink = AuditSink()
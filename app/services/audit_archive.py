@@ -0,0 +1,114 @@
+"""Moves audit events older than a retention window out of audit_events,
+either into the audit_events_archive collection or into monthly gzipped
+NDJSON files, in batches so memory stays flat however much is archived.
+
+Each batch is written to the archive before it is deleted from the hot
+collection. The collection target upserts by _id, so a batch retried after a
+crash is not duplicated; files are append-only, so a retried batch can
+appear twice there."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+import gzip
+import logging
+from pathlib import Path
+from typing import Any
+
+from bson import json_util
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+from pymongo.errors import PyMongoError
+
+from app.models.collections import (
+    AUDIT_EVENTS_ARCHIVE_COLLECTION,
+    AUDIT_EVENTS_COLLECTION,
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TARGETS = ("collection", "files")
+
+
+def _month_of(document: dict[str, Any]) -> str:
+    created_at = document.get("created_at")
+    return created_at.strftime("%Y-%m") if isinstance(created_at, datetime) else "unknown"
+
+
+def _append_ndjson(archive_dir: Path, documents: list[dict[str, Any]]) -> None:
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    by_month: dict[str, list[dict[str, Any]]] = {}
+    for document in documents:
+        by_month.setdefault(_month_of(document), []).append(document)
+    for month, month_documents in by_month.items():
+        # Appending a new gzip member keeps earlier batches readable as one stream.
+        with gzip.open(archive_dir / f"audit_events-{month}.ndjson.gz", "at") as file:
+            for document in month_documents:
+                file.write(json_util.dumps(document) + "\n")
+
+
+async def archive_audit_events(
+    db: AsyncIOMotorDatabase,
+    *,
+    older_than_days: int,
+    target: str = "collection",
+    archive_dir: str | Path = "archive/audit",
+    batch_size: int = 1000,
+    dry_run: bool = False,
+) -> int:
+    """Archive events created before now - older_than_days; returns how
+    many were moved (or, with dry_run, would be)."""
+    if target not in ARCHIVE_TARGETS:
+        raise ValueError(f"Unknown archive target: {target}")
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    query = {"created_at": {"$lt": cutoff}}
+    hot = db[AUDIT_EVENTS_COLLECTION]
+    if dry_run:
+        return await hot.count_documents(query)
+    cold = db[AUDIT_EVENTS_ARCHIVE_COLLECTION]
+    moved = 0
+    while True:
+        documents = await hot.find(query).sort("created_at", 1).limit(batch_size).to_list(
+            length=batch_size
+        )
+        if not documents:
+            return moved
+        if target == "collection":
+            await cold.bulk_write(
+                [
+                    ReplaceOne({"_id": document["_id"]}, document, upsert=True)
+                    for document in documents
+                ],
+                ordered=False,
+            )
+        else:
+            await asyncio.to_thread(_append_ndjson, Path(archive_dir), documents)
+        await hot.delete_many({"_id": {"$in": [document["_id"] for document in documents]}})
+        moved += len(documents)
+        if len(documents) < batch_size:
+            return moved
+
+
+async def run_audit_archiver(
+    db: AsyncIOMotorDatabase,
+    interval_seconds: float,
+    *,
+    older_than_days: int,
+    target: str,
+    archive_dir: str,
+    batch_size: int,
+) -> None:
+    while True:
+        try:
+            moved = await archive_audit_events(
+                db,
+                older_than_days=older_than_days,
+                target=target,
+                archive_dir=archive_dir,
+                batch_size=batch_size,
+            )
+            if moved:
+                logger.info("Archived %s audit events to %s", moved, target)
+        except (PyMongoError, OSError):
+            logger.exception("Audit archiving failed")
+        await asyncio.sleep(interval_seconds)
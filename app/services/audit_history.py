@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.repositories.audit_event import (
+    AUDIT_HISTORY_SORT,
+    AuditEventArchiveRepository,
+    AuditEventRepository,
+)
+from app.repositories.response import ResponseRepository
+from app.schemas.audit_event import AuditEventInDB, AuditEventListResponse
+from app.schemas.response import ResponseStageDurationsResponse, ResponseStagePeriod
+from app.schemas.response_stage import ResponseStage
+from app.utils.cursor import InvalidCursorError, decode_cursor, encode_cursor
+from app.utils.dates import as_utc
+from app.utils.response_stage import parse_stage
+
+RESPONSE_STAGE_ACTIONS = [
+    "response_created",
+    "response_stage_changed",
+    "response_deleted",
+]
+
+
+def _cursor_filter(cursor: str) -> dict[str, object]:
+    try:
+        values = decode_cursor(cursor)
+        created_at = as_utc(values.get("created_at"))
+        event_id = ObjectId(values.get("id") or "")
+    except (InvalidCursorError, InvalidId, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Некорректный курсор") from exc
+    if created_at is None:
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+    return AuditEventRepository.before_cursor_filter(created_at, event_id)
+
+
+async def list_audit_events(
+    db: AsyncIOMotorDatabase,
+    *,
+    entity_type: str | None,
+    entity_id: str | None,
+    action: str | None,
+    created_after: datetime | None,
+    created_before: datetime | None,
+    size: int,
+    cursor: str | None = None,
+) -> AuditEventListResponse:
+    """Newest first, paged by (created_at, _id). Either an entity or an
+    action is required, so every page is a range scan of one index."""
+    if entity_id and not entity_type:
+        raise HTTPException(status_code=400, detail="Укажите тип сущности")
+    if not entity_id and not action:
+        raise HTTPException(status_code=400, detail="Укажите сущность или действие")
+    filters: dict[str, Any] = {}
+    if entity_type:
+        filters["entity_type"] = entity_type
+    if entity_id:
+        filters["entity_id"] = entity_id
+    if action:
+        filters["action"] = action
+    created_range: dict[str, datetime] = {}
+    if created_after is not None:
+        created_range["$gte"] = created_after
+    if created_before is not None:
+        created_range["$lt"] = created_before
+    if created_range:
+        filters["created_at"] = created_range
+    if cursor:
+        filters = {"$and": [filters, _cursor_filter(cursor)]}
+    events = await AuditEventRepository(db).list(
+        filters=filters,
+        sort=AUDIT_HISTORY_SORT,
+        limit=size,
+    )
+    next_cursor = None
+    if len(events) == size:
+        last = events[-1]
+        next_cursor = encode_cursor(
+            {"created_at": last.get("created_at"), "id": last.get("id")}
+        )
+    return AuditEventListResponse(
+        items=[
+            AuditEventInDB.model_validate(
+                {**event, "payload_json": event.get("payload_json") or {}}
+            )
+            for event in events
+        ],
+        size=size,
+        next_cursor=next_cursor,
+    )
+
+
+async def _response_stage_events(
+    db: AsyncIOMotorDatabase,
+    response_id: str,
+) -> list[dict[str, Any]]:
+    repositories: list[AuditEventRepository] = [AuditEventRepository(db)]
+    if settings.audit_archive_target == "collection":
+        repositories.append(AuditEventArchiveRepository(db))
+    events: dict[str, dict[str, Any]] = {}
+    for repo in repositories:
+        # Duplicates by _id, see AuditEventArchiveRepository.
+        for event in await repo.list_entity_events(
+            "response",
+            response_id,
+            actions=RESPONSE_STAGE_ACTIONS,
+        ):
+            events.setdefault(event["id"], event)
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(
+        events.values(),
+        key=lambda event: (as_utc(event.get("created_at")) or epoch, event["id"]),
+    )
+
+
+async def get_response_stage_durations(
+    db: AsyncIOMotorDatabase,
+    *,
+    response_id: str,
+) -> ResponseStageDurationsResponse:
+    """Time spent in each stage, replayed from the response's audit trail;
+    the current stage is counted up to now. Events archived to a collection
+    are read back; when the trail does not start with response_created
+    (archived to files, or older than auditing) the result is truncated."""
+    if not ObjectId.is_valid(response_id):
+        raise HTTPException(status_code=400, detail="Некорректный идентификатор")
+    events = await _response_stage_events(db, response_id)
+    if not events and not await ResponseRepository(db).get_by_id(response_id):
+        raise HTTPException(status_code=404, detail="Отклик не найден")
+    periods: list[ResponseStagePeriod] = []
+    current: tuple[ResponseStage, datetime] | None = None
+
+    def close_period(left_at: datetime) -> None:
+        stage, entered_at = current
+        periods.append(
+            ResponseStagePeriod(
+                stage=stage,
+                entered_at=entered_at,
+                left_at=left_at,
+                seconds=max(0.0, (left_at - entered_at).total_seconds()),
+            )
+        )
+
+    for event in events:
+        created_at = as_utc(event.get("created_at"))
+        if created_at is None:
+            continue
+        payload = event.get("payload_json") or {}
+        action = event.get("action")
+        if action == "response_deleted":
+            if current is not None:
+                close_period(created_at)
+                current = None
+            break
+        stage = parse_stage(
+            payload.get("stage") if action == "response_created" else payload.get("to")
+        )
+        if stage is None:
+            continue
+        if current is not None:
+            close_period(created_at)
+        current = (stage, created_at)
+    if current is not None:
+        stage, entered_at = current
+        now = datetime.now(timezone.utc)
+        periods.append(
+            ResponseStagePeriod(
+                stage=stage,
+                entered_at=entered_at,
+                seconds=max(0.0, (now - entered_at).total_seconds()),
+            )
+        )
+    seconds_by_stage: dict[str, float] = {}
+    for period in periods:
+        key = period.stage.value
+        seconds_by_stage[key] = seconds_by_stage.get(key, 0.0) + period.seconds
+    return ResponseStageDurationsResponse(
+        response_id=response_id,
+        current_stage=current[0] if current is not None else None,
+        periods=periods,
+        seconds_by_stage=seconds_by_stage,
+        truncated=not events or events[0].get("action") != "response_created",
+    )
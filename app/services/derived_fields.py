@@ -0,0 +1,223 @@
+"""Keeps denormalized search/filter fields in sync for documents written by
+other services (the resume parser, the Telegram request bot) that do not
+compute them at write time.
+
+Each pass only looks at documents inserted (by _id) or updated (by
+updated_at) since the previous pass's watermark, both read by index. A
+collection without a watermark gets a full pass, which is also the backfill
+after DERIVED_FIELDS_VERSION is bumped."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+import logging
+from typing import Any
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from app.models.collections import DEVELOPERS_COLLECTION, REQUESTS_COLLECTION
+from app.repositories.sync_state import SyncStateRepository
+from app.services.kanban import refresh_kanban_cards
+from app.services.request_cache import request_detail_cache
+from app.utils.dates import as_utc
+from app.utils.deadline import deadline_fields
+from app.utils.search import developer_search_fields, request_search_fields
+
+logger = logging.getLogger(__name__)
+
+SYNC_BATCH_SIZE = 500
+# Bump when the derived fields change so the next pass recomputes them all.
+DERIVED_FIELDS_VERSION = 1
+ID_SORT = [("_id", 1)]
+UPDATED_SORT = [("updated_at", 1), ("_id", 1)]
+
+
+def _stale_filter(indexed_field: str, *derived_fields: str) -> dict[str, object]:
+    """Never indexed, missing a derived field, or modified since indexing.
+    Only evaluated on the documents an indexed scan has already selected."""
+    return {
+        "$or": [
+            {indexed_field: {"$exists": False}},
+            *({field_name: {"$exists": False}} for field_name in derived_fields),
+            {"$expr": {"$gt": ["$updated_at", f"${indexed_field}"]}},
+        ]
+    }
+
+
+def _after(sort: list[tuple[str, int]], document: dict) -> dict[str, object]:
+    """Keyset filter for the documents after document in an ascending sort."""
+    if sort == ID_SORT:
+        return {"_id": {"$gt": document["_id"]}}
+    return {
+        "$or": [
+            {"updated_at": {"$gt": document["updated_at"]}},
+            {"updated_at": document["updated_at"], "_id": {"$gt": document["_id"]}},
+        ]
+    }
+
+
+async def _sync_scan(
+    db: AsyncIOMotorDatabase,
+    collection_name: str,
+    *,
+    scan: dict[str, object],
+    sort: list[tuple[str, int]],
+    query: dict[str, object],
+    projection: dict[str, object],
+    build_fields: Callable[[dict], dict[str, object]],
+    batch_size: int,
+    after_batch: Callable[[list[dict]], Awaitable[object]] | None = None,
+) -> int:
+    collection = db[collection_name]
+    updated = 0
+    after: dict[str, object] | None = None
+    while True:
+        filters: dict[str, Any] = {"$and": [scan, query, *([after] if after else [])]}
+        documents = (
+            await collection.find(filters, projection)
+            .sort(sort)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not documents:
+            return updated
+        now = datetime.now(timezone.utc)
+        operations = []
+        for document in documents:
+            indexed_at = max(now, as_utc(document.get("updated_at")) or now)
+            operations.append(
+                UpdateOne(
+                    {"_id": document["_id"]},
+                    {
+                        "$set": {
+                            **build_fields(document),
+                            "search_indexed_at": indexed_at,
+                        }
+                    },
+                )
+            )
+        await collection.bulk_write(operations, ordered=False)
+        if after_batch is not None:
+            await after_batch(documents)
+        updated += len(operations)
+        if len(documents) < batch_size:
+            return updated
+        after = _after(sort, documents[-1])
+
+
+async def _sync_collection(
+    db: AsyncIOMotorDatabase,
+    collection_name: str,
+    *,
+    query: dict[str, object],
+    projection: dict[str, object],
+    build_fields: Callable[[dict], dict[str, object]],
+    batch_size: int,
+    after_batch: Callable[[list[dict]], Awaitable[object]] | None = None,
+) -> int:
+    state = SyncStateRepository(db)
+    watermark_name = f"derived_fields:{collection_name}:v{DERIVED_FIELDS_VERSION}"
+    started_at = datetime.now(timezone.utc)
+    # Resumed with an overlap, see SyncStateRepository.get_since.
+    since = await state.get_since(watermark_name)
+    if since is None:
+        scans = [({}, ID_SORT)]
+    else:
+        scans = [
+            ({"_id": {"$gt": ObjectId.from_datetime(since)}}, ID_SORT),
+            ({"updated_at": {"$gt": since}}, UPDATED_SORT),
+        ]
+    updated = 0
+    for scan, sort in scans:
+        updated += await _sync_scan(
+            db,
+            collection_name,
+            scan=scan,
+            sort=sort,
+            query=query,
+            projection=projection,
+            build_fields=build_fields,
+            batch_size=batch_size,
+            after_batch=after_batch,
+        )
+    await state.set_watermark(watermark_name, started_at)
+    return updated
+
+
+async def sync_developer_search_fields(
+    db: AsyncIOMotorDatabase,
+    *,
+    batch_size: int = SYNC_BATCH_SIZE,
+) -> int:
+    # Uploads stay "pending" until the parser fills the profile in.
+    return await _sync_collection(
+        db,
+        DEVELOPERS_COLLECTION,
+        query={
+            "parsing_status": {"$ne": "pending"},
+            **_stale_filter("search_indexed_at", "search_tokens", "name_trigrams"),
+        },
+        projection={"full_name": 1, "role": 1, "stack": 1, "updated_at": 1},
+        build_fields=developer_search_fields,
+        batch_size=batch_size,
+    )
+
+
+async def _refresh_request_views(db: AsyncIOMotorDatabase, request_ids: list[str]) -> None:
+    # Request details and kanban cards show the deadline fields.
+    await request_detail_cache.invalidate(request_ids)
+    await refresh_kanban_cards(db, request_ids)
+
+
+def request_derived_fields(document: dict) -> dict[str, object]:
+    # has_deadline/deadline_at normalize the bot's free-text
+    # vacancy.application_deadline for indexed filtering and sorting.
+    return {**request_search_fields(document), **deadline_fields(document)}
+
+
+async def sync_request_search_fields(
+    db: AsyncIOMotorDatabase,
+    *,
+    batch_size: int = SYNC_BATCH_SIZE,
+) -> int:
+    return await _sync_collection(
+        db,
+        REQUESTS_COLLECTION,
+        query=_stale_filter("search_indexed_at", "name_trigrams", "has_deadline"),
+        projection={
+            "name": 1,
+            "vacancy.application_deadline": 1,
+            "created_at": 1,
+            "updated_at": 1,
+        },
+        build_fields=request_derived_fields,
+        batch_size=batch_size,
+        after_batch=lambda documents: _refresh_request_views(
+            db, [str(document["_id"]) for document in documents]
+        ),
+    )
+
+
+async def sync_derived_fields(db: AsyncIOMotorDatabase) -> dict[str, int]:
+    return {
+        "developers_search": await sync_developer_search_fields(db),
+        "requests_search": await sync_request_search_fields(db),
+    }
+
+
+async def run_derived_fields_sync(
+    db: AsyncIOMotorDatabase,
+    interval_seconds: float,
+) -> None:
+    while True:
+        try:
+            updated = await sync_derived_fields(db)
+            if any(updated.values()):
+                logger.info("Derived fields synced: %s", updated)
+        except PyMongoError:
+            logger.exception("Derived fields sync failed")
+        await asyncio.sleep(interval_seconds)
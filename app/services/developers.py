@@ -10,18 +10,36 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from fastapi import HTTPException, UploadFile
 from fastapi.responses import FileResponse
 from bson import ObjectId
-from redis.asyncio import Redis
+from bson.errors import InvalidId
 
-from app.repositories.developer import DeveloperRepository
-from app.repositories.audit_event import AuditEventRepository
+from app.repositories.candidate import CandidateRepository
+from app.repositories.developer import (
+    DEVELOPER_LIST_PROJECTION,
+    DEVELOPER_LIST_SORT,
+    DeveloperRepository,
+)
+from app.repositories.response import ResponseRepository
 from app.schemas.developer import (
     DeveloperInDB,
     DeveloperListItem,
     DeveloperListResponse,
+    DeveloperLookupResponse,
     DeveloperPatchPayload,
     DeveloperUploadResponse,
 )
+from app.services.audit import audit_sink
+from app.services.kanban import (
+    refresh_cards_for_developer,
+    refresh_developer_on_cards,
+)
+from app.services.outbox import enqueue_task, run_in_transaction
+from app.services.request_cache import request_detail_cache
 from app.services.roles import role_exists
+from app.services.task_queue import (
+    QueueOverloadedError,
+    check_admission,
+    resume_ingest_queue,
+)
 from app.utils.files import (
     FileTooLargeError,
     MissingFileError,
@@ -30,10 +48,17 @@ from app.utils.files import (
     delete_upload,
     save_upload,
 )
+from app.utils.cache import TTLCache
+from app.utils.cursor import InvalidCursorError, decode_cursor, encode_cursor
+from app.utils.search import (
+    developer_search_fields,
+    query_terms,
+    text_search_query,
+    trigrams,
+)
 from app.core.config import settings
 from app.services.resume_parser import determine_parsing_status
 
-QUEUE_RESUME_INGEST = "queue:resume_ingest"
 MAX_RESUME_SIZE_BYTES = 10 * 1024 * 1024
 ALLOWED_EXTENSIONS = {".pdf", ".docx"}
 ALLOWED_CONTENT_TYPES = {
@@ -41,6 +66,44 @@ ALLOWED_CONTENT_TYPES = {
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
 }
 
+REQUEST_DETAIL_DEVELOPER_FIELDS = {"full_name", "role", "grade", "work_format"}
+
+developer_totals = TTLCache(settings.developer_total_cache_ttl_seconds)
+
+
+async def _count_developers(
+    repo: DeveloperRepository,
+    filters: dict[str, object],
+    *,
+    exact: bool,
+) -> tuple[int, bool]:
+    """Return (total, is_estimate). Unfiltered totals come from collection
+    metadata unless an exact count is requested; exact counts are cached
+    per normalized filter until the next developer write or TTL expiry."""
+    if not filters and not exact:
+        return await repo.estimated_count(), True
+    key = json.dumps(filters, sort_keys=True, default=str)
+    total = developer_totals.get(key)
+    if total is None:
+        total = await repo.count(filters=filters)
+        developer_totals.set(key, total)
+    return total, False
+
+
+def _cursor_filter(cursor: str) -> dict[str, object]:
+    try:
+        values = decode_cursor(cursor)
+        created_at_raw = values.get("created_at")
+        created_at = (
+            datetime.fromisoformat(created_at_raw)
+            if isinstance(created_at_raw, str)
+            else None
+        )
+        developer_id = ObjectId(values.get("id") or "")
+    except (InvalidCursorError, InvalidId, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Некорректный курсор") from exc
+    return DeveloperRepository.after_cursor_filter(created_at, developer_id)
+
 
 async def list_developers(
     db: AsyncIOMotorDatabase,
@@ -52,24 +115,51 @@ async def list_developers(
     role: str | None,
     grade: str | None,
     work_format: str | None,
+    cursor: str | None = None,
+    exact_total: bool = False,
+    in_resume: bool = False,
 ) -> DeveloperListResponse:
     repo = DeveloperRepository(db)
     skip = offset if offset is not None else (page - 1) * size
     filters: dict[str, object] = {}
-    if q:
-        filters["full_name"] = {"$regex": q, "$options": "i"}
     if role:
         filters["role"] = role
     if grade:
         filters["grade"] = grade
     if work_format:
         filters["work_format"] = work_format
-    developers = await repo.list(
-        skip=skip,
-        limit=size,
-        sort=[("created_at", -1)],
-        filters=filters,
-    )
+    if q:
+        if cursor:
+            raise HTTPException(
+                status_code=400,
+                detail="Курсор не поддерживается при поиске",
+            )
+        terms = None if in_resume else query_terms(q)
+        text_query = text_search_query(q) if in_resume else None
+        if not terms and not text_query:
+            return DeveloperListResponse(items=[], total=0, page=page, size=size)
+        developers = await repo.search(
+            filters=filters,
+            terms=terms,
+            text_query=text_query,
+            skip=skip,
+            limit=size,
+            projection=DEVELOPER_LIST_PROJECTION,
+        )
+        filters.update(repo.search_filter(terms=terms, text_query=text_query))
+    else:
+        page_filters = filters
+        if cursor:
+            skip = 0
+            after = _cursor_filter(cursor)
+            page_filters = {"$and": [filters, after]} if filters else after
+        developers = await repo.list(
+            skip=skip,
+            limit=size,
+            sort=DEVELOPER_LIST_SORT,
+            filters=page_filters,
+            projection=DEVELOPER_LIST_PROJECTION,
+        )
     items: list[DeveloperListItem] = []
     for developer in developers:
         stack = developer.get("stack") or {}
@@ -103,15 +193,53 @@ async def list_developers(
                 work_format=work_format_value or "",
             )
         )
-    total = await repo.count(filters=filters)
+    total, total_is_estimate = await _count_developers(
+        repo,
+        filters,
+        exact=exact_total,
+    )
+    next_cursor = None
+    if not q and len(developers) == size:
+        last = developers[-1]
+        next_cursor = encode_cursor(
+            {"created_at": last.get("created_at"), "id": last.get("id")}
+        )
     return DeveloperListResponse(
         items=items,
         total=total,
+        total_is_estimate=total_is_estimate,
         page=page,
         size=size,
+        next_cursor=next_cursor,
     )
 
 
+async def lookup_developers(
+    db: AsyncIOMotorDatabase,
+    *,
+    q: str,
+    threshold: float | None = None,
+    limit: int,
+) -> DeveloperLookupResponse:
+    repo = DeveloperRepository(db)
+    matches = await repo.similar_by_trigrams(
+        trigrams(q),
+        threshold=settings.fuzzy_similarity_threshold if threshold is None else threshold,
+        limit=limit,
+        projection={"full_name": 1, "role": 1},
+    )
+    items = [
+        {
+            "id": match["id"],
+            "full_name": match.get("full_name") or "",
+            "role": match.get("role"),
+            "similarity": match["similarity"],
+        }
+        for match in matches
+    ]
+    return DeveloperLookupResponse(items=items)
+
+
 async def get_developer_by_id(
     db: AsyncIOMotorDatabase,
     *,
@@ -136,6 +264,14 @@ async def create_developer(
             status_code=422,
             detail="Разрешен только один файл резюме",
         )
+    try:
+        await check_admission(resume_ingest_queue)
+    except QueueOverloadedError as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail="Очередь обработки резюме перегружена, повторите позже",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
     try:
         resume_path, saved_path = await save_upload(
             resume[0],
@@ -162,28 +298,25 @@ async def create_developer(
         "status": "доступен",
     }
     repo = DeveloperRepository(db)
-    created = await repo.create(payload)
-    developer_id = created.get("id")
-    if not developer_id:
-        raise HTTPException(
-            status_code=500,
-            detail="Не удалось создать запись резюме",
-        )
-    task = {
-        "task_id": str(uuid.uuid4()),
-        "source": "website_upload",
-        "file_path": str(saved_path),
-        "meta": {
-            "developer_id": developer_id,
-            "resume_path": resume_path,
-        },
-        "created_at": datetime.now(timezone.utc).isoformat(),
-    }
-    redis = Redis.from_url(settings.redis_url, decode_responses=True)
-    try:
-        await redis.rpush(QUEUE_RESUME_INGEST, json.dumps(task))
-    finally:
-        await redis.close()
+
+    async def write(session) -> str:
+        created = await repo.create(payload, session=session)
+        developer_id = created["id"]
+        task = {
+            "task_id": str(uuid.uuid4()),
+            "source": "website_upload",
+            "file_path": str(saved_path),
+            "meta": {
+                "developer_id": developer_id,
+                "resume_path": resume_path,
+            },
+            "created_at": created_at.isoformat(),
+        }
+        await enqueue_task(db, resume_ingest_queue, task, session=session)
+        return developer_id
+
+    developer_id = await run_in_transaction(db, write)
+    developer_totals.clear()
     return DeveloperUploadResponse(
         id=developer_id,
         resume_path=resume_path,
@@ -200,7 +333,6 @@ async def update_developer(
     if not ObjectId.is_valid(developer_id):
         raise HTTPException(status_code=400, detail="Некорректный идентификатор")
     repo = DeveloperRepository(db)
-    audit_repo = AuditEventRepository(db)
     developer = await repo.get_by_id(developer_id)
     if not developer:
         raise HTTPException(status_code=404, detail="Разработчик не найден")
@@ -222,11 +354,14 @@ async def update_developer(
     merged = {**developer, **update_data}
     parsing_status = await determine_parsing_status(merged)
     update_data["parsing_status"] = parsing_status
-    updated = await repo.update_by_id(developer_id, update_data)
-    if not updated:
-        raise HTTPException(status_code=404, detail="Разработчик не найден")
-    parsed = DeveloperInDB.model_validate(updated)
-    if parsed.parsing_status == "accepted":
+    update_data.update(developer_search_fields(merged))
+    update_data["search_indexed_at"] = now
+
+    async def write(session) -> dict | None:
+        # The update, its rematch task and the audit event commit together.
+        updated = await repo.update_by_id(developer_id, update_data, session=session)
+        if not updated or updated.get("parsing_status") != "accepted":
+            return updated
         task = {
             "task_id": str(uuid.uuid4()),
             "action": "match_only",
@@ -235,22 +370,40 @@ async def update_developer(
             },
             "created_at": now.isoformat(),
         }
-        redis = Redis.from_url(settings.redis_url, decode_responses=True)
-        try:
-            await redis.rpush(QUEUE_RESUME_INGEST, json.dumps(task))
-        finally:
-            await redis.close()
-        await audit_repo.create(
+        await enqueue_task(db, resume_ingest_queue, task, session=session)
+        await audit_sink.record(
+            db,
             {
                 "entity_type": "developer",
                 "entity_id": developer_id,
                 "action": "developer_rematch_requested",
                 "payload_json": {
                     "action": "match_only",
-                    "parsing_status": parsed.parsing_status,
+                    "parsing_status": updated.get("parsing_status"),
+                    "task_id": task["task_id"],
                 },
                 "created_at": now,
-            }
+            },
+            session=session,
+        )
+        return updated
+
+    updated = await run_in_transaction(db, write)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Разработчик не найден")
+    developer_totals.clear()
+    parsed = DeveloperInDB.model_validate(updated)
+    if REQUEST_DETAIL_DEVELOPER_FIELDS & update_data.keys():
+        # Request details embed these fields in their candidate lists.
+        await request_detail_cache.invalidate(
+            await CandidateRepository(db).list_request_ids_by_developer(developer_id)
+        )
+    if "full_name" in update_data or "role" in update_data:
+        await refresh_developer_on_cards(
+            db,
+            developer_id=developer_id,
+            full_name=parsed.full_name,
+            role=parsed.role,
         )
     return parsed
 
@@ -289,7 +442,6 @@ async def delete_developer(
     if not ObjectId.is_valid(developer_id):
         raise HTTPException(status_code=400, detail="Некорректный идентификатор")
     repo = DeveloperRepository(db)
-    audit_repo = AuditEventRepository(db)
     developer = await repo.get_by_id(developer_id)
     if not developer:
         raise HTTPException(status_code=404, detail="Разработчик не найден")
@@ -305,6 +457,10 @@ async def delete_developer(
             detail="Не удалось удалить файл резюме",
         ) from exc
 
+    affected_request_ids = {
+        *await CandidateRepository(db).list_request_ids_by_developer(developer_id),
+        *await ResponseRepository(db).list_request_ids_by_developer(developer_id),
+    }
     responses_result = await db["responses"].delete_many(
         {"developer_id": developer_id}
     )
@@ -315,8 +471,12 @@ async def delete_developer(
     deleted = await repo.delete_by_id(developer_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Разработчик не найден")
+    developer_totals.clear()
+    await request_detail_cache.invalidate(affected_request_ids)
+    await refresh_cards_for_developer(db, developer_id)
 
-    await audit_repo.create(
+    await audit_sink.record(
+        db,
         {
             "entity_type": "developer",
             "entity_id": developer_id,
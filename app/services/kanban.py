@@ -1,131 +1,436 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timezone
+import logging
+
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
 
+from app.core.config import settings
+from app.models.collections import (
+    CANDIDATES_COLLECTION,
+    DEVELOPERS_COLLECTION,
+    REQUESTS_COLLECTION,
+    RESPONSES_COLLECTION,
+)
+from app.repositories.kanban_card import KanbanCardRepository
+from app.repositories.sync_state import SyncStateRepository
 from app.schemas.kanban import KanbanResponse
 from app.schemas.request_status import RequestStatus
 from app.schemas.response_stage import ResponseStage
-from app.utils.response_stage import STAGE_INDEX, STAGE_ORDER, allowed_stages
-from app.utils.mongo import serialize_document
+from app.utils.deadline import stored_deadline_fields
+from app.utils.request_filters import build_request_filters
+from app.utils.response_stage import STAGE_INDEX, allowed_stages
 
+logger = logging.getLogger(__name__)
 
-async def get_kanban(
-    db: AsyncIOMotorDatabase,
+KANBAN_STATUSES = [RequestStatus.ACTIVE.value, RequestStatus.ON_HOLD.value]
+CARD_REBUILD_BATCH_SIZE = 500
+# Resumed with an overlap, see SyncStateRepository.get_since.
+CARD_SYNC_WATERMARK = "kanban_cards"
+# Tags the card-refresh aggregation in profiler and command logs.
+KANBAN_REFRESH_COMMENT = "kanban_refresh"
+
+# Called with (request_ids, cards) after every refresh_kanban_cards; the
+# kanban stream uses it to push diffs when change streams are unavailable.
+CardListener = Callable[[list[str], list[dict]], None]
+_card_listeners: list[CardListener] = []
+
+# Fields copied onto kanban_cards so the board filters run against the read
+# model without touching requests.
+_CARD_FILTER_FIELDS = {
+    "vacancy.role": 1,
+    "vacancy.grade": 1,
+    "vacancy.work_format": 1,
+    "created_at": 1,
+}
+
+# Responses are grouped by stage on the server; only the fields needed by
+# KanbanResponseItem (plus max_stage for allowed_stages) leave the database.
+_RESPONSES_PIPELINE: list[dict] = [
+    {"$sort": {"_id": 1}},
+    {
+        "$project": {
+            "developer_id": 1,
+            "rate": 1,
+            "stage": 1,
+            "max_stage": 1,
+            "updated_at": 1,
+            "version": 1,
+            "developer_oid": {
+                "$convert": {
+                    "input": "$developer_id",
+                    "to": "objectId",
+                    "onError": None,
+                    "onNull": None,
+                }
+            },
+        }
+    },
+    {
+        "$lookup": {
+            "from": DEVELOPERS_COLLECTION,
+            "localField": "developer_oid",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, "full_name": 1, "role": 1}}],
+            "as": "developer",
+        }
+    },
+    {
+        "$group": {
+            "_id": "$stage",
+            "items": {
+                "$push": {
+                    "id": {"$toString": "$_id"},
+                    "developer_id": "$developer_id",
+                    "developer_full_name": {"$first": "$developer.full_name"},
+                    "developer_role": {"$first": "$developer.role"},
+                    "rate": "$rate",
+                    "updated_at": "$updated_at",
+                    "version": {"$ifNull": ["$version", 0]},
+                    "max_stage": "$max_stage",
+                }
+            },
+        }
+    },
+]
+
+
+def kanban_pipeline(
+    filters: dict[str, object],
     *,
-    role: str | None = None,
-    grade: str | None = None,
-    work_format: str | None = None,
-    has_deadline: bool | None = None,
-) -> KanbanResponse:
-    filters: dict[str, object] = {
-        "status": {"$in": [RequestStatus.ACTIVE.value, RequestStatus.ON_HOLD.value]},
+    card_fields: bool = False,
+) -> list[dict]:
+    projection: dict[str, object] = {
+        "name": 1,
+        "status": 1,
+        "updated_at": 1,
+        "vacancy.rate": 1,
+        "vacancy.application_deadline": 1,
+        "has_deadline": 1,
+        "deadline_at": 1,
+        "request_id": {"$toString": "$_id"},
     }
-    if role:
-        filters["vacancy.role"] = role
-    if grade:
-        filters["vacancy.grade"] = grade
-    if work_format:
-        filters["vacancy.work_format"] = work_format
-    if has_deadline is True:
-        filters["vacancy.application_deadline"] = {"$exists": True, "$ne": ""}
-    elif has_deadline is False:
-        filters["$or"] = [
-            {"vacancy.application_deadline": {"$exists": False}},
-            {"vacancy.application_deadline": ""},
-            {"vacancy.application_deadline": None},
+    if card_fields:
+        projection.update(_CARD_FILTER_FIELDS)
+    return [
+        {"$match": filters},
+        {"$sort": {"created_at": -1}},
+        {"$project": projection},
+        {
+            "$lookup": {
+                "from": CANDIDATES_COLLECTION,
+                "localField": "request_id",
+                "foreignField": "request_id",
+                "pipeline": [{"$limit": 1}, {"$project": {"_id": 1}}],
+                "as": "candidate_hit",
+            }
+        },
+        {"$match": {"candidate_hit": {"$ne": []}}},
+        {
+            "$lookup": {
+                "from": RESPONSES_COLLECTION,
+                "localField": "request_id",
+                "foreignField": "request_id",
+                "pipeline": _RESPONSES_PIPELINE,
+                "as": "stage_groups",
+            }
+        },
+    ]
+
+
+def _coerce_stage(value: object) -> ResponseStage:
+    try:
+        return ResponseStage(value or ResponseStage.CV_SELECTED.value)
+    except ValueError:
+        return ResponseStage.CV_SELECTED
+
+
+def build_kanban_item(document: dict) -> dict:
+    vacancy = document.get("vacancy") or {}
+    responses_by_stage: dict[ResponseStage, list[dict]] = {
+        stage: [] for stage in ResponseStage
+    }
+    for group in document.get("stage_groups") or []:
+        stage = _coerce_stage(group.get("_id"))
+        for item in group.get("items") or []:
+            max_stage = item.pop("max_stage", None)
+            item["developer_id"] = item.get("developer_id") or ""
+            item["developer_full_name"] = item.get("developer_full_name") or ""
+            item["allowed_stages"] = allowed_stages(
+                stage,
+                int(max_stage or STAGE_INDEX.get(stage, 1)),
+            )
+            responses_by_stage[stage].append(item)
+    return {
+        "id": document["request_id"],
+        "name": document.get("name"),
+        "status": document.get("status"),
+        "rate": vacancy.get("rate"),
+        "application_deadline": vacancy.get("application_deadline"),
+        **stored_deadline_fields(document),
+        "updated_at": document.get("updated_at"),
+        "responses_by_stage": responses_by_stage,
+    }
+
+
+async def fetch_kanban_items(
+    db: AsyncIOMotorDatabase,
+    filters: dict[str, object],
+) -> list[dict]:
+    cursor = db[REQUESTS_COLLECTION].aggregate(kanban_pipeline(filters))
+    return [build_kanban_item(document) async for document in cursor]
+
+
+def build_kanban_card(document: dict, refreshed_at: datetime) -> dict:
+    item = build_kanban_item(document)
+    vacancy = document.get("vacancy") or {}
+    responses_by_stage = {}
+    developer_ids: set[str] = set()
+    response_ids: list[str] = []
+    for stage, responses in item["responses_by_stage"].items():
+        for response in responses:
+            response["allowed_stages"] = [
+                allowed.value for allowed in response["allowed_stages"]
+            ]
+            developer_ids.add(response["developer_id"])
+            response_ids.append(response["id"])
+        responses_by_stage[stage.value] = responses
+    return {
+        "_id": document["_id"],
+        "name": item["name"],
+        "status": item["status"],
+        "rate": item["rate"],
+        "application_deadline": item["application_deadline"],
+        "deadline_at": item["deadline_at"],
+        "updated_at": item["updated_at"],
+        "responses_by_stage": responses_by_stage,
+        "role": vacancy.get("role"),
+        "grade": vacancy.get("grade"),
+        "work_format": vacancy.get("work_format"),
+        "has_deadline": item["has_deadline"],
+        "created_at": document.get("created_at"),
+        "developer_ids": sorted(developer_ids),
+        "response_ids": response_ids,
+        "refreshed_at": refreshed_at,
+    }
+
+
+async def load_kanban_cards(
+    db: AsyncIOMotorDatabase,
+    request_ids: list[str],
+) -> list[dict]:
+    object_ids = [ObjectId(item) for item in set(request_ids) if ObjectId.is_valid(item)]
+    if not object_ids:
+        return []
+    refreshed_at = datetime.now(timezone.utc)
+    cursor = db[REQUESTS_COLLECTION].aggregate(
+        kanban_pipeline(
+            {"_id": {"$in": object_ids}, "status": {"$in": KANBAN_STATUSES}},
+            card_fields=True,
+        ),
+        comment=KANBAN_REFRESH_COMMENT,
+    )
+    return [build_kanban_card(document, refreshed_at) async for document in cursor]
+
+
+def add_card_listener(listener: CardListener) -> None:
+    if listener not in _card_listeners:
+        _card_listeners.append(listener)
+
+
+def remove_card_listener(listener: CardListener) -> None:
+    if listener in _card_listeners:
+        _card_listeners.remove(listener)
+
+
+def notify_card_listeners(request_ids: list[str], cards: list[dict]) -> None:
+    for listener in list(_card_listeners):
+        listener(request_ids, cards)
+
+
+async def refresh_kanban_cards(
+    db: AsyncIOMotorDatabase,
+    request_ids: list[str],
+) -> list[dict]:
+    cards = await load_kanban_cards(db, request_ids)
+    repo = KanbanCardRepository(db)
+    await repo.replace_cards(cards)
+    visible = {card["_id"] for card in cards}
+    await repo.delete_cards(
+        [
+            ObjectId(item)
+            for item in set(request_ids)
+            if ObjectId.is_valid(item) and ObjectId(item) not in visible
         ]
+    )
+    notify_card_listeners(
+        [item for item in set(request_ids) if ObjectId.is_valid(item)],
+        cards,
+    )
+    return cards
+
 
-    requests_cursor = db["requests"].find(filters).sort("created_at", -1)
-    requests_by_id: dict[str, dict] = {}
-    async for request in requests_cursor:
-        request_id = str(request.get("_id"))
-        requests_by_id[request_id] = request
+async def refresh_developer_on_cards(
+    db: AsyncIOMotorDatabase,
+    *,
+    developer_id: str,
+    full_name: str | None,
+    role: str | None,
+) -> None:
+    await KanbanCardRepository(db).set_developer_fields(
+        developer_id,
+        {"developer_full_name": full_name or "", "developer_role": role},
+    )
 
-    if not requests_by_id:
-        return KanbanResponse(requests=[])
 
-    request_ids = list(requests_by_id.keys())
-    candidates_cursor = db["candidates"].find({"request_id": {"$in": request_ids}})
-    request_ids_with_candidates: set[str] = set()
-    async for candidate in candidates_cursor:
-        request_id = candidate.get("request_id")
-        if isinstance(request_id, str):
-            request_ids_with_candidates.add(request_id)
+async def refresh_cards_for_developer(
+    db: AsyncIOMotorDatabase,
+    developer_id: str,
+) -> None:
+    card_ids = await KanbanCardRepository(db).list_ids_by_developer(developer_id)
+    await refresh_kanban_cards(db, [str(card_id) for card_id in card_ids])
 
-    if not request_ids_with_candidates:
-        return KanbanResponse(requests=[])
 
-    responses_cursor = db["responses"].find(
-        {"request_id": {"$in": list(request_ids_with_candidates)}}
+async def rebuild_kanban_cards(db: AsyncIOMotorDatabase) -> int:
+    repo = KanbanCardRepository(db)
+    await repo.ensure_indexes()
+    refreshed_at = datetime.now(timezone.utc)
+    cursor = db[REQUESTS_COLLECTION].aggregate(
+        kanban_pipeline({"status": {"$in": KANBAN_STATUSES}}, card_fields=True)
     )
-    responses = [serialize_document(doc) async for doc in responses_cursor]
+    batch: list[dict] = []
+    total = 0
+    async for document in cursor:
+        batch.append(build_kanban_card(document, refreshed_at))
+        if len(batch) >= CARD_REBUILD_BATCH_SIZE:
+            await repo.replace_cards(batch)
+            total += len(batch)
+            batch = []
+    await repo.replace_cards(batch)
+    total += len(batch)
+    await repo.delete_refreshed_before(refreshed_at)
+    await SyncStateRepository(db).set_watermark(CARD_SYNC_WATERMARK, refreshed_at)
+    return total
+
+
+async def _changed_request_ids(db: AsyncIOMotorDatabase, since: datetime) -> set[str]:
+    """Requests whose card may be stale because of writes made outside this
+    service: bot-written requests, matcher candidates, parser-updated
+    developers. Every query is a range scan of an index."""
+    since_id = ObjectId.from_datetime(since)
+    request_ids: set[str] = set()
+    cursor = db[REQUESTS_COLLECTION].find(
+        {"$or": [{"_id": {"$gt": since_id}}, {"updated_at": {"$gt": since}}]},
+        {"_id": 1},
+    )
+    request_ids.update([str(document["_id"]) async for document in cursor])
+    request_ids.update(
+        await db[CANDIDATES_COLLECTION].distinct("request_id", {"_id": {"$gt": since_id}})
+    )
+    cursor = db[DEVELOPERS_COLLECTION].find({"updated_at": {"$gt": since}}, {"_id": 1})
+    developer_ids = [str(document["_id"]) async for document in cursor]
+    request_ids.update(
+        str(card_id)
+        for card_id in await KanbanCardRepository(db).list_ids_by_developers(developer_ids)
+    )
+    request_ids.discard("")
+    return request_ids
+
+
+async def sync_kanban_cards(db: AsyncIOMotorDatabase) -> int:
+    """Refresh the cards of requests changed since the last pass; the first
+    pass (no watermark yet) rebuilds every card. Returns how many requests
+    were refreshed."""
+    state = SyncStateRepository(db)
+    since = await state.get_since(CARD_SYNC_WATERMARK)
+    if since is None:
+        return await rebuild_kanban_cards(db)
+    started_at = datetime.now(timezone.utc)
+    request_ids = sorted(await _changed_request_ids(db, since))
+    for start in range(0, len(request_ids), CARD_REBUILD_BATCH_SIZE):
+        await refresh_kanban_cards(db, request_ids[start : start + CARD_REBUILD_BATCH_SIZE])
+    await state.set_watermark(CARD_SYNC_WATERMARK, started_at)
+    return len(request_ids)
 
-    developer_ids = {
-        response.get("developer_id")
-        for response in responses
-        if isinstance(response.get("developer_id"), str)
-    }
-    developer_object_ids = []
-    for developer_id in developer_ids:
-        try:
-            developer_object_ids.append(ObjectId(developer_id))
-        except Exception:
-            continue
-    developers_by_id: dict[str, dict] = {}
-    if developer_object_ids:
-        developers_cursor = db["developers"].find({"_id": {"$in": developer_object_ids}})
-        async for developer in developers_cursor:
-            developers_by_id[str(developer.get("_id"))] = developer
-
-    empty_responses_by_stage = {stage: [] for stage in ResponseStage}
-    requests_payload: list[dict] = []
-    for request_id, request in requests_by_id.items():
-        if request_id not in request_ids_with_candidates:
-            continue
-        vacancy = request.get("vacancy") or {}
-        requests_payload.append(
-            {
-                "id": request_id,
-                "name": request.get("name"),
-                "status": request.get("status"),
-                "rate": vacancy.get("rate"),
-                "application_deadline": vacancy.get("application_deadline"),
-                "updated_at": request.get("updated_at"),
-                "responses_by_stage": {
-                    stage: list(items) for stage, items in empty_responses_by_stage.items()
-                },
-            }
-        )
 
-    requests_index = {item["id"]: item for item in requests_payload}
-
-    stage_index = STAGE_INDEX
-    for response in responses:
-        request_id = response.get("request_id") or ""
-        request_item = requests_index.get(request_id)
-        if not request_item:
-            continue
-        developer_id = response.get("developer_id") or ""
-        developer = developers_by_id.get(developer_id) or {}
-        stage_value = response.get("stage") or ResponseStage.CV_SELECTED.value
+async def run_kanban_card_sync(
+    db: AsyncIOMotorDatabase,
+    interval_seconds: float,
+) -> None:
+    while True:
         try:
-            stage = ResponseStage(stage_value)
-        except ValueError:
-            stage = ResponseStage.CV_SELECTED
-        request_item["responses_by_stage"][stage].append(
-            {
-                "id": response.get("id") or "",
-                "developer_id": developer_id,
-                "developer_full_name": developer.get("full_name") or "",
-                "rate": response.get("rate"),
-                "developer_role": developer.get("role"),
-                "updated_at": response.get("updated_at"),
-                "allowed_stages": allowed_stages(
-                    stage,
-                    int(response.get("max_stage") or stage_index.get(stage, 1)),
-                ),
-            }
-        )
+            refreshed = await sync_kanban_cards(db)
+            if refreshed:
+                logger.info("Kanban cards refreshed: %s", refreshed)
+        except PyMongoError:
+            logger.exception("Kanban card sync failed")
+        await asyncio.sleep(interval_seconds)
+
+
+def _card_filters(
+    *,
+    role: str | None,
+    grade: str | None,
+    work_format: str | None,
+    has_deadline: bool | None,
+    deadline_after: datetime | None,
+    deadline_before: datetime | None,
+) -> dict[str, object]:
+    filters: dict[str, object] = {}
+    if role:
+        filters["role"] = role
+    if grade:
+        filters["grade"] = grade
+    if work_format:
+        filters["work_format"] = work_format
+    if has_deadline is not None:
+        filters["has_deadline"] = has_deadline
+    deadline_range: dict[str, datetime] = {}
+    if deadline_after is not None:
+        deadline_range["$gte"] = deadline_after
+    if deadline_before is not None:
+        deadline_range["$lt"] = deadline_before
+    if deadline_range:
+        filters["deadline_at"] = deadline_range
+    return filters
+
 
-    return KanbanResponse(requests=requests_payload)
+async def get_kanban(
+    db: AsyncIOMotorDatabase,
+    *,
+    role: str | None = None,
+    grade: str | None = None,
+    work_format: str | None = None,
+    has_deadline: bool | None = None,
+    deadline_after: datetime | None = None,
+    deadline_before: datetime | None = None,
+) -> KanbanResponse:
+    if settings.kanban_read_model:
+        cards = await KanbanCardRepository(db).list_cards(
+            _card_filters(
+                role=role,
+                grade=grade,
+                work_format=work_format,
+                has_deadline=has_deadline,
+                deadline_after=deadline_after,
+                deadline_before=deadline_before,
+            )
+        )
+        for card in cards:
+            card["id"] = str(card.pop("_id"))
+        return KanbanResponse(requests=cards)
+    filters = build_request_filters(
+        role=role,
+        grade=grade,
+        work_format=work_format,
+        has_deadline=has_deadline,
+        deadline_after=deadline_after,
+        deadline_before=deadline_before,
+    )
+    filters["status"] = {"$in": KANBAN_STATUSES}
+    items = await fetch_kanban_items(db, filters)
+    return KanbanResponse(requests=items)
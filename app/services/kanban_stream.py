@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import datetime
+import json
+import logging
+from typing import Any, Protocol
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+
+from app.core.config import settings
+from app.models.collections import (
+    CANDIDATES_COLLECTION,
+    DEVELOPERS_COLLECTION,
+    REQUESTS_COLLECTION,
+    RESPONSES_COLLECTION,
+)
+from app.repositories.kanban_card import KanbanCardRepository
+from app.schemas.kanban import KanbanRequestItem
+from app.services.kanban import (
+    add_card_listener,
+    get_kanban,
+    load_kanban_cards,
+    refresh_kanban_cards,
+    remove_card_listener,
+)
+from app.utils.dates import as_utc
+from app.utils.mongo import is_replica_set
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = [
+    RESPONSES_COLLECTION,
+    REQUESTS_COLLECTION,
+    DEVELOPERS_COLLECTION,
+    CANDIDATES_COLLECTION,
+]
+RESYNC = {"type": "resync"}
+
+
+class EventSource(Protocol):
+    def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        ...
+
+
+class ChangeStreamSource:
+    """Database-level change stream over the collections the board depends on.
+
+    Requires a replica set (a single-node one is enough for local runs).
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase) -> None:
+        self._db = db
+        self._resume_token: Any | None = None
+
+    async def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        pipeline = [
+            {
+                "$match": {
+                    "ns.coll": {"$in": WATCHED_COLLECTIONS},
+                    "$or": [
+                        {"ns.coll": {"$ne": CANDIDATES_COLLECTION}},
+                        {"operationType": "insert"},
+                    ],
+                }
+            },
+        ]
+        while True:
+            try:
+                async with self._db.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=self._resume_token,
+                ) as stream:
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        yield change
+            except PyMongoError:
+                logger.exception("Kanban change stream failed, reconnecting")
+                await asyncio.sleep(1)
+
+
+@dataclass(eq=False)
+class KanbanSubscription:
+    role: str | None = None
+    grade: str | None = None
+    work_format: str | None = None
+    has_deadline: bool | None = None
+    deadline_after: datetime | None = None
+    deadline_before: datetime | None = None
+    queue: asyncio.Queue = field(
+        default_factory=lambda: asyncio.Queue(settings.kanban_stream_queue_size)
+    )
+    sent_ids: set[str] = field(default_factory=set)
+
+    def matches(self, card: dict[str, Any]) -> bool:
+        if self.role and card.get("role") != self.role:
+            return False
+        if self.grade and card.get("grade") != self.grade:
+            return False
+        if self.work_format and card.get("work_format") != self.work_format:
+            return False
+        if self.has_deadline is not None and card.get("has_deadline") != self.has_deadline:
+            return False
+        if self.deadline_after is not None or self.deadline_before is not None:
+            deadline_at = as_utc(card.get("deadline_at"))
+            if deadline_at is None:
+                return False
+            if self.deadline_after is not None and deadline_at < as_utc(self.deadline_after):
+                return False
+            if self.deadline_before is not None and deadline_at >= as_utc(self.deadline_before):
+                return False
+        return True
+
+    def push(self, message: dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The client fell behind: drop pending diffs and ask it to resync.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+def serialize_card(card: dict[str, Any]) -> dict[str, Any]:
+    payload = {key: value for key, value in card.items() if key != "_id"}
+    payload["id"] = str(card["_id"])
+    return KanbanRequestItem.model_validate(payload).model_dump(mode="json")
+
+
+class KanbanHub:
+    """One change watcher per process, fanned out to every board subscriber.
+
+    On a replica set the watcher is a change stream and sees every write,
+    whoever made it. Without one (the "memory" source) the hub is fed by this
+    process's refresh_kanban_cards calls: API writes at once, writes by other
+    services through the periodic card sync. That only covers every API
+    write when the app runs as a single process.
+    """
+
+    def __init__(self) -> None:
+        self._subscriptions: set[KanbanSubscription] = set()
+        self._task: asyncio.Task | None = None
+        self._db: AsyncIOMotorDatabase | None = None
+        self._start_lock = asyncio.Lock()
+        self.source: EventSource | None = None
+        self.source_kind: str | None = None
+        self._response_requests: dict[str, str] = {}
+        self._developer_requests: dict[str, set[str]] = {}
+
+    async def start(self, db: AsyncIOMotorDatabase) -> str:
+        """Resolve KANBAN_STREAM_SOURCE; "auto" uses change streams only
+        when the server is a replica set member."""
+        async with self._start_lock:
+            if self.source_kind is not None:
+                return self.source_kind
+            kind = settings.kanban_stream_source
+            if kind == "auto":
+                try:
+                    kind = "change_stream" if await is_replica_set(db) else "memory"
+                except PyMongoError:
+                    logger.exception("Could not detect a replica set, streaming from memory")
+                    kind = "memory"
+            self._db = db
+            if kind == "memory":
+                add_card_listener(self.broadcast)
+            elif self.source is None:
+                self.source = ChangeStreamSource(db)
+            self.source_kind = kind
+            logger.info("Kanban stream source: %s", kind)
+            return kind
+
+    def subscribe(
+        self,
+        db: AsyncIOMotorDatabase,
+        subscription: KanbanSubscription,
+    ) -> KanbanSubscription:
+        self._subscriptions.add(subscription)
+        if self.source is not None and (self._task is None or self._task.done()):
+            self._db = db
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: KanbanSubscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        remove_card_listener(self.broadcast)
+        self.source = None
+        self.source_kind = None
+        self._subscriptions.clear()
+
+    def remember(self, cards: list[dict[str, Any]]) -> None:
+        for card in cards:
+            request_id = str(card["_id"])
+            for response_id in card.get("response_ids") or []:
+                self._response_requests[response_id] = request_id
+            for developer_id in card.get("developer_ids") or []:
+                self._developer_requests.setdefault(developer_id, set()).add(request_id)
+
+    async def _affected_request_ids(self, change: dict[str, Any]) -> set[str]:
+        collection = (change.get("ns") or {}).get("coll")
+        document = change.get("fullDocument") or {}
+        document_id = str((change.get("documentKey") or {}).get("_id", ""))
+        cards = KanbanCardRepository(self._db)
+        if collection == REQUESTS_COLLECTION:
+            return {document_id}
+        if collection == CANDIDATES_COLLECTION:
+            return {document.get("request_id") or ""}
+        if collection == RESPONSES_COLLECTION:
+            if document.get("request_id"):
+                return {document["request_id"]}
+            if document_id in self._response_requests:
+                return {self._response_requests[document_id]}
+            if settings.kanban_read_model:
+                return {str(item) for item in await cards.list_ids_by_response(document_id)}
+            return set()
+        if collection == DEVELOPERS_COLLECTION:
+            request_ids = set(self._developer_requests.get(document_id, set()))
+            if settings.kanban_read_model:
+                request_ids.update(
+                    str(item) for item in await cards.list_ids_by_developer(document_id)
+                )
+            return request_ids
+        return set()
+
+    async def _collect(self, events: AsyncIterator[dict[str, Any]]) -> AsyncIterator[set[str]]:
+        """Coalesce bursts of changes into one refresh per debounce window."""
+        debounce = settings.kanban_stream_debounce_ms / 1000
+        pending: set[str] = set()
+        next_event = asyncio.ensure_future(events.__anext__())
+        try:
+            while True:
+                timeout = debounce if pending else None
+                done, _ = await asyncio.wait({next_event}, timeout=timeout)
+                if not done:
+                    yield pending
+                    pending = set()
+                    continue
+                change = next_event.result()
+                try:
+                    pending.update(await self._affected_request_ids(change))
+                except PyMongoError:
+                    logger.exception("Kanban stream could not resolve a change")
+                pending.discard("")
+                next_event = asyncio.ensure_future(events.__anext__())
+        finally:
+            next_event.cancel()
+
+    async def _run(self) -> None:
+        async for request_ids in self._collect(self.source.__aiter__()):
+            try:
+                await self.publish(request_ids)
+            except PyMongoError:
+                logger.exception("Kanban stream refresh failed")
+
+    async def publish(self, request_ids: set[str]) -> None:
+        if settings.kanban_read_model:
+            cards = await refresh_kanban_cards(self._db, list(request_ids))
+        else:
+            cards = await load_kanban_cards(self._db, list(request_ids))
+        self.broadcast(list(request_ids), cards)
+
+    def broadcast(self, request_ids: list[str], cards: list[dict[str, Any]]) -> None:
+        """Push the refreshed cards of request_ids to the subscribers they
+        match, and removals to those that had them but no longer match."""
+        if not self._subscriptions:
+            return
+        self.remember(cards)
+        cards_by_id = {str(card["_id"]): card for card in cards}
+        payloads: dict[str, dict[str, Any]] = {}
+        for subscription in list(self._subscriptions):
+            for request_id in request_ids:
+                card = cards_by_id.get(request_id)
+                if card is not None and subscription.matches(card):
+                    if request_id not in payloads:
+                        payloads[request_id] = serialize_card(card)
+                    subscription.sent_ids.add(request_id)
+                    subscription.push({"type": "card", "card": payloads[request_id]})
+                elif request_id in subscription.sent_ids:
+                    subscription.sent_ids.discard(request_id)
+                    subscription.push({"type": "remove", "id": request_id})
+
+
+kanban_hub = KanbanHub()
+
+
+def _sse(event: str, data: object) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _snapshot(db: AsyncIOMotorDatabase, subscription: KanbanSubscription) -> str:
+    board = await get_kanban(
+        db,
+        role=subscription.role,
+        grade=subscription.grade,
+        work_format=subscription.work_format,
+        has_deadline=subscription.has_deadline,
+        deadline_after=subscription.deadline_after,
+        deadline_before=subscription.deadline_before,
+    )
+    subscription.sent_ids = {item.id for item in board.requests}
+    return _sse("snapshot", board.model_dump(mode="json"))
+
+
+async def stream_kanban(
+    db: AsyncIOMotorDatabase,
+    subscription: KanbanSubscription,
+) -> AsyncIterator[str]:
+    """Server-sent events: a snapshot first, then per-card diffs."""
+    await kanban_hub.start(db)
+    kanban_hub.subscribe(db, subscription)
+    try:
+        yield await _snapshot(db, subscription)
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    timeout=settings.kanban_stream_heartbeat_seconds,
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if message is RESYNC:
+                yield await _snapshot(db, subscription)
+            elif message["type"] == "card":
+                yield _sse("card", message["card"])
+            else:
+                yield _sse("remove", {"id": message["id"]})
+    finally:
+        kanban_hub.unsubscribe(subscription)
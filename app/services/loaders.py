@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Any
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+from app.models.collections import (
+    CANDIDATES_COLLECTION,
+    DEVELOPERS_COLLECTION,
+    REQUESTS_COLLECTION,
+)
+from app.utils.loader import DataLoader
+from app.utils.mongo import serialize_document
+
+
+def _by_id_loader(collection: AsyncIOMotorCollection) -> DataLoader[str, dict]:
+    async def batch_load(keys: list[str]) -> dict[str, dict]:
+        object_ids = [ObjectId(key) for key in keys if ObjectId.is_valid(key)]
+        if not object_ids:
+            return {}
+        cursor = collection.find({"_id": {"$in": object_ids}})
+        return {str(document["_id"]): serialize_document(document) async for document in cursor}
+
+    return DataLoader(batch_load)
+
+
+class Loaders:
+    """Per-HTTP-request batching and memoization of the documents services
+    compose responses from. Values are serialized documents, as returned by
+    the repositories."""
+
+    def __init__(self, db: AsyncIOMotorDatabase) -> None:
+        self._db = db
+        self.developers = _by_id_loader(db[DEVELOPERS_COLLECTION])
+        self.requests = _by_id_loader(db[REQUESTS_COLLECTION])
+        self.candidates: DataLoader[tuple[str, str], dict[str, Any]] = DataLoader(
+            self._load_candidates
+        )
+
+    async def _load_candidates(
+        self,
+        keys: list[tuple[str, str]],
+    ) -> dict[tuple[str, str], dict[str, Any]]:
+        cursor = self._db[CANDIDATES_COLLECTION].find(
+            {
+                "$or": [
+                    {"request_id": request_id, "developer_id": developer_id}
+                    for request_id, developer_id in keys
+                ]
+            }
+        )
+        found: dict[tuple[str, str], dict[str, Any]] = {}
+        async for document in cursor:
+            key = (document.get("request_id"), document.get("developer_id"))
+            found.setdefault(key, serialize_document(document))
+        return found
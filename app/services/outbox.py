@@ -0,0 +1,156 @@
+"""Transactional outbox: queue tasks are stored in Mongo together with the
+entity change that produced them, and a background relay publishes them to
+Redis. Request handlers never wait on Redis, and a crash between the write
+and the publish cannot lose a task.
+
+Delivery is at-least-once: an entry published just before a crash is
+published again after its lease expires, under the same task_id, which
+consumers use to drop duplicates."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+import logging
+from typing import Any, TypeVar
+
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.repositories.outbox import OutboxRepository
+from app.services.task_queue import QUEUES, TaskQueue, task_publisher
+from app.utils.mongo import is_replica_set
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_transactions_supported: bool | None = None
+
+
+async def transactions_supported(db: AsyncIOMotorDatabase) -> bool:
+    """MONGODB_TRANSACTIONS if set, otherwise whether the server is a replica
+    set member or a mongos; detected once per process."""
+    global _transactions_supported
+    if settings.mongodb_transactions is not None:
+        return settings.mongodb_transactions
+    if _transactions_supported is None:
+        _transactions_supported = await is_replica_set(db)
+        if not _transactions_supported:
+            logger.warning("MongoDB is a standalone server, running writes without transactions")
+    return _transactions_supported
+
+
+async def run_in_transaction(
+    db: AsyncIOMotorDatabase,
+    callback: Callable[[AsyncIOMotorClientSession | None], Awaitable[T]],
+) -> T:
+    """Run callback(session) in a transaction, retried on transient errors.
+    Without transaction support (a standalone server, or
+    MONGODB_TRANSACTIONS=false) callback gets None and its writes are applied
+    one by one."""
+    if not await transactions_supported(db):
+        result = await callback(None)
+    else:
+        async with await db.client.start_session() as session:
+            result = await session.with_transaction(callback)
+    # Wake the relay only once the entries it should publish are committed.
+    outbox_relay.notify()
+    return result
+
+
+async def enqueue_task(
+    db: AsyncIOMotorDatabase,
+    queue: TaskQueue,
+    task: dict[str, Any],
+    *,
+    session: AsyncIOMotorClientSession | None = None,
+) -> None:
+    now = datetime.now(timezone.utc)
+    await OutboxRepository(db).create(
+        {
+            "task_id": task["task_id"],
+            "queue": queue.name,
+            "task": task,
+            "attempts": 0,
+            "created_at": now,
+            "available_at": now,
+        },
+        session=session,
+    )
+    if session is None:
+        outbox_relay.notify()
+
+
+class OutboxRelay:
+    """Drains the outbox into Redis in leased batches, one pipelined
+    round-trip per batch, backing off per entry when Redis fails."""
+
+    def __init__(self) -> None:
+        self._wakeup = asyncio.Event()
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def drain_once(self, db: AsyncIOMotorDatabase) -> int:
+        repo = OutboxRepository(db)
+        entries = await repo.claim_batch(
+            limit=settings.outbox_batch_size,
+            lease_seconds=settings.outbox_lease_seconds,
+        )
+        if not entries:
+            return 0
+        by_queue: dict[str, list[dict[str, Any]]] = {}
+        unknown = []
+        for entry in entries:
+            if entry.get("queue") in QUEUES:
+                by_queue.setdefault(entry["queue"], []).append(entry)
+            else:
+                unknown.append(entry["_id"])
+        if unknown:
+            logger.error("Outbox entries for unknown queues: %s", unknown)
+            await repo.retry_later(
+                unknown,
+                delay_seconds=settings.outbox_max_backoff_seconds,
+                error="unknown queue",
+            )
+        for queue_name, queued in by_queue.items():
+            entry_ids = [entry["_id"] for entry in queued]
+            try:
+                await task_publisher.publish_many(
+                    QUEUES[queue_name],
+                    [entry["task"] for entry in queued],
+                )
+            except RedisError as exc:
+                attempts = min(entry.get("attempts", 0) for entry in queued)
+                logger.warning("Outbox publish to %s failed: %s", queue_name, exc)
+                await repo.retry_later(
+                    entry_ids,
+                    delay_seconds=min(
+                        2**attempts, settings.outbox_max_backoff_seconds
+                    ),
+                    error=str(exc),
+                )
+                continue
+            await repo.delete_entries(entry_ids)
+        return len(entries)
+
+    async def run(self, db: AsyncIOMotorDatabase, interval_seconds: float) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                drained = await self.drain_once(db)
+            except PyMongoError:
+                logger.exception("Outbox relay failed")
+                drained = 0
+            if drained >= settings.outbox_batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), interval_seconds)
+            except TimeoutError:
+                pass
+
+
+outbox_relay = OutboxRelay()
@@ -0,0 +1,135 @@
+"""Redis-backed cache of serialized request detail responses.
+
+Each request has a version counter that every write touching its detail
+bumps. An entry is stored together with the version read before the detail
+was built, and is served only while that version is still current, so a
+detail built concurrently with a write is never served after the write.
+Documents written by other services (the Telegram bot, the matcher) bump
+nothing; the entry TTL bounds how long such changes can go unseen.
+
+Redis errors never fail a request: lookups miss, stores and invalidations
+are skipped with a warning (the TTL still expires stale entries)."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from app.clients.redis import redis_client
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A version key outlives entries by far, so an entry cannot outlive the
+# version it was stored under and match a counter that restarted from zero.
+VERSION_TTL_FACTOR = 10
+
+
+@dataclass(frozen=True)
+class CachedDetail:
+    etag: str
+    body: bytes
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag: identical bodies, and only those, share a tag."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class RequestDetailCache:
+    def __init__(self, prefix: str = "request_detail") -> None:
+        self._prefix = prefix
+
+    @property
+    def enabled(self) -> bool:
+        return settings.request_detail_cache_seconds > 0
+
+    def _version_key(self, request_id: str) -> str:
+        return f"{self._prefix}:version:{request_id}"
+
+    def _entry_key(self, request_id: str) -> str:
+        return f"{self._prefix}:entry:{request_id}"
+
+    async def lookup(self, request_id: str) -> tuple[str | None, CachedDetail | None]:
+        """Current version and the entry stored under it, in one round-trip.
+        The version is None when nothing may be stored (disabled, Redis down)."""
+        if not self.enabled:
+            return None, None
+        try:
+            version, raw = await redis_client.connect().mget(
+                self._version_key(request_id),
+                self._entry_key(request_id),
+            )
+        except RedisError:
+            logger.warning("Request detail cache lookup failed for %s", request_id)
+            return None, None
+        version = version or "0"
+        if raw is None:
+            return version, None
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            return version, None
+        if entry.get("version") != version:
+            return version, None
+        return version, CachedDetail(etag=entry["etag"], body=entry["body"].encode())
+
+    async def store(
+        self,
+        request_id: str,
+        version: str | None,
+        detail: BaseModel,
+    ) -> CachedDetail:
+        body = detail.model_dump_json().encode()
+        cached = CachedDetail(etag=make_etag(body), body=body)
+        if version is None:
+            return cached
+        entry = {"version": version, "etag": cached.etag, "body": body.decode()}
+        try:
+            await redis_client.connect().set(
+                self._entry_key(request_id),
+                json.dumps(entry),
+                ex=max(1, int(settings.request_detail_cache_seconds)),
+            )
+        except RedisError:
+            logger.warning("Request detail cache store failed for %s", request_id)
+        return cached
+
+    async def invalidate(self, request_ids: Iterable[str]) -> None:
+        request_ids = {request_id for request_id in request_ids if request_id}
+        if not self.enabled or not request_ids:
+            return
+        version_ttl = max(
+            3600,
+            int(settings.request_detail_cache_seconds * VERSION_TTL_FACTOR),
+        )
+        try:
+            async with redis_client.connect().pipeline(transaction=False) as pipe:
+                for request_id in request_ids:
+                    pipe.incr(self._version_key(request_id))
+                    pipe.expire(self._version_key(request_id), version_ttl)
+                    pipe.delete(self._entry_key(request_id))
+                await pipe.execute()
+        except RedisError:
+            logger.warning("Request detail cache invalidation failed for %s", request_ids)
+
+
+request_detail_cache = RequestDetailCache()
@@ -1,22 +1,118 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from bson.errors import InvalidId
 
 from datetime import datetime, timezone
 
 from fastapi import HTTPException
 
-from app.repositories.request import RequestRepository
-from app.repositories.audit_event import AuditEventRepository
+from app.consts import DEFAULT_PAGE_SIZE
+from app.core.config import settings
+from app.repositories.candidate import CandidateRepository
+from app.repositories.request import (
+    REQUEST_FULL_PROJECTION,
+    REQUEST_SORTS,
+    REQUEST_SUMMARY_PROJECTION,
+    RequestRepository,
+)
+from app.repositories.response import ResponseRepository
 from app.schemas.request import (
+    RequestCandidateListResponse,
     RequestDeleteResponse,
     RequestDetailResponse,
     RequestInDB,
+    RequestListResponse,
+    RequestLookupResponse,
+    RequestPatchResponse,
 )
 from app.schemas.request_status import RequestStatus
 from app.schemas.response_stage import ResponseStage
+from app.services.audit import audit_sink
+from app.services.kanban import refresh_kanban_cards
+from app.services.loaders import Loaders
+from app.services.request_cache import CachedDetail, request_detail_cache
+from app.utils.cursor import InvalidCursorError, decode_cursor, encode_cursor
+from app.utils.deadline import deadline_fields
 from app.utils.mongo import serialize_document
+from app.utils.request_filters import build_request_filters
+from app.utils.search import request_search_fields, trigrams
+
+
+REQUEST_EXPANSIONS = {"candidates", "responses"}
+REQUEST_VIEWS = {
+    "summary": REQUEST_SUMMARY_PROJECTION,
+    "full": REQUEST_FULL_PROJECTION,
+}
+
+
+def _parse_datetime(value: object) -> datetime | None:
+    return datetime.fromisoformat(value) if isinstance(value, str) else None
+
+
+def _cursor_filter(cursor: str, sort: str) -> dict[str, object]:
+    try:
+        values = decode_cursor(cursor)
+        request_id = ObjectId(values.get("id") or "")
+        if values.get("sort", "created_at") != sort:
+            raise ValueError("cursor belongs to another sort")
+        if sort == "deadline":
+            deadline_at = _parse_datetime(values.get("deadline_at"))
+            if deadline_at is None:
+                raise ValueError("deadline cursor without deadline_at")
+            return RequestRepository.after_deadline_cursor_filter(deadline_at, request_id)
+        created_at = _parse_datetime(values.get("created_at"))
+    except (InvalidCursorError, InvalidId, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Некорректный курсор") from exc
+    return RequestRepository.after_cursor_filter(created_at, request_id)
+
+
+def _next_cursor(last: RequestInDB, sort: str) -> str:
+    if sort == "deadline":
+        return encode_cursor(
+            {
+                "sort": sort,
+                "deadline_at": last.deadline_at.isoformat() if last.deadline_at else None,
+                "id": last.id,
+            }
+        )
+    return encode_cursor(
+        {
+            "created_at": last.created_at.isoformat() if last.created_at else None,
+            "id": last.id,
+        }
+    )
+
+
+def _list_filters(
+    *,
+    role: str | None,
+    grade: str | None,
+    work_format: str | None,
+    has_deadline: bool | None,
+    deadline_after: datetime | None,
+    deadline_before: datetime | None,
+    sort: str,
+    cursor: str | None,
+) -> dict[str, object]:
+    filters = build_request_filters(
+        role=role,
+        grade=grade,
+        work_format=work_format,
+        has_deadline=has_deadline,
+        deadline_after=deadline_after,
+        deadline_before=deadline_before,
+    )
+    if sort == "deadline" and "deadline_at" not in filters:
+        # Unparsed deadlines (null) would otherwise sort first.
+        filters["deadline_at"] = {"$type": "date"}
+    if cursor:
+        after = _cursor_filter(cursor, sort)
+        filters = {"$and": [filters, after]} if filters else after
+    return filters
 
 
 async def list_requests(
@@ -26,64 +122,160 @@ async def list_requests(
     grade: str | None = None,
     work_format: str | None = None,
     has_deadline: bool | None = None,
+    deadline_after: datetime | None = None,
+    deadline_before: datetime | None = None,
+    sort: str = "created_at",
+    size: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    view: str = "summary",
+) -> RequestListResponse:
+    filters = _list_filters(
+        role=role,
+        grade=grade,
+        work_format=work_format,
+        has_deadline=has_deadline,
+        deadline_after=deadline_after,
+        deadline_before=deadline_before,
+        sort=sort,
+        cursor=cursor,
+    )
+    repo = RequestRepository(db)
+    items = [
+        RequestInDB.model_validate(document)
+        async for document in repo.iter_requests(
+            filters,
+            projection=REQUEST_VIEWS[view],
+            sort=REQUEST_SORTS[sort],
+            limit=size,
+            batch_size=size,
+        )
+    ]
+    next_cursor = _next_cursor(items[-1], sort) if len(items) == size else None
+    return RequestListResponse(items=items, size=size, next_cursor=next_cursor)
+
+
+async def list_all_requests(
+    db: AsyncIOMotorDatabase,
+    *,
+    role: str | None = None,
+    grade: str | None = None,
+    work_format: str | None = None,
+    has_deadline: bool | None = None,
+    deadline_after: datetime | None = None,
+    deadline_before: datetime | None = None,
+    sort: str = "created_at",
 ) -> list[RequestInDB]:
+    """Unpaged listing in the full view, for clients that predate the
+    cursor pages."""
+    filters = _list_filters(
+        role=role,
+        grade=grade,
+        work_format=work_format,
+        has_deadline=has_deadline,
+        deadline_after=deadline_after,
+        deadline_before=deadline_before,
+        sort=sort,
+        cursor=None,
+    )
     repo = RequestRepository(db)
-    filters: dict[str, object] = {}
-    if role:
-        filters["vacancy.role"] = role
-    if grade:
-        filters["vacancy.grade"] = grade
-    if work_format:
-        filters["vacancy.work_format"] = work_format
-    if has_deadline is True:
-        filters["vacancy.application_deadline"] = {"$exists": True, "$ne": ""}
-    elif has_deadline is False:
-        filters["$or"] = [
-            {"vacancy.application_deadline": {"$exists": False}},
-            {"vacancy.application_deadline": ""},
-            {"vacancy.application_deadline": None},
-        ]
-
-    docs = await repo.list_requests(filters=filters, sort=[("created_at", -1)])
-    return [RequestInDB.model_validate(serialize_document(doc)) for doc in docs]
+    return [
+        RequestInDB.model_validate(document)
+        async for document in repo.iter_requests(
+            filters,
+            projection=REQUEST_VIEWS["full"],
+            sort=REQUEST_SORTS[sort],
+        )
+    ]
 
 
-async def get_request_by_id(
+def stream_requests(
     db: AsyncIOMotorDatabase,
     *,
-    request_id: str,
-) -> RequestDetailResponse:
+    role: str | None = None,
+    grade: str | None = None,
+    work_format: str | None = None,
+    has_deadline: bool | None = None,
+    deadline_after: datetime | None = None,
+    deadline_before: datetime | None = None,
+    sort: str = "created_at",
+    cursor: str | None = None,
+    view: str = "summary",
+) -> AsyncIterator[bytes]:
+    """Every matching request as NDJSON, one line per document, encoded as
+    the database cursor yields it. Filters and the cursor are validated
+    before the first byte is sent."""
+    filters = _list_filters(
+        role=role,
+        grade=grade,
+        work_format=work_format,
+        has_deadline=has_deadline,
+        deadline_after=deadline_after,
+        deadline_before=deadline_before,
+        sort=sort,
+        cursor=cursor,
+    )
     repo = RequestRepository(db)
-    if not ObjectId.is_valid(request_id):
-        raise HTTPException(status_code=400, detail="Некорректный идентификатор")
-    request = await repo.get_request_by_id(request_id)
-    if not request:
-        raise HTTPException(status_code=404, detail="Заявка не найдена")
-    request_model = RequestInDB.model_validate(serialize_document(request))
 
-    candidates_cursor = db["candidates"].find({"request_id": request_id}).sort("score", -1)
-    candidate_docs = [serialize_document(doc) async for doc in candidates_cursor]
+    async def lines() -> AsyncIterator[bytes]:
+        async for document in repo.iter_requests(
+            filters,
+            projection=REQUEST_VIEWS[view],
+            sort=REQUEST_SORTS[sort],
+        ):
+            yield RequestInDB.model_validate(document).model_dump_json().encode() + b"\n"
+
+    return lines()
+
+
+async def lookup_requests(
+    db: AsyncIOMotorDatabase,
+    *,
+    q: str,
+    threshold: float | None = None,
+    limit: int,
+) -> RequestLookupResponse:
+    repo = RequestRepository(db)
+    matches = await repo.similar_by_trigrams(
+        trigrams(q),
+        threshold=settings.fuzzy_similarity_threshold if threshold is None else threshold,
+        limit=limit,
+        projection={"name": 1, "status": 1},
+    )
+    return RequestLookupResponse(items=matches)
+
+
+def _candidate_cursor_filter(cursor: str) -> dict[str, object]:
+    try:
+        values = decode_cursor(cursor)
+        score = values.get("score")
+        if score is not None:
+            score = float(score)
+        candidate_id = ObjectId(values.get("id") or "")
+    except (InvalidCursorError, InvalidId, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Некорректный курсор") from exc
+    return CandidateRepository.after_cursor_filter(score, candidate_id)
+
+
+def _candidates_next_cursor(candidate_docs: list[dict], size: int) -> str | None:
+    if not candidate_docs or len(candidate_docs) < size:
+        return None
+    last = candidate_docs[-1]
+    return encode_cursor({"score": last.get("score"), "id": last.get("id")})
+
+
+async def _candidate_items(
+    loaders: Loaders,
+    candidate_docs: list[dict],
+    assigned_developer_ids: set[str],
+) -> list[dict]:
     candidate_developer_ids = {
         doc.get("developer_id") for doc in candidate_docs if isinstance(doc.get("developer_id"), str)
     }
-    developer_object_ids = []
-    for developer_id in candidate_developer_ids:
-        try:
-            developer_object_ids.append(ObjectId(developer_id))
-        except Exception:
-            continue
-    developers_by_id: dict[str, dict] = {}
-    if developer_object_ids:
-        developer_cursor = db["developers"].find({"_id": {"$in": developer_object_ids}})
-        async for developer in developer_cursor:
-            developers_by_id[str(developer.get("_id"))] = developer
-
-    response_cursor = db["responses"].find({"request_id": request_id})
-    response_docs = [serialize_document(doc) async for doc in response_cursor]
-    assigned_developer_ids = {
-        doc.get("developer_id") for doc in response_docs if isinstance(doc.get("developer_id"), str)
+    developers_by_id = {
+        developer["id"]: developer
+        for developer in await loaders.developers.load_many(candidate_developer_ids)
+        if developer
     }
-
     candidates = []
     for candidate in candidate_docs:
         developer_id = candidate.get("developer_id") or ""
@@ -102,6 +294,33 @@ async def get_request_by_id(
                 "already_assigned": developer_id in assigned_developer_ids,
             }
         )
+    return candidates
+
+
+async def get_request_by_id(
+    db: AsyncIOMotorDatabase,
+    *,
+    request_id: str,
+    loaders: Loaders | None = None,
+) -> RequestDetailResponse:
+    loaders = loaders or Loaders(db)
+    if not ObjectId.is_valid(request_id):
+        raise HTTPException(status_code=400, detail="Некорректный идентификатор")
+    request = await loaders.requests.load(request_id)
+    if not request:
+        raise HTTPException(status_code=404, detail="Заявка не найдена")
+    request_model = RequestInDB.model_validate(request)
+
+    candidate_docs = await CandidateRepository(db).list_top_for_request(
+        request_id,
+        limit=settings.request_detail_candidates,
+    )
+    response_cursor = db["responses"].find({"request_id": request_id})
+    response_docs = [serialize_document(doc) async for doc in response_cursor]
+    assigned_developer_ids = {
+        doc.get("developer_id") for doc in response_docs if isinstance(doc.get("developer_id"), str)
+    }
+    candidates = await _candidate_items(loaders, candidate_docs, assigned_developer_ids)
 
     responses = []
     for response in response_docs:
@@ -128,27 +347,124 @@ async def get_request_by_id(
         vacancy=request_model.vacancy,
         meta=request_model.meta,
         raw_text=request_model.raw_text,
+        has_deadline=request_model.has_deadline,
+        deadline_at=request_model.deadline_at,
         created_at=request_model.created_at,
         updated_at=request_model.updated_at,
         candidates=candidates,
+        candidates_next_cursor=_candidates_next_cursor(
+            candidate_docs, settings.request_detail_candidates
+        ),
         responses=responses,
     )
 
 
+async def list_request_candidates(
+    db: AsyncIOMotorDatabase,
+    *,
+    request_id: str,
+    size: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    include_description: bool = True,
+    loaders: Loaders | None = None,
+) -> RequestCandidateListResponse:
+    """A page of the request's candidates, best score first. The detail
+    carries the first page; candidates_next_cursor continues here."""
+    loaders = loaders or Loaders(db)
+    if not ObjectId.is_valid(request_id):
+        raise HTTPException(status_code=400, detail="Некорректный идентификатор")
+    candidate_docs = await CandidateRepository(db).list_top_for_request(
+        request_id,
+        limit=size,
+        include_description=include_description,
+        after=_candidate_cursor_filter(cursor) if cursor else None,
+    )
+    if not candidate_docs and not await loaders.requests.load(request_id):
+        raise HTTPException(status_code=404, detail="Заявка не найдена")
+    assigned_developer_ids = set(
+        await ResponseRepository(db).list_assigned_developer_ids(
+            request_id,
+            [doc["developer_id"] for doc in candidate_docs if isinstance(doc.get("developer_id"), str)],
+        )
+    )
+    return RequestCandidateListResponse(
+        items=await _candidate_items(loaders, candidate_docs, assigned_developer_ids),
+        size=size,
+        next_cursor=_candidates_next_cursor(candidate_docs, size),
+    )
+
+
+async def get_cached_request_detail(
+    db: AsyncIOMotorDatabase,
+    *,
+    request_id: str,
+    loaders: Loaders | None = None,
+) -> CachedDetail:
+    """Serialized detail with its ETag, from the cache when the stored entry
+    is current; otherwise built from Mongo and stored."""
+    if not ObjectId.is_valid(request_id):
+        raise HTTPException(status_code=400, detail="Некорректный идентификатор")
+    version, cached = await request_detail_cache.lookup(request_id)
+    if cached is not None:
+        return cached
+    detail = await get_request_by_id(db, request_id=request_id, loaders=loaders)
+    return await request_detail_cache.store(request_id, version, detail)
+
+
+def parse_expand(expand: str | None) -> set[str]:
+    values = {value.strip() for value in (expand or "").split(",") if value.strip()}
+    if not values <= REQUEST_EXPANSIONS:
+        raise HTTPException(status_code=400, detail="Некорректный параметр expand")
+    return values
+
+
 async def update_request(
     db: AsyncIOMotorDatabase,
     *,
     request_id: str,
     status_value: RequestStatus | None,
     name: str | None,
-) -> RequestDetailResponse:
+    expand: set[str] | None = None,
+    loaders: Loaders | None = None,
+) -> RequestPatchResponse:
+    """One find_one_and_update; the response is built from its pre-image and
+    our own $set. expand adds candidates/responses from the cached detail
+    read before the write (the write does not change them) or, without
+    one, from a fresh detail."""
+    loaders = loaders or Loaders(db)
     repo = RequestRepository(db)
-    audit_repo = AuditEventRepository(db)
     if not ObjectId.is_valid(request_id):
         raise HTTPException(status_code=400, detail="Некорректный идентификатор")
-    request = await repo.get_by_id(request_id)
+    update_payload: dict[str, object] = {}
+    if status_value is not None:
+        update_payload["status"] = status_value.value
+    if name is not None:
+        update_payload["name"] = name
+    if update_payload:
+        update_payload["updated_at"] = datetime.now(timezone.utc)
+    if name is not None:
+        update_payload.update(request_search_fields({"name": name}))
+        update_payload["search_indexed_at"] = update_payload["updated_at"]
+    cached = None
+    if expand:
+        _, cached = await request_detail_cache.lookup(request_id)
+    # The pre-image carries the previous status for the audit record. The
+    # full document is only needed to build a detail from it.
+    request = await repo.update_by_id(
+        request_id,
+        update_payload,
+        return_previous=True,
+        projection=(
+            REQUEST_FULL_PROJECTION if expand and cached is None else REQUEST_SUMMARY_PROJECTION
+        ),
+    )
     if not request:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
+    if "has_deadline" not in request:
+        # Not normalized by the derived-fields sync yet; do it with this write.
+        deadline = deadline_fields(request)
+        await repo.update_by_id(request_id, deadline, projection={"_id": 1})
+        update_payload.update(deadline)
     current_status_raw = request.get("status")
     current_status = None
     if isinstance(current_status_raw, str):
@@ -156,19 +472,10 @@ async def update_request(
             current_status = RequestStatus(current_status_raw)
         except ValueError:
             current_status = None
-    update_payload: dict[str, object] = {}
-    if status_value is not None:
-        update_payload["status"] = status_value.value
-    if name is not None:
-        update_payload["name"] = name
-    if update_payload:
-        update_payload["updated_at"] = datetime.now(timezone.utc)
-    updated = await repo.update_by_id(request_id, update_payload)
-    if not updated:
-        raise HTTPException(status_code=404, detail="Заявка не найдена")
     if status_value is not None:
         next_status = status_value
-        await audit_repo.create(
+        await audit_sink.record(
+            db,
             {
                 "entity_type": "request",
                 "entity_id": request_id,
@@ -180,7 +487,24 @@ async def update_request(
                 "created_at": datetime.now(timezone.utc),
             }
         )
-    return await get_request_by_id(db, request_id=request_id)
+    await request_detail_cache.invalidate([request_id])
+    await refresh_kanban_cards(db, [request_id])
+    # The pre-image plus our own $set is the current document; no re-read.
+    updated = {**request, **serialize_document(update_payload)}
+    result = RequestPatchResponse.model_validate(updated)
+    if not expand:
+        return result
+    if cached is not None:
+        detail = RequestDetailResponse.model_validate_json(cached.body)
+    else:
+        loaders.requests.prime(request_id, updated)
+        detail = await get_request_by_id(db, request_id=request_id, loaders=loaders)
+    if "candidates" in expand:
+        result.candidates = detail.candidates
+        result.candidates_next_cursor = detail.candidates_next_cursor
+    if "responses" in expand:
+        result.responses = detail.responses
+    return result
 
 
 async def delete_request_by_id(
@@ -192,4 +516,6 @@ async def delete_request_by_id(
     deleted = await repo.delete_request_by_id(request_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
+    await request_detail_cache.invalidate([request_id])
+    await refresh_kanban_cards(db, [request_id])
     return RequestDeleteResponse(id=request_id, deleted=True)
@@ -4,21 +4,44 @@ from datetime import datetime, timezone
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import ConnectionFailure, DuplicateKeyError
 
 from fastapi import HTTPException
 
-from app.repositories.audit_event import AuditEventRepository
 from app.repositories.response import ResponseRepository
 from app.schemas.response import (
     ResponseCreatePayload,
     ResponseDetailResponse,
     ResponseInDB,
+    ResponseStageMoveItem,
+    ResponseStageMoveResponse,
+    ResponseWithAllowed,
 )
 from app.schemas.response_stage import ResponseStage
-from app.utils.response_stage import STAGE_INDEX, STAGE_ORDER, allowed_stages, can_transition
+from app.services.analytics import record_funnel_changes, seconds_in_stage
+from app.services.audit import audit_sink
+from app.services.kanban import refresh_kanban_cards
+from app.services.request_cache import request_detail_cache
+from app.services.loaders import Loaders
+from app.utils.concurrency import run_concurrently
+from app.utils.funnel import (
+    created_delta,
+    deleted_delta,
+    next_reached_stage,
+    stage_change_delta,
+)
+from app.utils.response_stage import STAGE_INDEX, allowed_stages, can_transition
 from app.utils.mongo import serialize_document
 
+# Independent reads run concurrently; losing the database while they are in
+# flight is reported as 503 rather than an unhandled 500.
+LOOKUP_ERRORS = {
+    ConnectionFailure: lambda exc: HTTPException(
+        status_code=503,
+        detail="База данных недоступна",
+    ),
+}
+
 
 async def create_response(
     db: AsyncIOMotorDatabase,
@@ -26,7 +49,6 @@ async def create_response(
     payload: ResponseCreatePayload,
 ) -> ResponseInDB:
     repo = ResponseRepository(db)
-    audit_repo = AuditEventRepository(db)
     now = datetime.now(timezone.utc)
 
     try:
@@ -35,28 +57,28 @@ async def create_response(
     except Exception:
         raise HTTPException(status_code=404, detail="Заявка или разработчик не найдены")
 
-    request = await db["requests"].find_one({"_id": request_object_id})
+    request, developer = await run_concurrently(
+        db["requests"].find_one({"_id": request_object_id}, {"_id": 1}),
+        db["developers"].find_one({"_id": developer_object_id}, {"status": 1}),
+        error_map=LOOKUP_ERRORS,
+    )
     if not request:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
-    developer = await db["developers"].find_one({"_id": developer_object_id})
     if not developer:
         raise HTTPException(status_code=404, detail="Разработчик не найден")
     if developer.get("status") == "занят":
         raise HTTPException(status_code=422, detail="Разработчик занят")
 
-    existing = await repo.get_by_request_developer(
-        payload.request_id,
-        payload.developer_id,
-    )
-    if existing:
-        raise HTTPException(status_code=409, detail="Отклик уже существует")
-
+    # Duplicates are rejected by the unique (request_id, developer_id) index.
     response_payload = {
         "request_id": payload.request_id,
         "developer_id": payload.developer_id,
         "rate": payload.rate,
         "stage": ResponseStage.CV_SELECTED.value,
         "max_stage": STAGE_INDEX[ResponseStage.CV_SELECTED],
+        "reached_stage": STAGE_INDEX[ResponseStage.CV_SELECTED],
+        "version": 0,
+        "stage_entered_at": now,
         "created_at": now,
         "updated_at": now,
     }
@@ -66,7 +88,8 @@ async def create_response(
         raise HTTPException(status_code=409, detail="Отклик уже существует")
 
     response_id = created.get("id") or ""
-    await audit_repo.create(
+    await audit_sink.record(
+        db,
         {
             "entity_type": "response",
             "entity_id": response_id,
@@ -80,63 +103,118 @@ async def create_response(
             "created_at": now,
         }
     )
+    await record_funnel_changes(db, [(payload.request_id, now, created_delta())])
+    await request_detail_cache.invalidate([payload.request_id])
+    await refresh_kanban_cards(db, [payload.request_id])
 
     return ResponseInDB.model_validate(created)
 
 
+def _stored_stage(response: dict) -> ResponseStage | None:
+    stage_raw = response.get("stage")
+    if not isinstance(stage_raw, str):
+        return None
+    try:
+        return ResponseStage(stage_raw)
+    except ValueError:
+        return ResponseStage.CV_SELECTED
+
+
+def _stored_max_stage(response: dict) -> int:
+    max_stage = response.get("max_stage")
+    return int(max_stage) if isinstance(max_stage, int) else 1
+
+
+def _stored_reached_stage(response: dict) -> int:
+    # Responses written before reached_stage: max_stage is the best guess.
+    reached_stage = response.get("reached_stage")
+    if isinstance(reached_stage, int):
+        return reached_stage
+    return _stored_max_stage(response)
+
+
+def _with_allowed(response: dict) -> dict:
+    response = {**response}
+    stage = _stored_stage(response)
+    response["stage"] = (stage or ResponseStage.CV_SELECTED).value
+    response_model = ResponseInDB.model_validate(response)
+    allowed = allowed_stages(
+        ResponseStage(response_model.stage),
+        response_model.max_stage or _stored_max_stage(response),
+    )
+    return {**response_model.model_dump(), "allowed_stages": allowed}
+
+
+def _change_conflict(
+    current: dict,
+    *,
+    stage: ResponseStage | None,
+    version: int | None,
+) -> HTTPException:
+    current_version = int(current.get("version") or 0)
+    if version is not None and current_version != version:
+        message = "Отклик был изменён, обновите данные"
+    else:
+        message = "Недопустимый переход стадии"
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": message,
+            "response": ResponseWithAllowed.model_validate(
+                _with_allowed(current)
+            ).model_dump(mode="json"),
+        },
+    )
+
+
 async def update_response(
     db: AsyncIOMotorDatabase,
     *,
     response_id: str,
     stage: ResponseStage | None,
     rate: str | None,
-) -> ResponseInDB:
+    version: int | None = None,
+) -> ResponseWithAllowed:
     repo = ResponseRepository(db)
-    audit_repo = AuditEventRepository(db)
     now = datetime.now(timezone.utc)
 
     if not ObjectId.is_valid(response_id):
         raise HTTPException(status_code=400, detail="Некорректный идентификатор")
 
-    response = await repo.get_by_id(response_id)
-    if not response:
-        raise HTTPException(status_code=404, detail="Отклик не найден")
-
-    update_payload: dict[str, object] = {"updated_at": now}
-    current_stage_raw = response.get("stage")
-    if isinstance(current_stage_raw, str):
-        try:
-            current_stage = ResponseStage(current_stage_raw)
-        except ValueError:
-            current_stage = ResponseStage.CV_SELECTED
-    else:
-        current_stage = None
-    current_rate = response.get("rate")
-    current_max_stage = response.get("max_stage")
-    max_stage_value = int(current_max_stage) if isinstance(current_max_stage, int) else 1
-
-    stage_order = STAGE_ORDER
-    stage_index = STAGE_INDEX
+    fields: dict[str, object] = {"updated_at": now}
+    if rate is not None:
+        fields["rate"] = rate
+    # The allowed source stages and the expected version are part of the
+    # update filter, so validation and write are one atomic call.
+    previous = await repo.apply_change(
+        response_id,
+        stage=stage,
+        fields=fields,
+        expected_version=version,
+    )
+    if previous is None:
+        current = await repo.get_by_id(response_id)
+        if not current:
+            raise HTTPException(status_code=404, detail="Отклик не найден")
+        raise _change_conflict(current, stage=stage, version=version)
 
+    current_stage = _stored_stage(previous)
+    updated = {
+        **previous,
+        **serialize_document(fields),
+        "version": int(previous.get("version") or 0) + 1,
+    }
+    audit_events = []
     if stage is not None:
-        can_move, next_max_stage = can_transition(
+        _, next_max_stage = can_transition(
             current_stage,
             stage,
-            max_stage_value,
+            _stored_max_stage(previous),
         )
-        if not can_move:
-            raise HTTPException(status_code=409, detail="Недопустимый переход стадии")
-        update_payload["stage"] = stage.value
-        update_payload["max_stage"] = next_max_stage
-    if rate is not None:
-        update_payload["rate"] = rate
-
-    updated = await repo.update_by_id(response_id, update_payload)
-    if not updated:
-        raise HTTPException(status_code=404, detail="Отклик не найден")
-
-    if stage is not None:
-        await audit_repo.create(
+        updated["stage"] = stage.value
+        updated["max_stage"] = next_max_stage
+        updated["reached_stage"] = next_reached_stage(_stored_reached_stage(previous), stage)
+        audit_events.append(
             {
                 "entity_type": "response",
                 "entity_id": response_id,
@@ -149,31 +227,189 @@ async def update_response(
             }
         )
     if rate is not None:
-        await audit_repo.create(
+        audit_events.append(
             {
                 "entity_type": "response",
                 "entity_id": response_id,
                 "action": "response_rate_changed",
                 "payload_json": {
-                    "from": current_rate,
+                    "from": previous.get("rate"),
                     "to": rate,
                 },
                 "created_at": now,
             }
         )
+    await audit_sink.record_many(db, audit_events)
+    if stage is not None:
+        await record_funnel_changes(
+            db,
+            [
+                (
+                    updated.get("request_id") or "",
+                    now,
+                    stage_change_delta(
+                        current_stage,
+                        stage,
+                        previous_reached_stage=_stored_reached_stage(previous),
+                        seconds_in_stage=seconds_in_stage(previous, now),
+                    ),
+                )
+            ],
+        )
+    await request_detail_cache.invalidate([updated.get("request_id") or ""])
+    await refresh_kanban_cards(db, [updated.get("request_id") or ""])
+    return _with_allowed(updated)
 
-    stage_raw = updated.get("stage")
-    if isinstance(stage_raw, str):
-        try:
-            ResponseStage(stage_raw)
-        except ValueError:
-            updated["stage"] = ResponseStage.CV_SELECTED.value
-    response_model = ResponseInDB.model_validate(updated)
-    allowed = allowed_stages(
-        ResponseStage(response_model.stage) if response_model.stage else None,
-        response_model.max_stage or max_stage_value,
+
+def _move_result(
+    response_id: str,
+    status_code: int,
+    detail: str | None = None,
+    response: dict | None = None,
+) -> dict:
+    return {
+        "response_id": response_id,
+        "ok": status_code == 200,
+        "status_code": status_code,
+        "detail": detail,
+        "response": _with_allowed(response) if response else None,
+    }
+
+
+async def move_response_stages(
+    db: AsyncIOMotorDatabase,
+    *,
+    items: list[ResponseStageMoveItem],
+) -> ResponseStageMoveResponse:
+    """Move many responses at once: one read, then one conditional update
+    per move sent concurrently, with the audit events recorded as one batch.
+    Each item's result comes from its own update."""
+    repo = ResponseRepository(db)
+    now = datetime.now(timezone.utc)
+
+    results: dict[int, dict] = {}
+    seen: set[str] = set()
+    for position, item in enumerate(items):
+        if not ObjectId.is_valid(item.response_id):
+            results[position] = _move_result(
+                item.response_id, 400, "Некорректный идентификатор"
+            )
+        elif item.response_id in seen:
+            results[position] = _move_result(
+                item.response_id, 409, "Отклик повторяется в запросе"
+            )
+        seen.add(item.response_id)
+
+    pending = [
+        (position, item) for position, item in enumerate(items) if position not in results
+    ]
+    current_by_id = {
+        document["id"]: document
+        for document in await repo.list_by_ids([item.response_id for _, item in pending])
+    }
+
+    moves: list[dict] = []
+    for position, item in pending:
+        current = current_by_id.get(item.response_id)
+        if current is None:
+            results[position] = _move_result(item.response_id, 404, "Отклик не найден")
+            continue
+        current_version = int(current.get("version") or 0)
+        if item.version is not None and item.version != current_version:
+            results[position] = _move_result(
+                item.response_id, 409, "Отклик был изменён, обновите данные", current
+            )
+            continue
+        current_stage = _stored_stage(current)
+        can_move, next_max_stage = can_transition(
+            current_stage,
+            item.stage,
+            _stored_max_stage(current),
+        )
+        if not can_move:
+            results[position] = _move_result(
+                item.response_id, 409, "Недопустимый переход стадии", current
+            )
+            continue
+        fields = {
+            "stage": item.stage.value,
+            "max_stage": next_max_stage,
+            "reached_stage": next_reached_stage(_stored_reached_stage(current), item.stage),
+            "updated_at": now,
+            "version": current_version + 1,
+        }
+        if current_stage != item.stage:
+            fields["stage_entered_at"] = now
+        moves.append(
+            {
+                "position": position,
+                "response_id": item.response_id,
+                "from_stage": current.get("stage"),
+                "from_version": current_version,
+                "current_stage": current_stage,
+                "current": current,
+                "fields": fields,
+            }
+        )
+
+    applied = await repo.apply_stage_moves(moves)
+    missed = [move["response_id"] for move, after in zip(moves, applied) if after is None]
+    # Moves that matched nothing: the response changed after our read, or
+    # was deleted.
+    missed_by_id = (
+        {document["id"]: document for document in await repo.list_by_ids(missed)}
+        if missed
+        else {}
+    )
+
+    audit_events = []
+    funnel_changes = []
+    request_ids = set()
+    for move, updated in zip(moves, applied):
+        if updated is None:
+            current = missed_by_id.get(move["response_id"])
+            results[move["position"]] = (
+                _move_result(move["response_id"], 404, "Отклик не найден")
+                if current is None
+                else _move_result(
+                    move["response_id"], 409, "Отклик был изменён, обновите данные", current
+                )
+            )
+            continue
+        results[move["position"]] = _move_result(move["response_id"], 200, response=updated)
+        request_ids.add(updated.get("request_id") or "")
+        funnel_changes.append(
+            (
+                updated.get("request_id") or "",
+                now,
+                stage_change_delta(
+                    move["current_stage"],
+                    ResponseStage(move["fields"]["stage"]),
+                    previous_reached_stage=_stored_reached_stage(move["current"]),
+                    seconds_in_stage=seconds_in_stage(move["current"], now),
+                ),
+            )
+        )
+        audit_events.append(
+            {
+                "entity_type": "response",
+                "entity_id": move["response_id"],
+                "action": "response_stage_changed",
+                "payload_json": {
+                    "from": move["current_stage"].value if move["current_stage"] else None,
+                    "to": move["fields"]["stage"],
+                },
+                "created_at": now,
+            }
+        )
+    await audit_sink.record_many(db, audit_events)
+    await record_funnel_changes(db, funnel_changes)
+    if request_ids:
+        await request_detail_cache.invalidate(request_ids)
+        await refresh_kanban_cards(db, list(request_ids))
+    return ResponseStageMoveResponse(
+        results=[results[position] for position in range(len(items))]
     )
-    return {**response_model.model_dump(), "allowed_stages": allowed}
 
 
 async def delete_response(
@@ -182,19 +418,16 @@ async def delete_response(
     response_id: str,
 ) -> None:
     repo = ResponseRepository(db)
-    audit_repo = AuditEventRepository(db)
     now = datetime.now(timezone.utc)
 
     if not ObjectId.is_valid(response_id):
         raise HTTPException(status_code=400, detail="Некорректный идентификатор")
 
-    response = await repo.get_by_id(response_id)
+    response = await repo.find_and_delete_by_id(response_id)
     if not response:
         raise HTTPException(status_code=404, detail="Отклик не найден")
-    deleted = await repo.delete_by_id(response_id)
-    if not deleted:
-        raise HTTPException(status_code=404, detail="Отклик не найден")
-    await audit_repo.create(
+    await audit_sink.record(
+        db,
         {
             "entity_type": "response",
             "entity_id": response_id,
@@ -207,13 +440,21 @@ async def delete_response(
             "created_at": now,
         }
     )
+    await record_funnel_changes(
+        db,
+        [(response.get("request_id") or "", now, deleted_delta(_stored_stage(response)))],
+    )
+    await request_detail_cache.invalidate([response.get("request_id") or ""])
+    await refresh_kanban_cards(db, [response.get("request_id") or ""])
 
 
 async def get_response_detail(
     db: AsyncIOMotorDatabase,
     *,
     response_id: str,
+    loaders: Loaders | None = None,
 ) -> ResponseDetailResponse:
+    loaders = loaders or Loaders(db)
     repo = ResponseRepository(db)
     if not ObjectId.is_valid(response_id):
         raise HTTPException(status_code=400, detail="Некорректный идентификатор")
@@ -223,26 +464,18 @@ async def get_response_detail(
 
     request_id = response.get("request_id") or ""
     developer_id = response.get("developer_id") or ""
-    request = None
-    developer = None
-    try:
-        request = await db["requests"].find_one({"_id": ObjectId(request_id)})
-    except Exception:
-        request = None
-    try:
-        developer = await db["developers"].find_one({"_id": ObjectId(developer_id)})
-    except Exception:
-        developer = None
+    request, developer, candidate = await run_concurrently(
+        loaders.requests.load(request_id),
+        loaders.developers.load(developer_id),
+        loaders.candidates.load((request_id, developer_id)),
+        error_map=LOOKUP_ERRORS,
+    )
     if not request:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
     if not developer:
         raise HTTPException(status_code=404, detail="Разработчик не найден")
 
-    candidate = await db["candidates"].find_one(
-        {"request_id": request_id, "developer_id": developer_id}
-    )
-
-    response_doc = serialize_document(response)
+    response_doc = {**response}
     stage_raw = response_doc.get("stage")
     if isinstance(stage_raw, str):
         try:
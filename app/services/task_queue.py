@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+import json
+import logging
+import time
+from typing import Any
+
+from fastapi import HTTPException
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError, ResponseError
+
+from app.clients.redis import redis_client
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueueStats:
+    name: str
+    backend: str
+    depth: int
+    pending: int
+    lag: int
+    oldest_age_seconds: float
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _age_seconds(created_at: str | None) -> float:
+    if not created_at:
+        return 0.0
+    try:
+        value = datetime.fromisoformat(created_at)
+    except ValueError:
+        return 0.0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return max(0.0, (datetime.now(timezone.utc) - value).total_seconds())
+
+
+def _stream_id_age_seconds(entry_id: str | None) -> float:
+    if not entry_id:
+        return 0.0
+    milliseconds = int(entry_id.split("-", 1)[0])
+    return max(0.0, time.time() - milliseconds / 1000)
+
+
+class ListQueue:
+    """Plain Redis list fed by RPUSH; consumers pop without acknowledgement."""
+
+    backend = "list"
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.key = f"queue:{name}"
+
+    def add(self, pipe: Pipeline, payloads: list[str]) -> None:
+        pipe.rpush(self.key, *payloads)
+
+    async def stats(self, redis: Redis) -> QueueStats:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.llen(self.key)
+            pipe.lindex(self.key, 0)
+            depth, oldest = await pipe.execute()
+        created_at = None
+        if oldest:
+            try:
+                created_at = json.loads(oldest).get("created_at")
+            except (ValueError, AttributeError):
+                created_at = None
+        return QueueStats(
+            name=self.name,
+            backend=self.backend,
+            depth=depth,
+            pending=0,
+            lag=depth,
+            oldest_age_seconds=_age_seconds(created_at),
+        )
+
+
+class StreamQueue:
+    """Redis stream with a consumer group: entries are acknowledged after
+    processing, and entries held too long by a dead consumer are reclaimed."""
+
+    backend = "stream"
+
+    def __init__(self, name: str, *, group: str, maxlen: int) -> None:
+        self.name = name
+        self.key = f"stream:{name}"
+        self.group = group
+        self.maxlen = maxlen
+
+    def add(self, pipe: Pipeline, payloads: list[str]) -> None:
+        for payload in payloads:
+            pipe.xadd(
+                self.key,
+                {"task": payload},
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+
+    async def ensure_group(self, redis: Redis) -> None:
+        try:
+            await redis.xgroup_create(self.key, self.group, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    @staticmethod
+    def _decode(entries: list) -> list[tuple[str, dict[str, Any]]]:
+        return [
+            (entry_id, json.loads(fields["task"]))
+            for entry_id, fields in entries
+            if fields and "task" in fields
+        ]
+
+    async def read(
+        self,
+        redis: Redis,
+        consumer: str,
+        *,
+        count: int = 10,
+        block_ms: int | None = None,
+    ) -> list[tuple[str, dict[str, Any]]]:
+        response = await redis.xreadgroup(
+            self.group,
+            consumer,
+            {self.key: ">"},
+            count=count,
+            block=block_ms,
+        )
+        if not response:
+            return []
+        return self._decode(response[0][1])
+
+    async def ack(self, redis: Redis, entry_ids: list[str]) -> int:
+        if not entry_ids:
+            return 0
+        return await redis.xack(self.key, self.group, *entry_ids)
+
+    async def reclaim(
+        self,
+        redis: Redis,
+        consumer: str,
+        *,
+        min_idle_ms: int,
+        count: int = 10,
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """Take over entries other consumers received but did not ack
+        within min_idle_ms."""
+        response = await redis.xautoclaim(
+            self.key,
+            self.group,
+            consumer,
+            min_idle_time=min_idle_ms,
+            start_id="0-0",
+            count=count,
+        )
+        return self._decode(response[1])
+
+    async def stats(self, redis: Redis) -> QueueStats:
+        depth = await redis.xlen(self.key)
+        groups = await redis.xinfo_groups(self.key) if depth else []
+        group = next((item for item in groups if item.get("name") == self.group), None)
+        if group is None:
+            return QueueStats(
+                name=self.name,
+                backend=self.backend,
+                depth=depth,
+                pending=0,
+                lag=depth,
+                oldest_age_seconds=0.0,
+            )
+        pending = int(group.get("pending") or 0)
+        lag = group.get("lag")
+        # Entries after last-delivered-id are the ones no consumer has seen;
+        # XLEN also counts acknowledged entries until MAXLEN trims them.
+        # Redis < 7 reports no lag, so count them, up to what admission needs.
+        undelivered = await redis.xrange(
+            self.key,
+            min=f"({group.get('last-delivered-id') or '0-0'}",
+            count=1 if lag is not None else settings.task_queue_max_depth + 1,
+        )
+        if lag is None:
+            lag = len(undelivered)
+        # Only undelivered entries age the queue: an entry left pending by a
+        # dead consumer waits for reclaim() and shows up in pending instead.
+        return QueueStats(
+            name=self.name,
+            backend=self.backend,
+            depth=depth,
+            pending=pending,
+            lag=int(lag),
+            oldest_age_seconds=(
+                _stream_id_age_seconds(undelivered[0][0]) if undelivered else 0.0
+            ),
+        )
+
+
+TaskQueue = ListQueue | StreamQueue
+
+
+def make_queue(name: str) -> TaskQueue:
+    if settings.task_queue_backend == "stream":
+        return StreamQueue(
+            name,
+            group=settings.task_queue_group,
+            maxlen=settings.task_queue_stream_maxlen,
+        )
+    return ListQueue(name)
+
+
+class TaskPublisher:
+    """Publishes JSON tasks over the shared Redis client.
+
+    publish() calls made in the same event-loop tick are coalesced into one
+    pipelined round-trip; each caller still waits for (and sees errors from)
+    the write carrying its task.
+    """
+
+    def __init__(self) -> None:
+        self._pending: list[tuple[TaskQueue, str, asyncio.Future]] = []
+        self._flushes: set[asyncio.Task] = set()
+
+    async def publish(self, queue: TaskQueue, task: dict[str, Any]) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((queue, json.dumps(task), future))
+        if len(self._pending) == 1:
+            loop.call_soon(self._schedule_flush)
+        await future
+
+    async def publish_many(self, queue: TaskQueue, tasks: list[dict[str, Any]]) -> None:
+        if not tasks:
+            return
+        async with redis_client.connect().pipeline(transaction=False) as pipe:
+            queue.add(pipe, [json.dumps(task) for task in tasks])
+            await pipe.execute()
+
+    def _schedule_flush(self) -> None:
+        pending, self._pending = self._pending, []
+        flush = asyncio.create_task(self._flush(pending))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, pending: list[tuple[TaskQueue, str, asyncio.Future]]) -> None:
+        by_queue: dict[str, tuple[TaskQueue, list[str]]] = {}
+        for queue, payload, _ in pending:
+            by_queue.setdefault(queue.key, (queue, []))[1].append(payload)
+        try:
+            async with redis_client.connect().pipeline(transaction=False) as pipe:
+                for queue, payloads in by_queue.values():
+                    queue.add(pipe, payloads)
+                await pipe.execute()
+        except Exception as exc:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for _, _, future in pending:
+            if not future.done():
+                future.set_result(None)
+
+    async def close(self) -> None:
+        """Wait for in-flight flushes so shutdown does not drop tasks."""
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+task_publisher = TaskPublisher()
+resume_ingest_queue = make_queue("resume_ingest")
+QUEUES = {resume_ingest_queue.name: resume_ingest_queue}
+
+
+async def ensure_queue_groups() -> None:
+    """Create the consumer groups of stream-backed queues, so stats and
+    consumers see the group even before the first task is published."""
+    redis = redis_client.connect()
+    for queue in QUEUES.values():
+        if not isinstance(queue, StreamQueue):
+            continue
+        try:
+            await queue.ensure_group(redis)
+        except RedisError:
+            logger.warning("Could not create consumer group for %s", queue.key)
+
+
+class QueueOverloadedError(Exception):
+    def __init__(self, stats: QueueStats, *, status_code: int, retry_after: int) -> None:
+        super().__init__(f"Queue {stats.name} is overloaded")
+        self.stats = stats
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+_stats_cache = TTLCache(settings.task_queue_stats_cache_seconds)
+
+
+async def queue_stats(queue: TaskQueue, *, cached: bool = False) -> QueueStats:
+    if cached:
+        stats = _stats_cache.get(queue.key)
+        if stats is not None:
+            return stats
+    stats = await queue.stats(redis_client.connect())
+    _stats_cache.set(queue.key, stats)
+    return stats
+
+
+async def check_admission(queue: TaskQueue) -> None:
+    """Refuse new work while the consumers are behind: 429 when the backlog
+    is too deep, 503 when the oldest task has waited too long. Redis errors
+    admit the task; publishing will report them."""
+    try:
+        stats = await queue_stats(queue, cached=True)
+    except RedisError:
+        logger.warning("Could not read %s stats for admission control", queue.key)
+        return
+    retry_after = settings.task_queue_retry_after_seconds
+    if stats.oldest_age_seconds > settings.task_queue_max_lag_seconds:
+        raise QueueOverloadedError(stats, status_code=503, retry_after=retry_after)
+    if stats.lag > settings.task_queue_max_depth:
+        raise QueueOverloadedError(stats, status_code=429, retry_after=retry_after)
+
+
+async def list_queue_stats() -> list[QueueStats]:
+    try:
+        return [await queue_stats(queue) for queue in QUEUES.values()]
+    except RedisError as exc:
+        raise HTTPException(status_code=503, detail="Redis недоступен") from exc
@@ -0,0 +1,32 @@
+from collections import OrderedDict
+import time
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """Small in-process cache with per-entry expiry and LRU eviction."""
+
+    def __init__(self, ttl_seconds: float, max_size: int = 1024) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_size = max_size
+        self._items: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            self._items.pop(key, None)
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._items[key] = (time.monotonic() + self._ttl_seconds, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
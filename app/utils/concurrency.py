@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any
+
+ErrorMap = Mapping[type[BaseException], Callable[[BaseException], BaseException]]
+
+
+def _leaf_errors(error: BaseException) -> list[BaseException]:
+    if isinstance(error, BaseExceptionGroup):
+        return [leaf for inner in error.exceptions for leaf in _leaf_errors(inner)]
+    return [error]
+
+
+def map_error(error: BaseException, error_map: ErrorMap | None) -> BaseException:
+    for error_type, factory in (error_map or {}).items():
+        if isinstance(error, error_type):
+            return factory(error)
+    return error
+
+
+async def _await(awaitable: Awaitable[Any]) -> Any:
+    return await awaitable
+
+
+async def run_concurrently(
+    *awaitables: Awaitable[Any],
+    error_map: ErrorMap | None = None,
+) -> list[Any]:
+    """Await independent operations concurrently and return their results in
+    argument order.
+
+    Runs under a TaskGroup: the first failure cancels the siblings that are
+    still running, and is re-raised on its own (not as an ExceptionGroup),
+    after translation through error_map, so callers keep plain try/except.
+    """
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(_await(awaitable)) for awaitable in awaitables]
+    except BaseExceptionGroup as errors:
+        first = _leaf_errors(errors)[0]
+        mapped = map_error(first, error_map)
+        if mapped is first:
+            # Keep the error's own cause rather than chaining the group.
+            raise first from first.__cause__
+        raise mapped from first
+    return [task.result() for task in tasks]
@@ -0,0 +1,23 @@
+import base64
+import json
+from typing import Any
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursorError("Некорректный курсор") from exc
+    if not isinstance(values, dict):
+        raise InvalidCursorError("Некорректный курсор")
+    return values
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any
+
+
+def as_utc(value: Any) -> datetime | None:
+    """A timezone-aware UTC datetime from a datetime or an ISO string;
+    naive values (as Mongo returns them) are taken to be UTC."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
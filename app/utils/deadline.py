@@ -0,0 +1,123 @@
+"""Normalization of the free-text vacancy.application_deadline into fields
+that can be indexed, filtered by range and sorted on."""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+import re
+from typing import Any
+
+from app.utils.dates import as_utc
+
+MONTHS = {
+    "янв": 1,
+    "фев": 2,
+    "мар": 3,
+    "апр": 4,
+    "мая": 5,
+    "май": 5,
+    "июн": 6,
+    "июл": 7,
+    "авг": 8,
+    "сен": 9,
+    "окт": 10,
+    "ноя": 11,
+    "дек": 12,
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
+RELATIVE_DAYS = {"послезавтра": 2, "завтра": 1, "сегодня": 0, "tomorrow": 1, "today": 0}
+# A date without a year that falls this far before the reference is taken to
+# mean next year ("до 10.01" posted in late December).
+PAST_YEAR_TOLERANCE = timedelta(days=30)
+
+_ISO = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_NUMERIC = re.compile(r"\b(\d{1,2})[./](\d{1,2})(?:[./](\d{2,4}))?\b")
+_TEXTUAL = re.compile(r"\b(\d{1,2})\s+([a-zа-яё]{3,})\.?(?:\s+(\d{4}))?", re.IGNORECASE)
+_TIME = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+
+
+def _build(year: int | None, month: int, day: int, reference: date) -> date | None:
+    try:
+        if year is not None:
+            if year < 100:
+                year += 2000
+            return date(year, month, day)
+        value = date(reference.year, month, day)
+        if value < reference - PAST_YEAR_TOLERANCE:
+            value = date(reference.year + 1, month, day)
+        return value
+    except ValueError:
+        return None
+
+
+def _parse_date(text: str, reference: date) -> date | None:
+    for word, days in RELATIVE_DAYS.items():
+        if word in text:
+            return reference + timedelta(days=days)
+    match = _ISO.search(text)
+    if match:
+        year, month, day = (int(part) for part in match.groups())
+        return _build(year, month, day, reference)
+    match = _NUMERIC.search(text)
+    if match:
+        day, month, year = match.groups()
+        return _build(int(year) if year else None, int(month), int(day), reference)
+    for match in _TEXTUAL.finditer(text):
+        day, month_name, year = match.groups()
+        month = MONTHS.get(month_name[:3].lower())
+        if month:
+            return _build(int(year) if year else None, month, int(day), reference)
+    return None
+
+
+def parse_deadline(text: str | None, *, reference: datetime | None = None) -> datetime | None:
+    """Deadline as a UTC datetime, or None when the text names no date.
+    Without a time of day the deadline is the start of that day."""
+    if not isinstance(text, str) or not text.strip():
+        return None
+    reference = reference or datetime.now(timezone.utc)
+    lowered = text.lower()
+    # Times like 18:00 would otherwise read as day.month.
+    without_time = _TIME.sub(" ", lowered)
+    day = _parse_date(without_time, reference.date())
+    if day is None:
+        return None
+    moment = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    time_match = _TIME.search(lowered)
+    if time_match:
+        moment = moment.replace(hour=int(time_match.group(1)), minute=int(time_match.group(2)))
+    return moment
+
+
+def deadline_fields(document: dict[str, Any]) -> dict[str, Any]:
+    """has_deadline mirrors the old filter (any non-empty text); deadline_at
+    is set only when the text could be parsed."""
+    vacancy = document.get("vacancy") or {}
+    text = vacancy.get("application_deadline") if isinstance(vacancy, dict) else None
+    has_deadline = isinstance(text, str) and bool(text.strip())
+    reference = as_utc(document.get("created_at"))
+    return {
+        "has_deadline": has_deadline,
+        "deadline_at": parse_deadline(text, reference=reference) if has_deadline else None,
+    }
+
+
+def stored_deadline_fields(document: dict[str, Any]) -> dict[str, Any]:
+    """The normalized fields as stored, or computed from the text for a
+    request the derived-fields sync has not reached yet."""
+    if "has_deadline" not in document:
+        return deadline_fields(document)
+    return {
+        "has_deadline": bool(document["has_deadline"]),
+        "deadline_at": document.get("deadline_at"),
+    }
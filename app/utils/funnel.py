@@ -0,0 +1,86 @@
+"""Increments applied to the per-request, per-day funnel counters for each
+kind of response change. Shared by the live write path and the rebuild from
+audit events, so both count the same way."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.schemas.response_stage import ResponseStage
+from app.utils.response_stage import STAGE_INDEX, STAGE_ORDER, TERMINAL_STAGES
+
+# entered  - moves into the stage (creation enters cv_selected)
+# reached  - responses getting to the stage for the first time; a move that
+#            skips stages reaches the skipped ones too, so no stage is
+#            reached more often than the one before it. Counted against the
+#            response's reached_stage, which unlike max_stage never goes
+#            down, so reopening a cancelled response does not count again
+# exited   - moves out of the stage
+# timed    - exits whose time in the stage is known (seconds covers these)
+# deleted  - responses deleted while in the stage
+COUNTER_GROUPS = ("entered", "reached", "exited", "timed", "seconds", "deleted")
+
+Delta = dict[str, float]
+
+
+def day_bucket(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, moment.day, tzinfo=timezone.utc)
+
+
+def created_delta(stage: ResponseStage = ResponseStage.CV_SELECTED) -> Delta:
+    return {f"entered.{stage.value}": 1, f"reached.{stage.value}": 1}
+
+
+def next_reached_stage(reached_stage: int, to_stage: ResponseStage) -> int:
+    """Highest stage index the response has ever been in; terminal stages
+    do not count."""
+    if to_stage in TERMINAL_STAGES:
+        return reached_stage
+    return max(reached_stage, STAGE_INDEX[to_stage])
+
+
+def next_reached_stage_expression(to_stage: ResponseStage) -> object:
+    """next_reached_stage() as an aggregation expression over the stored
+    document; responses written before reached_stage fall back to max_stage."""
+    stored = {"$ifNull": ["$reached_stage", {"$ifNull": ["$max_stage", 1]}]}
+    if to_stage in TERMINAL_STAGES:
+        return stored
+    return {"$max": [stored, STAGE_INDEX[to_stage]]}
+
+
+def stage_change_delta(
+    from_stage: ResponseStage | None,
+    to_stage: ResponseStage,
+    *,
+    previous_reached_stage: int,
+    seconds_in_stage: float | None,
+) -> Delta:
+    if from_stage == to_stage:
+        return {}
+    delta: Delta = {f"entered.{to_stage.value}": 1}
+    # Stages with an index in (previous_reached_stage, to_stage].
+    reached_stage = next_reached_stage(previous_reached_stage, to_stage)
+    for stage in STAGE_ORDER[previous_reached_stage:reached_stage]:
+        delta[f"reached.{stage.value}"] = 1
+    if from_stage is not None:
+        delta[f"exited.{from_stage.value}"] = 1
+        if seconds_in_stage is not None:
+            delta[f"timed.{from_stage.value}"] = 1
+            delta[f"seconds.{from_stage.value}"] = max(0.0, seconds_in_stage)
+    return delta
+
+
+def deleted_delta(stage: ResponseStage | None) -> Delta:
+    if stage is None:
+        return {}
+    return {f"deleted.{stage.value}": 1}
+
+
+def merge_delta(target: dict[str, dict[str, float]], delta: Delta) -> None:
+    """Fold a flat delta into nested counter groups, as stored."""
+    for path, amount in delta.items():
+        group, stage = path.split(".", 1)
+        counters = target.setdefault(group, {})
+        counters[stage] = counters.get(stage, 0) + amount
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Any, Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchLoad = Callable[[list[K]], Awaitable[dict[K, V]]]
+
+
+class DataLoader(Generic[K, V]):
+    """Coalesces load() calls made in the same event-loop tick into one batch
+    call and memoizes the results for the lifetime of the loader.
+
+    The batch function receives unique keys and returns a mapping; keys it
+    leaves out resolve to None.
+    """
+
+    def __init__(self, batch_load: BatchLoad, *, max_batch_size: int = 1000) -> None:
+        self._batch_load = batch_load
+        self._max_batch_size = max_batch_size
+        self._cache: dict[K, asyncio.Future] = {}
+        self._queue: list[tuple[K, asyncio.Future]] = []
+        # The loop only keeps weak references to tasks.
+        self._batches: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> V | None:
+        future = self._cache.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._cache[key] = future
+            self._queue.append((key, future))
+            if len(self._queue) == 1:
+                asyncio.get_running_loop().call_soon(self._dispatch)
+        return await future
+
+    async def load_many(self, keys: Iterable[K]) -> list[V | None]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: V | None) -> None:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._cache[key] = future
+
+    def clear(self, key: K) -> None:
+        self._cache.pop(key, None)
+
+    def _dispatch(self) -> None:
+        pending, self._queue = self._queue, []
+        for start in range(0, len(pending), self._max_batch_size):
+            batch = dict(pending[start : start + self._max_batch_size])
+            run = asyncio.create_task(self._run(batch))
+            self._batches.add(run)
+            run.add_done_callback(self._batches.discard)
+
+    async def _run(self, futures: dict[K, asyncio.Future]) -> None:
+        try:
+            values = await self._batch_load(list(futures))
+        except Exception as exc:
+            for key, future in futures.items():
+                # Failed keys are forgotten so a later load can retry them.
+                if self._cache.get(key) is future:
+                    self._cache.pop(key)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(values.get(key))
+
+
+def group_by(documents: Iterable[dict[str, Any]], field: str) -> dict[Any, list]:
+    grouped: dict[Any, list] = {}
+    for document in documents:
+        grouped.setdefault(document.get(field), []).append(document)
+    return grouped
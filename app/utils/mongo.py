@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import Any
 
 from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
 
 def serialize_document(document: dict[str, Any]) -> dict[str, Any]:
@@ -14,3 +15,10 @@ def serialize_document(document: dict[str, Any]) -> dict[str, Any]:
         elif isinstance(value, datetime):
             data[key] = value.isoformat()
     return data
+
+
+async def is_replica_set(db: AsyncIOMotorDatabase) -> bool:
+    """Whether the server supports transactions and change streams: a
+    replica set member (a single-node set is enough) or a mongos."""
+    hello = await db.command("hello")
+    return bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
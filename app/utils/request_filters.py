@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+
+def build_request_filters(
+    *,
+    role: str | None = None,
+    grade: str | None = None,
+    work_format: str | None = None,
+    has_deadline: bool | None = None,
+    deadline_after: datetime | None = None,
+    deadline_before: datetime | None = None,
+) -> dict[str, object]:
+    filters: dict[str, object] = {}
+    if role:
+        filters["vacancy.role"] = role
+    if grade:
+        filters["vacancy.grade"] = grade
+    if work_format:
+        filters["vacancy.work_format"] = work_format
+    # has_deadline and deadline_at are derived from the free-text
+    # vacancy.application_deadline by the derived-fields sync; until it
+    # reaches a request, has_deadline falls back to the text being non-blank.
+    if has_deadline is not None:
+        text_present = {"$regex": r"\S"}
+        filters["$or"] = [
+            {"has_deadline": has_deadline},
+            {
+                "has_deadline": {"$exists": False},
+                "vacancy.application_deadline": (
+                    text_present if has_deadline else {"$not": text_present}
+                ),
+            },
+        ]
+    deadline_range: dict[str, datetime] = {}
+    if deadline_after is not None:
+        deadline_range["$gte"] = deadline_after
+    if deadline_before is not None:
+        deadline_range["$lt"] = deadline_before
+    if deadline_range:
+        filters["deadline_at"] = deadline_range
+    return filters
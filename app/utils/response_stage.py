@@ -20,6 +20,14 @@ STAGE_ORDER = [
 
 STAGE_INDEX = {stage: idx + 1 for idx, stage in enumerate(STAGE_ORDER)}
 
+
+def parse_stage(value: object) -> ResponseStage | None:
+    """The stage a stored or audited value names, None for anything else."""
+    try:
+        return ResponseStage(value)
+    except ValueError:
+        return None
+
 ALLOWED_TRANSITIONS = {
     ResponseStage.CV_SELECTED: {
         ResponseStage.CV_SENT,
@@ -127,3 +135,70 @@ def allowed_stages(
     allowed = set(ALLOWED_TRANSITIONS.get(from_stage, set()))
     allowed.discard(from_stage)
     return sorted(allowed, key=lambda stage: STAGE_INDEX[stage])
+
+
+TERMINAL_STAGES = {ResponseStage.CANCELLED_BY_US, ResponseStage.REJECTED}
+NO_MAX_STAGE_CHANGE = {
+    ResponseStage.ON_PROJECT,
+    ResponseStage.CANCELLED_BY_US,
+    ResponseStage.REJECTED,
+}
+_KNOWN_STAGE_VALUES = [stage.value for stage in STAGE_ORDER]
+_MAX_STAGE = {"$ifNull": ["$max_stage", 1]}
+_NO_STAGE = {"$in": [{"$type": "$stage"}, ["missing", "null"]]}
+
+
+def transition_source_filter(to_stage: ResponseStage) -> dict[str, object]:
+    """Query matching every stored (stage, max_stage) from which
+    can_transition() allows a move to to_stage, so the check and the write
+    happen in one conditional update."""
+    to_index = STAGE_INDEX[to_stage]
+    terminal = [stage.value for stage in TERMINAL_STAGES]
+    sources = [
+        stage
+        for stage in STAGE_ORDER
+        if stage not in TERMINAL_STAGES
+        and to_stage in ALLOWED_TRANSITIONS.get(stage, set())
+    ]
+    branches: list[dict[str, object]] = [
+        {"stage": None},
+        {"stage": to_stage.value},
+    ]
+    if sources:
+        branches.append({"stage": {"$in": [stage.value for stage in sources]}})
+    if to_stage == ResponseStage.CV_SELECTED or ResponseStage.CV_SELECTED in sources:
+        # Unknown stored values are read as cv_selected.
+        branches.append({"stage": {"$nin": _KNOWN_STAGE_VALUES}})
+    if to_stage in TERMINAL_STAGES:
+        branches.append({"stage": {"$in": terminal}})
+    else:
+        branches.append(
+            {
+                "stage": {"$in": terminal},
+                "$expr": {"$gte": [_MAX_STAGE, to_index]},
+            }
+        )
+    return {"$or": branches}
+
+
+def next_max_stage_expression(to_stage: ResponseStage) -> object:
+    """Aggregation expression computing the max_stage can_transition()
+    returns, evaluated against the document before the move."""
+    if to_stage in NO_MAX_STAGE_CHANGE:
+        return _MAX_STAGE
+    to_index = STAGE_INDEX[to_stage]
+    return {
+        "$switch": {
+            "branches": [
+                {
+                    "case": {"$or": [_NO_STAGE, {"$eq": ["$stage", to_stage.value]}]},
+                    "then": _MAX_STAGE,
+                },
+                {
+                    "case": {"$in": ["$stage", [stage.value for stage in TERMINAL_STAGES]]},
+                    "then": to_index,
+                },
+            ],
+            "default": {"$max": [_MAX_STAGE, to_index]},
+        }
+    }
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+
+from bson.regex import Regex
+
+CYRILLIC_TO_LATIN = {
+    "а": "a",
+    "б": "b",
+    "в": "v",
+    "г": "g",
+    "д": "d",
+    "е": "e",
+    "ё": "e",
+    "ж": "zh",
+    "з": "z",
+    "и": "i",
+    "й": "y",
+    "к": "k",
+    "л": "l",
+    "м": "m",
+    "н": "n",
+    "о": "o",
+    "п": "p",
+    "р": "r",
+    "с": "s",
+    "т": "t",
+    "у": "u",
+    "ф": "f",
+    "х": "kh",
+    "ц": "ts",
+    "ч": "ch",
+    "ш": "sh",
+    "щ": "shch",
+    "ъ": "",
+    "ы": "y",
+    "ь": "",
+    "э": "e",
+    "ю": "yu",
+    "я": "ya",
+}
+_TRANSLITERATION = str.maketrans(CYRILLIC_TO_LATIN)
+_TOKEN_RE = re.compile(r"\w+")
+MAX_QUERY_TERMS = 8
+
+
+def normalize_text(value: str) -> str:
+    """Lowercase, fold ё/е and accents, and transliterate Cyrillic to Latin.
+
+    Both stored tokens and queries go through this, so "Пётр", "петр" and
+    "Petr" meet at the same canonical form.
+    """
+    lowered = value.lower().translate(_TRANSLITERATION)
+    decomposed = unicodedata.normalize("NFKD", lowered)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.replace("x", "ks")
+
+
+def tokenize(value: str | None) -> list[str]:
+    if not value:
+        return []
+    return _TOKEN_RE.findall(normalize_text(value))
+
+
+def _unique(tokens: list[str]) -> list[str]:
+    return list(dict.fromkeys(tokens))
+
+
+def trigrams(value: str | None) -> list[str]:
+    """pg_trgm-style trigrams: each word padded with two leading spaces and
+    one trailing space, over the normalized (transliterated) form."""
+    grams: list[str] = []
+    for word in tokenize(value):
+        padded = f"  {word} "
+        grams.extend(padded[index : index + 3] for index in range(len(padded) - 2))
+    return _unique(grams)
+
+
+def developer_search_fields(developer: dict) -> dict[str, object]:
+    stack = developer.get("stack") or {}
+    stack_values = [*(stack.get("core") or []), *(stack.get("additional") or [])]
+    name_tokens = _unique(tokenize(developer.get("full_name")))
+    role_tokens = _unique(tokenize(developer.get("role")))
+    stack_tokens = _unique(
+        [token for value in stack_values if isinstance(value, str) for token in tokenize(value)]
+    )
+    return {
+        "search": {
+            "name": name_tokens,
+            "role": role_tokens,
+            "stack": stack_tokens,
+        },
+        "search_tokens": _unique([*name_tokens, *role_tokens, *stack_tokens]),
+        "name_trigrams": trigrams(developer.get("full_name")),
+    }
+
+
+def request_search_fields(request: dict) -> dict[str, object]:
+    return {"name_trigrams": trigrams(request.get("name"))}
+
+
+def query_terms(query: str) -> list[str]:
+    return _unique(tokenize(query))[:MAX_QUERY_TERMS]
+
+
+def prefix_match_filter(terms: list[str]) -> dict[str, object]:
+    """Every term must prefix some stored token; anchored regexes on the
+    multikey search_tokens index become index range scans."""
+    return {
+        "search_tokens": {
+            "$all": [Regex(f"^{re.escape(term)}") for term in terms],
+        }
+    }
+
+
+def _prefix_hit(field_path: str, term: str) -> dict[str, object]:
+    return {
+        "$anyElementTrue": [
+            {
+                "$map": {
+                    "input": {"$ifNull": [field_path, []]},
+                    "as": "token",
+                    "in": {"$eq": [{"$indexOfBytes": ["$$token", term]}, 0]},
+                }
+            }
+        ]
+    }
+
+
+def prefix_score_expression(
+    terms: list[str],
+    weights: dict[str, float],
+) -> dict[str, object]:
+    """Sum, per term, the weight of the best field it prefixes; exact token
+    matches on a field score one extra point."""
+    per_term = []
+    for term in terms:
+        field_scores = []
+        for field_path, weight in weights.items():
+            field_scores.append({"$cond": [_prefix_hit(field_path, term), weight, 0]})
+            field_scores.append(
+                {"$cond": [{"$in": [term, {"$ifNull": [field_path, []]}]}, 1, 0]}
+            )
+        per_term.append({"$max": field_scores[0::2]})
+        per_term.append({"$max": field_scores[1::2]})
+    return {"$add": per_term}
+
+
+def text_search_query(query: str) -> str:
+    """$text terms for the original words plus their transliterated forms."""
+    words = _TOKEN_RE.findall(query.lower())[:MAX_QUERY_TERMS]
+    variants = [*words, *(normalize_text(word) for word in words)]
+    return " ".join(_unique(variants))
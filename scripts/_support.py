@@ -0,0 +1,373 @@
+"""Shared helpers for the benchmark and diagnostics scripts.
+
+Everything here works against a throwaway database on the MongoDB configured
+in settings; scripts drop that database when they finish unless asked not to.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from app.core.config import settings  # noqa: E402
+from app.models.collections import (  # noqa: E402
+    CANDIDATES_COLLECTION,
+    DEVELOPERS_COLLECTION,
+    REQUESTS_COLLECTION,
+    RESPONSES_COLLECTION,
+)
+from app.schemas.request_status import RequestStatus  # noqa: E402
+from app.schemas.response_stage import ResponseStage  # noqa: E402
+from app.utils.response_stage import STAGE_INDEX  # noqa: E402
+
+ROLES = ["backend", "frontend", "qa", "devops", "analyst", "mobile"]
+GRADES = ["junior", "middle", "senior", "team_lead"]
+WORK_FORMATS = ["remote", "hybrid", "office"]
+FIRST_NAMES = ["Иван", "Пётр", "Анна", "Мария", "Alex", "Sergey", "Olga", "Дмитрий"]
+LAST_NAMES = ["Иванов", "Петрова", "Smirnov", "Кузнецов", "Popova", "Соколов"]
+BATCH_SIZE = 1000
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--db",
+        default=f"{settings.mongodb_db}_bench",
+        help="Throwaway database to seed (dropped afterwards).",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the seeded database after the run.",
+    )
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Records every command sent to one database, tagged with the probe
+    that was running when it was issued."""
+
+    def __init__(self, database_name: str) -> None:
+        self.database_name = database_name
+        self.label: str | None = None
+        self.commands: list[tuple[str, str, dict]] = []
+
+    @contextmanager
+    def probe(self, label: str) -> Iterator[None]:
+        self.label = label
+        try:
+            yield
+        finally:
+            self.label = None
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if self.label is None or event.database_name != self.database_name:
+            return
+        self.commands.append((self.label, event.command_name, dict(event.command)))
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        return None
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        return None
+
+
+class DelayListener(monitoring.CommandListener):
+    """Injects a fixed delay before every command, simulating network latency.
+
+    Listeners run on the driver's worker thread, so commands issued
+    concurrently overlap their delays just as they would on a real network.
+    """
+
+    def __init__(self, delay_seconds: float) -> None:
+        self.delay_seconds = delay_seconds
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        return None
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        return None
+
+
+EXPLAINABLE_COMMANDS = {
+    "find",
+    "aggregate",
+    "count",
+    "distinct",
+    "findAndModify",
+    "update",
+    "delete",
+}
+_SESSION_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction"}
+
+
+def explainable(command: dict) -> dict:
+    return {
+        key: value
+        for key, value in command.items()
+        if not key.startswith("$") and key not in _SESSION_FIELDS
+    }
+
+
+async def explain(db: AsyncIOMotorDatabase, command: dict) -> dict:
+    return await db.command(
+        {"explain": explainable(command), "verbosity": "executionStats"}
+    )
+
+
+def collection_scans(plan: object) -> int:
+    """Count COLLSCAN stages anywhere in an explain document, including the
+    per-$lookup collectionScans counters of aggregation explains."""
+    if isinstance(plan, dict):
+        total = 1 if plan.get("stage") == "COLLSCAN" else 0
+        scans = plan.get("collectionScans")
+        if isinstance(scans, int):
+            total += scans
+        return total + sum(collection_scans(value) for value in plan.values())
+    if isinstance(plan, list):
+        return sum(collection_scans(value) for value in plan)
+    return 0
+
+
+INDEX_STAGES = {
+    "IXSCAN",
+    "EXPRESS_IXSCAN",
+    "IDHACK",
+    "EXPRESS_IDHACK",
+    "COUNT_SCAN",
+    "DISTINCT_SCAN",
+    "TEXT_MATCH",
+    "RECORD_STORE_FAST_COUNT",
+}
+
+
+def plan_stages(plan: object) -> set[str]:
+    if isinstance(plan, dict):
+        stages = {plan["stage"]} if isinstance(plan.get("stage"), str) else set()
+        for value in plan.values():
+            stages |= plan_stages(value)
+        return stages
+    if isinstance(plan, list):
+        return set().union(*(plan_stages(value) for value in plan)) if plan else set()
+    return set()
+
+
+def _first_execution_stats(plan: object) -> dict | None:
+    if isinstance(plan, dict):
+        if isinstance(plan.get("executionStats"), dict):
+            return plan["executionStats"]
+        values = list(plan.values())
+    elif isinstance(plan, list):
+        values = plan
+    else:
+        return None
+    for value in values:
+        found = _first_execution_stats(value)
+        if found is not None:
+            return found
+    return None
+
+
+def _sum_field(plan: object, name: str) -> int:
+    if isinstance(plan, dict):
+        own = plan.get(name)
+        total = own if isinstance(own, int) else 0
+        return total + sum(_sum_field(value, name) for value in plan.values())
+    if isinstance(plan, list):
+        return sum(_sum_field(value, name) for value in plan)
+    return 0
+
+
+def execution_totals(plan: dict) -> dict[str, int]:
+    """Keys and documents examined across the query and every $lookup, and
+    the documents returned by the query stage."""
+    stats = _first_execution_stats(plan) or {}
+    return {
+        "keys_examined": _sum_field(plan, "totalKeysExamined"),
+        "docs_examined": _sum_field(plan, "totalDocsExamined"),
+        "returned": int(stats.get("nReturned") or 0),
+    }
+
+
+def open_database(
+    name: str,
+    **client_kwargs: object,
+) -> tuple[AsyncIOMotorClient, AsyncIOMotorDatabase]:
+    client = AsyncIOMotorClient(settings.mongodb_uri, **client_kwargs)
+    return client, client[name]
+
+
+async def _insert_batched(
+    db: AsyncIOMotorDatabase,
+    collection_name: str,
+    documents: list[dict],
+) -> None:
+    for start in range(0, len(documents), BATCH_SIZE):
+        chunk = documents[start : start + BATCH_SIZE]
+        if chunk:
+            await db[collection_name].insert_many(chunk, ordered=False)
+
+
+def _random_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+async def seed_developers(
+    db: AsyncIOMotorDatabase,
+    *,
+    count: int,
+    rng: random.Random,
+    resume_size: int = 4000,
+) -> list[ObjectId]:
+    now = datetime.now(timezone.utc)
+    developers = []
+    for index in range(count):
+        created_at = now - timedelta(minutes=index)
+        developers.append(
+            {
+                "_id": ObjectId(),
+                "full_name": _random_name(rng),
+                "role": rng.choice(ROLES),
+                "grade": rng.choice(GRADES),
+                "work_format": rng.choice(WORK_FORMATS),
+                "status": "доступен",
+                "experience_years": float(rng.randint(0, 15)),
+                "stack": {"core": ["python", "mongodb"], "additional": ["redis"]},
+                "parsing_status": "accepted",
+                "resume_path": f"uploads/{index}.pdf",
+                "resume_text": "x" * resume_size,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+        )
+    await _insert_batched(db, DEVELOPERS_COLLECTION, developers)
+    return [developer["_id"] for developer in developers]
+
+
+async def seed_requests(
+    db: AsyncIOMotorDatabase,
+    *,
+    count: int,
+    rng: random.Random,
+) -> list[ObjectId]:
+    now = datetime.now(timezone.utc)
+    statuses = [status.value for status in RequestStatus]
+    requests = []
+    for index in range(count):
+        created_at = now - timedelta(minutes=index)
+        deadline = "" if rng.random() < 0.5 else f"{rng.randint(1, 28):02d}.12.2026"
+        requests.append(
+            {
+                "_id": ObjectId(),
+                "name": f"Заявка {index}",
+                "status": rng.choice(statuses),
+                "vacancy": {
+                    "role": rng.choice(ROLES),
+                    "grade": rng.choice(GRADES),
+                    "work_format": rng.choice(WORK_FORMATS),
+                    "rate": f"{rng.randint(1, 5) * 1000}",
+                    "application_deadline": deadline,
+                },
+                "meta": {"source": "telegram"},
+                "raw_text": "y" * 2000,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+        )
+    await _insert_batched(db, REQUESTS_COLLECTION, requests)
+    return [request["_id"] for request in requests]
+
+
+async def seed_candidates_and_responses(
+    db: AsyncIOMotorDatabase,
+    *,
+    request_ids: list[ObjectId],
+    developer_ids: list[ObjectId],
+    candidates_per_request: int,
+    responses_per_request: int,
+    rng: random.Random,
+) -> None:
+    now = datetime.now(timezone.utc)
+    stages = list(ResponseStage)
+    candidates = []
+    responses = []
+    for request_id in request_ids:
+        picked = rng.sample(
+            developer_ids,
+            min(len(developer_ids), candidates_per_request),
+        )
+        for developer_id in picked:
+            candidates.append(
+                {
+                    "request_id": str(request_id),
+                    "developer_id": str(developer_id),
+                    "score": rng.random(),
+                    "description": {"summary": "z" * 500},
+                    "created_at": now,
+                }
+            )
+        for developer_id in picked[:responses_per_request]:
+            stage = rng.choice(stages)
+            responses.append(
+                {
+                    "request_id": str(request_id),
+                    "developer_id": str(developer_id),
+                    "rate": "1000",
+                    "stage": stage.value,
+                    "max_stage": STAGE_INDEX[stage],
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+    await _insert_batched(db, CANDIDATES_COLLECTION, candidates)
+    await _insert_batched(db, RESPONSES_COLLECTION, responses)
+
+
+async def measure(
+    func: Callable[[], Awaitable[object]],
+    *,
+    repeat: int,
+    warmup: int = 2,
+) -> dict[str, float]:
+    for _ in range(warmup):
+        await func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95_index = max(0, int(round(len(samples) * 0.95)) - 1)
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[p95_index],
+        "min_ms": samples[0],
+    }
+
+
+def print_results(results: dict[str, dict[str, float]]) -> None:
+    width = max(len(name) for name in results)
+    print(f"{'variant'.ljust(width)}  median_ms    p95_ms    min_ms")
+    for name, stats in results.items():
+        print(
+            f"{name.ljust(width)}  "
+            f"{stats['median_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['min_ms']:9.2f}"
+        )
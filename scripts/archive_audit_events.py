@@ -0,0 +1,65 @@
+"""Move audit events older than N days out of audit_events.
+
+Usage: python scripts/archive_audit_events.py --days 180 [--target files --dir archive/audit] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.clients.mongo import mongo_client  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.audit_archive import (  # noqa: E402
+    ARCHIVE_TARGETS,
+    archive_audit_events,
+)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    db = mongo_client.connect()
+    try:
+        return await archive_audit_events(
+            db,
+            older_than_days=args.days,
+            target=args.target,
+            archive_dir=args.dir,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+        )
+    finally:
+        await mongo_client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=settings.audit_archive_after_days or 180,
+        help="Archive events older than this many days.",
+    )
+    parser.add_argument(
+        "--target",
+        choices=ARCHIVE_TARGETS,
+        default=settings.audit_archive_target,
+    )
+    parser.add_argument("--dir", default=settings.audit_archive_dir)
+    parser.add_argument("--batch-size", type=int, default=settings.audit_archive_batch_size)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only count the events that would be archived.",
+    )
+    args = parser.parse_args()
+    moved = asyncio.run(_run(args))
+    verb = "would archive" if args.dry_run else "archived"
+    print(f"{verb} {moved} audit events")
+
+
+if __name__ == "__main__":
+    main()
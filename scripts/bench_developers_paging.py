@@ -0,0 +1,112 @@
+"""Time a deep page of GET /developers: skip/limit with full documents
+versus the keyset cursor with the list projection.
+
+Usage: python scripts/bench_developers_paging.py --developers 25000 --page 1000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import random
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.repositories.developer import (  # noqa: E402
+    DEVELOPER_LIST_PROJECTION,
+    DEVELOPER_LIST_SORT,
+    DeveloperRepository,
+)
+from app.utils.mongo import serialize_document  # noqa: E402
+from scripts._support import (  # noqa: E402
+    add_common_arguments,
+    measure,
+    open_database,
+    print_results,
+    seed_developers,
+)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    client, db = open_database(args.db)
+    rng = random.Random(args.seed)
+    try:
+        await client.drop_database(args.db)
+        repo = DeveloperRepository(db)
+        await repo.ensure_indexes()
+        await seed_developers(db, count=args.developers, rng=rng)
+
+        skip = (args.page - 1) * args.size
+        previous = await db["developers"].find_one(
+            {},
+            {"created_at": 1},
+            sort=DEVELOPER_LIST_SORT,
+            skip=skip - 1,
+        )
+        if previous is None:
+            raise SystemExit("Not enough developers for the requested page")
+        after = repo.after_cursor_filter(previous["created_at"], previous["_id"])
+
+        async def offset_full() -> None:
+            cursor = (
+                db["developers"]
+                .find({})
+                .sort(DEVELOPER_LIST_SORT)
+                .skip(skip)
+                .limit(args.size)
+            )
+            [serialize_document(doc) async for doc in cursor]
+
+        async def offset_projected() -> None:
+            await repo.list(
+                skip=skip,
+                limit=args.size,
+                sort=DEVELOPER_LIST_SORT,
+                projection=DEVELOPER_LIST_PROJECTION,
+            )
+
+        async def keyset_projected() -> None:
+            await repo.list(
+                limit=args.size,
+                sort=DEVELOPER_LIST_SORT,
+                filters=after,
+                projection=DEVELOPER_LIST_PROJECTION,
+            )
+
+        offset_ids = [
+            item["id"]
+            for item in await repo.list(skip=skip, limit=args.size, sort=DEVELOPER_LIST_SORT)
+        ]
+        keyset_ids = [
+            item["id"]
+            for item in await repo.list(limit=args.size, sort=DEVELOPER_LIST_SORT, filters=after)
+        ]
+        if offset_ids != keyset_ids:
+            raise SystemExit("Keyset page differs from the offset page")
+
+        results = {
+            "offset, full documents": await measure(offset_full, repeat=args.repeat),
+            "offset, projected": await measure(offset_projected, repeat=args.repeat),
+            "cursor, projected": await measure(keyset_projected, repeat=args.repeat),
+        }
+        print(f"developers={args.developers} page={args.page} size={args.size}")
+        print_results(results)
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_common_arguments(parser)
+    parser.add_argument("--developers", type=int, default=25000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=20)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Compare the aggregation-based GET /kanban and the kanban_cards read model
+against the previous four-scan path.
+
+Usage: python scripts/bench_kanban.py --requests 3000 --candidates 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import random
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from bson import ObjectId  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorDatabase  # noqa: E402
+
+from app.repositories.candidate import CandidateRepository  # noqa: E402
+from app.repositories.response import ResponseRepository  # noqa: E402
+from app.schemas.kanban import KanbanResponse  # noqa: E402
+from app.schemas.response_stage import ResponseStage  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.kanban import (  # noqa: E402
+    KANBAN_STATUSES,
+    get_kanban,
+    rebuild_kanban_cards,
+)
+from app.utils.mongo import serialize_document  # noqa: E402
+from app.utils.response_stage import STAGE_INDEX, allowed_stages  # noqa: E402
+from scripts._support import (  # noqa: E402
+    add_common_arguments,
+    measure,
+    open_database,
+    print_results,
+    seed_candidates_and_responses,
+    seed_developers,
+    seed_requests,
+)
+
+
+async def legacy_get_kanban(db: AsyncIOMotorDatabase) -> KanbanResponse:
+    """The pre-aggregation implementation, kept here as the baseline."""
+    filters = {"status": {"$in": KANBAN_STATUSES}}
+    requests_by_id: dict[str, dict] = {}
+    async for request in db["requests"].find(filters).sort("created_at", -1):
+        requests_by_id[str(request.get("_id"))] = request
+    if not requests_by_id:
+        return KanbanResponse(requests=[])
+
+    with_candidates: set[str] = set()
+    async for candidate in db["candidates"].find(
+        {"request_id": {"$in": list(requests_by_id)}}
+    ):
+        with_candidates.add(candidate.get("request_id"))
+    if not with_candidates:
+        return KanbanResponse(requests=[])
+
+    responses = [
+        serialize_document(doc)
+        async for doc in db["responses"].find(
+            {"request_id": {"$in": list(with_candidates)}}
+        )
+    ]
+    developer_ids = {ObjectId(item["developer_id"]) for item in responses}
+    developers = {
+        str(doc["_id"]): doc
+        async for doc in db["developers"].find({"_id": {"$in": list(developer_ids)}})
+    }
+
+    items: dict[str, dict] = {}
+    for request_id, request in requests_by_id.items():
+        if request_id not in with_candidates:
+            continue
+        vacancy = request.get("vacancy") or {}
+        items[request_id] = {
+            "id": request_id,
+            "name": request.get("name"),
+            "status": request.get("status"),
+            "rate": vacancy.get("rate"),
+            "application_deadline": vacancy.get("application_deadline"),
+            "updated_at": request.get("updated_at"),
+            "responses_by_stage": {stage: [] for stage in ResponseStage},
+        }
+    for response in responses:
+        item = items.get(response.get("request_id"))
+        if not item:
+            continue
+        developer = developers.get(response.get("developer_id")) or {}
+        stage = ResponseStage(response.get("stage"))
+        item["responses_by_stage"][stage].append(
+            {
+                "id": response["id"],
+                "developer_id": response["developer_id"],
+                "developer_full_name": developer.get("full_name") or "",
+                "rate": response.get("rate"),
+                "developer_role": developer.get("role"),
+                "updated_at": response.get("updated_at"),
+                "allowed_stages": allowed_stages(
+                    stage,
+                    int(response.get("max_stage") or STAGE_INDEX.get(stage, 1)),
+                ),
+            }
+        )
+    return KanbanResponse(requests=list(items.values()))
+
+
+async def _run(args: argparse.Namespace) -> None:
+    client, db = open_database(args.db)
+    rng = random.Random(args.seed)
+    try:
+        await client.drop_database(args.db)
+        await CandidateRepository(db).ensure_indexes()
+        await ResponseRepository(db).ensure_indexes()
+        developer_ids = await seed_developers(db, count=args.developers, rng=rng)
+        request_ids = await seed_requests(db, count=args.requests, rng=rng)
+        await seed_candidates_and_responses(
+            db,
+            request_ids=request_ids,
+            developer_ids=developer_ids,
+            candidates_per_request=args.candidates,
+            responses_per_request=args.responses,
+            rng=rng,
+        )
+
+        await rebuild_kanban_cards(db)
+
+        async def kanban(read_model: bool) -> KanbanResponse:
+            previous = settings.kanban_read_model
+            settings.kanban_read_model = read_model
+            try:
+                return await get_kanban(db)
+            finally:
+                settings.kanban_read_model = previous
+
+        legacy = await legacy_get_kanban(db)
+        current = await kanban(False)
+        if legacy.model_dump() != current.model_dump():
+            raise SystemExit("Aggregation result differs from the legacy path")
+        if (await kanban(True)).model_dump() != current.model_dump():
+            raise SystemExit("Read model differs from the aggregation")
+
+        results = {
+            "legacy (4 scans)": await measure(
+                lambda: legacy_get_kanban(db), repeat=args.repeat
+            ),
+            "aggregation": await measure(lambda: kanban(False), repeat=args.repeat),
+            "read model": await measure(lambda: kanban(True), repeat=args.repeat),
+        }
+        print(
+            f"requests={args.requests} candidates/request={args.candidates} "
+            f"responses/request={args.responses} cards={len(current.requests)}"
+        )
+        print_results(results)
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_common_arguments(parser)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--developers", type=int, default=5000)
+    parser.add_argument("--candidates", type=int, default=10)
+    parser.add_argument("--responses", type=int, default=4)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Time the response create/detail lookups run one after another versus
+concurrently, with an artificial per-command network delay.
+
+Usage: python scripts/bench_response_paths.py --delay-ms 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import random
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from bson import ObjectId  # noqa: E402
+
+from app.models.collections import (  # noqa: E402
+    DEVELOPERS_COLLECTION,
+    REQUESTS_COLLECTION,
+    RESPONSES_COLLECTION,
+)
+from app.repositories.indexes import reconcile_indexes  # noqa: E402
+from app.repositories.response import ResponseRepository  # noqa: E402
+from app.services.loaders import Loaders  # noqa: E402
+from app.services.responses import get_response_detail  # noqa: E402
+from app.utils.concurrency import run_concurrently  # noqa: E402
+from scripts._support import (  # noqa: E402
+    DelayListener,
+    add_common_arguments,
+    measure,
+    open_database,
+    print_results,
+    seed_candidates_and_responses,
+    seed_developers,
+    seed_requests,
+)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    delay = DelayListener(0)
+    client, db = open_database(args.db, event_listeners=[delay])
+    rng = random.Random(args.seed)
+    try:
+        await client.drop_database(args.db)
+        developer_ids = await seed_developers(db, count=200, rng=rng)
+        request_ids = await seed_requests(db, count=50, rng=rng)
+        await seed_candidates_and_responses(
+            db,
+            request_ids=request_ids,
+            developer_ids=developer_ids,
+            candidates_per_request=10,
+            responses_per_request=3,
+            rng=rng,
+        )
+        await reconcile_indexes(db)
+        response = await db[RESPONSES_COLLECTION].find_one({})
+        response_id = str(response["_id"])
+        request_oid = ObjectId(response["request_id"])
+        developer_oid = ObjectId(response["developer_id"])
+        repo = ResponseRepository(db)
+
+        async def detail_sequential() -> None:
+            loaders = Loaders(db)
+            document = await repo.get_by_id(response_id)
+            request_id = document["request_id"]
+            developer_id = document["developer_id"]
+            await loaders.requests.load(request_id)
+            await loaders.developers.load(developer_id)
+            await loaders.candidates.load((request_id, developer_id))
+
+        async def detail_concurrent() -> None:
+            await get_response_detail(db, response_id=response_id, loaders=Loaders(db))
+
+        async def create_lookups_sequential() -> None:
+            await db[REQUESTS_COLLECTION].find_one({"_id": request_oid}, {"_id": 1})
+            await db[DEVELOPERS_COLLECTION].find_one({"_id": developer_oid}, {"status": 1})
+
+        async def create_lookups_concurrent() -> None:
+            await run_concurrently(
+                db[REQUESTS_COLLECTION].find_one({"_id": request_oid}, {"_id": 1}),
+                db[DEVELOPERS_COLLECTION].find_one({"_id": developer_oid}, {"status": 1}),
+            )
+
+        delay.delay_seconds = args.delay_ms / 1000
+        results = {
+            "detail sequential": await measure(detail_sequential, repeat=args.repeat),
+            "detail concurrent": await measure(detail_concurrent, repeat=args.repeat),
+            "create lookups sequential": await measure(
+                create_lookups_sequential, repeat=args.repeat
+            ),
+            "create lookups concurrent": await measure(
+                create_lookups_concurrent, repeat=args.repeat
+            ),
+        }
+        print(f"injected delay: {args.delay_ms} ms per command")
+        print_results(results)
+    finally:
+        delay.delay_seconds = 0
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_common_arguments(parser)
+    parser.add_argument("--delay-ms", type=float, default=5)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
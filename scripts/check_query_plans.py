@@ -0,0 +1,344 @@
+"""Query-plan regression check for the repositories and the services.
+
+Seeds a synthetic dataset in a throwaway database, reconciles the declared
+indexes, runs the BaseRepository methods and the service calls behind the
+endpoints while recording the commands they send, and explains each of them
+with executionStats. A command fails when its plan scans a collection
+(including the inner side of a $lookup), uses no index, or examines more
+keys/documents per returned document than its budget allows. Everything is
+written to a JSON report; the exit status is 1 if anything failed.
+
+Usage: python scripts/check_query_plans.py --report query_plans.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import random
+import sys
+
+from bson import ObjectId
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.core.config import settings  # noqa: E402
+from app.models.collections import (  # noqa: E402
+    DEVELOPERS_COLLECTION,
+    RESPONSES_COLLECTION,
+)
+from app.repositories.developer import (  # noqa: E402
+    DEVELOPER_LIST_PROJECTION,
+    DEVELOPER_LIST_SORT,
+    DeveloperRepository,
+)
+from app.repositories.indexes import reconcile_indexes  # noqa: E402
+from app.repositories.request import RequestRepository  # noqa: E402
+from app.repositories.response import ResponseRepository  # noqa: E402
+from app.schemas.response import ResponseCreatePayload  # noqa: E402
+from app.services.audit_history import (  # noqa: E402
+    get_response_stage_durations,
+    list_audit_events,
+)
+from app.services.derived_fields import sync_derived_fields  # noqa: E402
+from app.services.developers import list_developers, lookup_developers  # noqa: E402
+from app.services.kanban import get_kanban, rebuild_kanban_cards  # noqa: E402
+from app.services.requests import (  # noqa: E402
+    get_request_by_id,
+    list_request_candidates,
+    list_requests,
+    lookup_requests,
+)
+from app.services.responses import create_response, get_response_detail  # noqa: E402
+from app.utils.search import trigrams  # noqa: E402
+from scripts._support import (  # noqa: E402
+    EXPLAINABLE_COMMANDS,
+    INDEX_STAGES,
+    CommandRecorder,
+    add_common_arguments,
+    collection_scans,
+    execution_totals,
+    explain,
+    open_database,
+    plan_stages,
+    seed_candidates_and_responses,
+    seed_developers,
+    seed_requests,
+)
+
+Probe = Callable[[], Awaitable[object]]
+
+# Examined keys or documents per returned document. Ranked searches have to
+# score every match before they can cut the page, so they get more room.
+DEFAULT_RATIO_BUDGET = 10.0
+RATIO_BUDGETS = {
+    "developers (q)": 100.0,
+    "developers (q, in_resume)": 100.0,
+    "developers lookup": 200.0,
+    "requests lookup": 200.0,
+    "repo.similar_by_trigrams": 200.0,
+}
+
+
+def _is_aggregate_count(command_name: str, command: dict) -> bool:
+    """count_documents and friends examine every match by definition."""
+    if command_name in {"count", "distinct"}:
+        return True
+    if command_name != "aggregate":
+        return False
+    stages = {next(iter(stage)) for stage in command.get("pipeline") or []}
+    return bool(stages & {"$group", "$count"}) and "$limit" not in stages
+
+
+def _probes(
+    db,
+    *,
+    request_id: str,
+    response_id: str,
+    free_developer_id: str,
+) -> dict[str, Probe]:
+    developer_page = {
+        "page": 1,
+        "size": 20,
+        "offset": None,
+        "q": None,
+        "role": None,
+        "grade": None,
+        "work_format": None,
+    }
+    audit_page = {"created_after": None, "created_before": None, "size": 20}
+    developers = DeveloperRepository(db)
+    responses = ResponseRepository(db)
+
+    async def kanban(read_model: bool, **filters: object) -> None:
+        previous = settings.kanban_read_model
+        settings.kanban_read_model = read_model
+        try:
+            await get_kanban(db, **filters)
+        finally:
+            settings.kanban_read_model = previous
+
+    async def requests_next_page() -> None:
+        first = await list_requests(db, size=20)
+        await list_requests(db, size=20, cursor=first.next_cursor)
+
+    async def request_candidates_next_page() -> None:
+        first = await list_request_candidates(
+            db, request_id=request_id, size=5, include_description=False
+        )
+        await list_request_candidates(
+            db,
+            request_id=request_id,
+            size=5,
+            cursor=first.next_cursor,
+            include_description=False,
+        )
+
+    async def developers_next_page() -> None:
+        first = await list_developers(db, **developer_page)
+        await list_developers(db, **developer_page, cursor=first.next_cursor)
+
+    async def repository_writes() -> None:
+        created = await responses.create(
+            {"request_id": request_id, "developer_id": "scratch", "rate": "1"}
+        )
+        await responses.update_by_id(created["id"], {"rate": "2"})
+        await responses.delete_by_id(created["id"])
+
+    return {
+        "repo.get_by_id": lambda: developers.get_by_id(free_developer_id),
+        "repo.list": lambda: developers.list(
+            limit=20,
+            sort=DEVELOPER_LIST_SORT,
+            filters={"role": "backend"},
+            projection=DEVELOPER_LIST_PROJECTION,
+        ),
+        "repo.count": lambda: developers.count({"role": "backend", "grade": "senior"}),
+        "repo.estimated_count": developers.estimated_count,
+        "repo.similar_by_trigrams": lambda: developers.similar_by_trigrams(
+            trigrams("Ivanov"),
+            threshold=settings.fuzzy_similarity_threshold,
+            limit=10,
+            projection={"full_name": 1},
+        ),
+        "repo.create/update/delete": repository_writes,
+        "repo.get_request_by_id": lambda: RequestRepository(db).get_request_by_id(
+            request_id
+        ),
+        "kanban (read model)": lambda: kanban(True),
+        "kanban (read model, role)": lambda: kanban(True, role="backend"),
+        "kanban (aggregation)": lambda: kanban(False),
+        "kanban (aggregation, role+deadline)": lambda: kanban(
+            False, role="backend", has_deadline=True
+        ),
+        "requests": lambda: list_requests(db),
+        "requests (cursor)": requests_next_page,
+        "requests (role)": lambda: list_requests(db, role="qa"),
+        "requests (grade)": lambda: list_requests(db, grade="senior"),
+        "requests (work_format)": lambda: list_requests(db, work_format="remote"),
+        "requests (has_deadline)": lambda: list_requests(db, has_deadline=True),
+        "requests (deadline range)": lambda: list_requests(
+            db,
+            deadline_after=datetime(2026, 12, 1, tzinfo=timezone.utc),
+            deadline_before=datetime(2026, 12, 8, tzinfo=timezone.utc),
+            sort="deadline",
+        ),
+        "requests (deadline sort)": lambda: list_requests(db, sort="deadline"),
+        "request detail": lambda: get_request_by_id(db, request_id=request_id),
+        "request candidates (cursor)": request_candidates_next_page,
+        "requests lookup": lambda: lookup_requests(db, q="zayavka 1", limit=10),
+        "developers": lambda: list_developers(db, **developer_page),
+        "developers (cursor)": developers_next_page,
+        "developers (role+grade)": lambda: list_developers(
+            db, **{**developer_page, "role": "backend", "grade": "senior"}
+        ),
+        "developers (work_format)": lambda: list_developers(
+            db, **{**developer_page, "work_format": "remote"}
+        ),
+        "developers (q)": lambda: list_developers(
+            db, **{**developer_page, "q": "ivan python"}
+        ),
+        "developers (q, in_resume)": lambda: list_developers(
+            db, **{**developer_page, "q": "python"}, in_resume=True
+        ),
+        "developers lookup": lambda: lookup_developers(db, q="Ivanof", limit=10),
+        "response detail": lambda: get_response_detail(db, response_id=response_id),
+        "create response": lambda: create_response(
+            db,
+            payload=ResponseCreatePayload(
+                request_id=request_id,
+                developer_id=free_developer_id,
+                rate="1000",
+            ),
+        ),
+        "audit history (entity)": lambda: list_audit_events(
+            db, **audit_page, entity_type="response", entity_id=response_id, action=None
+        ),
+        "audit history (action)": lambda: list_audit_events(
+            db, **audit_page, entity_type=None, entity_id=None, action="response_created"
+        ),
+        "response stage durations": lambda: get_response_stage_durations(
+            db, response_id=response_id
+        ),
+    }
+
+
+def _check(label: str, command_name: str, command: dict, plan: dict) -> dict:
+    totals = execution_totals(plan)
+    stages = plan_stages(plan)
+    scans = collection_scans(plan)
+    index_used = bool(stages & INDEX_STAGES) or "EOF" in stages
+    ratio = max(totals["keys_examined"], totals["docs_examined"]) / max(
+        totals["returned"], 1
+    )
+    budget = None
+    if not _is_aggregate_count(command_name, command):
+        budget = RATIO_BUDGETS.get(label, DEFAULT_RATIO_BUDGET)
+    failures = []
+    if scans:
+        failures.append(f"{scans} collection scan(s)")
+    if not index_used:
+        failures.append("no index used")
+    if budget is not None and ratio > budget:
+        failures.append(f"examined/returned {ratio:.1f} > {budget:.0f}")
+    return {
+        "probe": label,
+        "command": command_name,
+        "collection": command.get(command_name),
+        "stages": sorted(stages),
+        "collection_scans": scans,
+        **totals,
+        "ratio": round(ratio, 2),
+        "budget": budget,
+        "failures": failures,
+    }
+
+
+async def _seed(db, args: argparse.Namespace) -> dict[str, str]:
+    rng = random.Random(args.seed)
+    developer_ids = await seed_developers(db, count=args.developers, rng=rng)
+    request_ids = await seed_requests(db, count=args.requests, rng=rng)
+    await seed_candidates_and_responses(
+        db,
+        request_ids=request_ids,
+        developer_ids=developer_ids,
+        candidates_per_request=10,
+        responses_per_request=3,
+        rng=rng,
+    )
+    now = datetime.now(timezone.utc)
+    free_developer = await db[DEVELOPERS_COLLECTION].insert_one(
+        {
+            "_id": ObjectId(),
+            "full_name": "Probe Developer",
+            "status": "доступен",
+            "created_at": now,
+            "updated_at": now,
+        }
+    )
+    await sync_derived_fields(db)
+    await reconcile_indexes(db)
+    await rebuild_kanban_cards(db)
+    response = await db[RESPONSES_COLLECTION].find_one({}, {"_id": 1})
+    return {
+        "request_id": str(request_ids[0]),
+        "response_id": str(response["_id"]),
+        "free_developer_id": str(free_developer.inserted_id),
+    }
+
+
+async def _run(args: argparse.Namespace) -> int:
+    recorder = CommandRecorder(args.db)
+    client, db = open_database(args.db, event_listeners=[recorder])
+    try:
+        await client.drop_database(args.db)
+        ids = await _seed(db, args)
+        for label, probe in _probes(db, **ids).items():
+            with recorder.probe(label):
+                await probe()
+
+        results = []
+        for label, command_name, command in recorder.commands:
+            if command_name not in EXPLAINABLE_COMMANDS:
+                continue
+            result = _check(label, command_name, command, await explain(db, command))
+            results.append(result)
+            status = "FAIL" if result["failures"] else "ok"
+            print(
+                f"{status:4}  {label}: {command_name} {result['collection']} "
+                f"keys={result['keys_examined']} docs={result['docs_examined']} "
+                f"returned={result['returned']} {'; '.join(result['failures'])}"
+            )
+        failed = sum(bool(result["failures"]) for result in results)
+        report = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "dataset": {"developers": args.developers, "requests": args.requests},
+            "checked": len(results),
+            "failed": failed,
+            "results": results,
+        }
+        Path(args.report).write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"{len(results)} commands checked, {failed} failed; report: {args.report}")
+        return 1 if failed else 0
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_common_arguments(parser)
+    parser.add_argument("--developers", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--report", default="query_plans.json")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Exercise both task queue backends against a local redis-server.
+
+Publishes through TaskPublisher into throwaway list and stream queues, then
+reads, acknowledges and reclaims stream entries through a consumer group and
+checks that the reported depth, pending count and lag follow along, and that
+admission control refuses work once the backlog passes its limit. Keys are
+deleted afterwards. Exits with status 1 if any check fails.
+
+Usage: python scripts/check_task_queue.py [--redis-url redis://localhost:6379/15]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+import uuid
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.clients.redis import redis_client  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services import task_queue  # noqa: E402
+from app.services.task_queue import (  # noqa: E402
+    ListQueue,
+    QueueOverloadedError,
+    StreamQueue,
+    check_admission,
+    task_publisher,
+)
+
+
+class Checks:
+    def __init__(self) -> None:
+        self.failed = 0
+
+    def expect(self, label: str, actual: object, expected: object) -> None:
+        ok = actual == expected
+        self.failed += not ok
+        status = "ok" if ok else f"FAILED (expected {expected!r})"
+        print(f"{label}: {actual!r} {status}")
+
+
+def _tasks(count: int) -> list[dict]:
+    return [{"task_id": str(uuid.uuid4()), "index": index} for index in range(count)]
+
+
+async def _check_list(checks: Checks, queue: ListQueue) -> None:
+    redis = redis_client.connect()
+    await asyncio.gather(*(task_publisher.publish(queue, task) for task in _tasks(3)))
+    stats = await queue.stats(redis)
+    checks.expect("list depth after 3 publishes", stats.depth, 3)
+    checks.expect("list lag", stats.lag, 3)
+
+
+async def _check_stream(checks: Checks, queue: StreamQueue) -> None:
+    redis = redis_client.connect()
+    await queue.ensure_group(redis)
+    await queue.ensure_group(redis)
+    await asyncio.gather(*(task_publisher.publish(queue, task) for task in _tasks(5)))
+    stats = await queue.stats(redis)
+    checks.expect("stream depth after 5 publishes", stats.depth, 5)
+    checks.expect("stream lag before reads", stats.lag, 5)
+
+    received = await queue.read(redis, "worker-a", count=3)
+    checks.expect("entries read by worker-a", len(received), 3)
+    checks.expect(
+        "task order preserved",
+        [task["index"] for _, task in received],
+        [0, 1, 2],
+    )
+    stats = await queue.stats(redis)
+    checks.expect("pending after read", stats.pending, 3)
+    checks.expect("lag after read", stats.lag, 2)
+
+    acked = await queue.ack(redis, [entry_id for entry_id, _ in received[:2]])
+    checks.expect("entries acked", acked, 2)
+    stats = await queue.stats(redis)
+    checks.expect("pending after ack", stats.pending, 1)
+
+    # worker-a "dies" holding one entry; worker-b takes it over.
+    reclaimed = await queue.reclaim(redis, "worker-b", min_idle_ms=0)
+    checks.expect(
+        "entry reclaimed by worker-b",
+        [entry_id for entry_id, _ in reclaimed],
+        [received[2][0]],
+    )
+    rest = await queue.read(redis, "worker-b", count=10)
+    await queue.ack(redis, [entry_id for entry_id, _ in reclaimed + rest])
+    stats = await queue.stats(redis)
+    checks.expect("pending when drained", stats.pending, 0)
+    checks.expect("lag when drained", stats.lag, 0)
+    checks.expect("depth keeps acked entries until trimmed", stats.depth, 5)
+
+    # Acked entries still in the stream must not count against admission.
+    max_depth = settings.task_queue_max_depth
+    settings.task_queue_max_depth = 2
+    try:
+        task_queue._stats_cache.clear()
+        await check_admission(queue)
+    except QueueOverloadedError as exc:
+        checks.expect("drained stream admitted", exc.status_code, None)
+    finally:
+        settings.task_queue_max_depth = max_depth
+        task_queue._stats_cache.clear()
+
+
+async def _check_admission(checks: Checks, queue: ListQueue) -> None:
+    max_depth = settings.task_queue_max_depth
+    settings.task_queue_max_depth = 2
+    try:
+        task_queue._stats_cache.clear()
+        try:
+            await check_admission(queue)
+        except QueueOverloadedError as exc:
+            checks.expect("admission status over depth limit", exc.status_code, 429)
+            checks.expect(
+                "admission Retry-After",
+                exc.retry_after,
+                settings.task_queue_retry_after_seconds,
+            )
+        else:
+            checks.expect("admission refused over depth limit", False, True)
+    finally:
+        settings.task_queue_max_depth = max_depth
+        task_queue._stats_cache.clear()
+
+
+async def _run(args: argparse.Namespace) -> int:
+    if args.redis_url:
+        settings.redis_url = args.redis_url
+    suffix = uuid.uuid4().hex[:8]
+    list_queue = ListQueue(f"check_{suffix}")
+    stream_queue = StreamQueue(
+        f"check_{suffix}",
+        group="check",
+        maxlen=settings.task_queue_stream_maxlen,
+    )
+    checks = Checks()
+    redis = redis_client.connect()
+    try:
+        await _check_list(checks, list_queue)
+        await _check_admission(checks, list_queue)
+        await _check_stream(checks, stream_queue)
+    finally:
+        await redis.delete(list_queue.key, stream_queue.key)
+        await task_publisher.close()
+        await redis_client.close()
+    return 1 if checks.failed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--redis-url", default=None, help="Defaults to REDIS_URL.")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Count the MongoDB round-trips each write endpoint costs.
+
+Runs the service behind every write endpoint against a small seeded database
+and counts the commands it sends. The read-model maintenance every write
+shares and awaits - the kanban refresh (its aggregation, tagged with
+KANBAN_REFRESH_COMMENT, and kanban_cards writes) and the response funnel
+counter increments - is reported in its own column; "total" is everything
+the request waits for. The endpoint's own commands are printed next to the
+count the read-after-write implementation needed, and the script exits with
+status 1 if any endpoint's own count exceeds its budget.
+
+Usage: python scripts/count_round_trips.py
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import random
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.models.collections import (  # noqa: E402
+    DEVELOPERS_COLLECTION,
+    FUNNEL_COUNTERS_COLLECTION,
+    KANBAN_CARDS_COLLECTION,
+)
+from app.repositories.telegram_login_session import (  # noqa: E402
+    TelegramLoginSessionRepository,
+)
+from app.schemas.developer import DeveloperPatchPayload  # noqa: E402
+from app.schemas.request_status import RequestStatus  # noqa: E402
+from app.schemas.response import ResponseCreatePayload  # noqa: E402
+from app.schemas.response_stage import ResponseStage  # noqa: E402
+from app.services.developers import update_developer  # noqa: E402
+from app.services.kanban import KANBAN_REFRESH_COMMENT  # noqa: E402
+from app.services.outbox import transactions_supported  # noqa: E402
+from app.services.requests import update_request  # noqa: E402
+from app.services.responses import (  # noqa: E402
+    create_response,
+    delete_response,
+    update_response,
+)
+from scripts._support import (  # noqa: E402
+    CommandRecorder,
+    add_common_arguments,
+    open_database,
+    seed_candidates_and_responses,
+    seed_developers,
+    seed_requests,
+)
+
+# (before, budget): commands per call with insert/update followed by a
+# find_one, and the most the single-call writes may use.
+ROUND_TRIPS = {
+    "POST /responses": (7, 4),
+    "PATCH /responses/{id} stage": (5, 2),
+    "PATCH /responses/{id} stage+rate": (7, 2),
+    "PATCH /responses/{id} rate": (5, 2),
+    "DELETE /responses/{id}": (4, 2),
+    "PATCH /requests/{id} status": (9, 2),
+    "PATCH /requests/{id}?expand=candidates,responses": (9, 5),
+    "PATCH /developers/{id}": (3, 2),
+    "POST /auth/telegram/confirm (update)": (2, 1),
+}
+
+
+def _read_model(command_name: str, command: dict) -> bool:
+    if command.get("comment") == KANBAN_REFRESH_COMMENT:
+        return True
+    return command.get(command_name) in {
+        KANBAN_CARDS_COLLECTION,
+        FUNNEL_COUNTERS_COLLECTION,
+    }
+
+
+async def _run(args: argparse.Namespace) -> int:
+    recorder = CommandRecorder(args.db)
+    client, db = open_database(args.db, event_listeners=[recorder])
+    rng = random.Random(args.seed)
+    try:
+        await client.drop_database(args.db)
+        developer_ids = await seed_developers(db, count=50, rng=rng)
+        request_ids = await seed_requests(db, count=10, rng=rng)
+        await seed_candidates_and_responses(
+            db,
+            request_ids=request_ids,
+            developer_ids=developer_ids,
+            candidates_per_request=5,
+            responses_per_request=2,
+            rng=rng,
+        )
+        now = datetime.now(timezone.utc)
+        free = await db[DEVELOPERS_COLLECTION].insert_one(
+            {"full_name": "Round Trip", "status": "доступен", "created_at": now}
+        )
+        free_developer_id = str(free.inserted_id)
+        # Detected once per process, as at app startup; not a per-request trip.
+        await transactions_supported(db)
+        request_id = str(request_ids[0])
+        sessions = TelegramLoginSessionRepository(db)
+        await sessions.create_session(
+            {
+                "_id": "round-trip",
+                "status": "PENDING",
+                "consumed": False,
+                "expires_at": datetime.utcnow() + timedelta(minutes=5),
+            }
+        )
+        created: dict[str, str] = {}
+
+        async def create() -> None:
+            response = await create_response(
+                db,
+                payload=ResponseCreatePayload(
+                    request_id=request_id,
+                    developer_id=free_developer_id,
+                    rate="1000",
+                ),
+            )
+            created["id"] = response.id
+
+        probes: dict[str, Callable[[], Awaitable[object]]] = {
+            "POST /responses": create,
+            "PATCH /responses/{id} stage": lambda: update_response(
+                db, response_id=created["id"], stage=ResponseStage.CV_SENT, rate=None
+            ),
+            "PATCH /responses/{id} stage+rate": lambda: update_response(
+                db,
+                response_id=created["id"],
+                stage=ResponseStage.DETAILS_CLARIFICATION,
+                rate="2000",
+            ),
+            "PATCH /responses/{id} rate": lambda: update_response(
+                db, response_id=created["id"], stage=None, rate="3000"
+            ),
+            "DELETE /responses/{id}": lambda: delete_response(
+                db, response_id=created["id"]
+            ),
+            "PATCH /requests/{id} status": lambda: update_request(
+                db,
+                request_id=request_id,
+                status_value=RequestStatus.ON_HOLD,
+                name=None,
+            ),
+            "PATCH /requests/{id}?expand=candidates,responses": lambda: update_request(
+                db,
+                request_id=request_id,
+                status_value=RequestStatus.ACTIVE,
+                name=None,
+                expand={"candidates", "responses"},
+            ),
+            "PATCH /developers/{id}": lambda: update_developer(
+                db,
+                developer_id=free_developer_id,
+                payload=DeveloperPatchPayload(status="нужна ротация"),
+            ),
+            "POST /auth/telegram/confirm (update)": lambda: sessions.update_by_token(
+                "round-trip", {"status": "DENIED", "denied_reason": "NOT_ALLOWED"}
+            ),
+        }
+        for label, probe in probes.items():
+            with recorder.probe(label):
+                await probe()
+
+        counts = {label: 0 for label in probes}
+        read_model_counts = {label: 0 for label in probes}
+        for label, command_name, command in recorder.commands:
+            if _read_model(command_name, command):
+                read_model_counts[label] += 1
+            else:
+                counts[label] += 1
+        width = max(len(label) for label in counts)
+        print(f"{'endpoint'.ljust(width)}  before  now  read model  total  budget")
+        over = 0
+        for label, count in counts.items():
+            before, budget = ROUND_TRIPS[label]
+            read_model = read_model_counts[label]
+            over += count > budget
+            print(
+                f"{label.ljust(width)}  {before:6}  {count:3}  {read_model:10}  "
+                f"{count + read_model:5}  {budget:6}"
+            )
+        return 1 if over else 0
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_common_arguments(parser)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
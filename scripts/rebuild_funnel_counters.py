@@ -0,0 +1,35 @@
+"""Recompute the response funnel counters from the audit trail.
+
+Usage: python scripts/rebuild_funnel_counters.py
+"""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.clients.mongo import mongo_client  # noqa: E402
+from app.services.analytics import rebuild_funnel_counters  # noqa: E402
+
+
+async def _run() -> int:
+    db = mongo_client.connect()
+    try:
+        return await rebuild_funnel_counters(db)
+    finally:
+        await mongo_client.close()
+
+
+def main() -> None:
+    try:
+        written = asyncio.run(_run())
+    except RuntimeError as exc:
+        raise SystemExit(f"Rebuild refused: {exc}") from exc
+    print(f"Rebuild completed: {written} funnel counter document(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.clients.mongo import mongo_client  # noqa: E402
+from app.services.kanban import rebuild_kanban_cards  # noqa: E402
+
+
+async def _run() -> int:
+    db = mongo_client.connect()
+    try:
+        return await rebuild_kanban_cards(db)
+    finally:
+        await mongo_client.close()
+
+
+def main() -> None:
+    rebuilt = asyncio.run(_run())
+    print(f"Rebuild completed: {rebuilt} kanban card(s).")
+
+
+if __name__ == "__main__":
+    main()
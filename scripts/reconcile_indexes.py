@@ -0,0 +1,47 @@
+"""Diff declared indexes against the database and build the missing ones.
+
+Usage: python scripts/reconcile_indexes.py [--dry-run] [--check]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.clients.mongo import mongo_client  # noqa: E402
+from app.repositories.indexes import IndexReport, reconcile_indexes  # noqa: E402
+
+
+async def _run(build: bool) -> list[IndexReport]:
+    db = mongo_client.connect()
+    try:
+        return await reconcile_indexes(db, build=build)
+    finally:
+        await mongo_client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true", help="Report only.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if any declared index is missing or conflicting.",
+    )
+    args = parser.parse_args()
+    reports = asyncio.run(_run(build=not args.dry_run))
+    for report in reports:
+        print(
+            f"{report.collection}: built={report.built} missing={report.missing} "
+            f"conflicting={report.conflicting} extra={report.extra} unused={report.unused}"
+        )
+    if args.check and not all(report.ok for report in reports):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.clients.mongo import mongo_client  # noqa: E402
+from app.services.derived_fields import sync_derived_fields  # noqa: E402
+
+
+async def _run() -> dict[str, int]:
+    db = mongo_client.connect()
+    try:
+        return await sync_derived_fields(db)
+    finally:
+        await mongo_client.close()
+
+
+def main() -> None:
+    updated = asyncio.run(_run())
+    summary = ", ".join(f"{name}={count}" for name, count in updated.items())
+    print(f"Sync completed: {summary}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+from app.utils.deadline import deadline_fields, stored_deadline_fields
+
+
+def test_blank_text_has_no_deadline():
+    assert deadline_fields({"vacancy": {"application_deadline": "   "}}) == {
+        "has_deadline": False,
+        "deadline_at": None,
+    }
+
+
+def test_text_is_parsed_relative_to_created_at():
+    fields = deadline_fields(
+        {
+            "vacancy": {"application_deadline": "до 15.05 18:00"},
+            "created_at": "2026-05-01T09:00:00",
+        }
+    )
+    assert fields == {
+        "has_deadline": True,
+        "deadline_at": datetime(2026, 5, 15, 18, 0, tzinfo=timezone.utc),
+    }
+
+
+def test_stored_fields_win_over_the_text():
+    document = {
+        "vacancy": {"application_deadline": "завтра"},
+        "has_deadline": False,
+        "deadline_at": None,
+    }
+    assert stored_deadline_fields(document) == {"has_deadline": False, "deadline_at": None}
+
+
+def test_unnormalized_document_falls_back_to_the_text():
+    document = {
+        "vacancy": {"application_deadline": "2026-06-01"},
+        "created_at": datetime(2026, 5, 1, tzinfo=timezone.utc),
+    }
+    assert stored_deadline_fields(document) == {
+        "has_deadline": True,
+        "deadline_at": datetime(2026, 6, 1, tzinfo=timezone.utc),
+    }
@@ -0,0 +1,55 @@
+from app.schemas.response_stage import ResponseStage
+from app.utils.funnel import next_reached_stage, stage_change_delta
+from app.utils.response_stage import STAGE_INDEX
+
+
+def test_skipped_stages_count_as_reached():
+    delta = stage_change_delta(
+        ResponseStage.CLIENT_REVIEW,
+        ResponseStage.INTERVIEW_1,
+        previous_reached_stage=STAGE_INDEX[ResponseStage.CLIENT_REVIEW],
+        seconds_in_stage=60,
+    )
+    assert delta == {
+        "entered.INTERVIEW_1": 1,
+        "reached.PRECHECK": 1,
+        "reached.INTERVIEW_1": 1,
+        "exited.CLIENT_REVIEW": 1,
+        "timed.CLIENT_REVIEW": 1,
+        "seconds.CLIENT_REVIEW": 60,
+    }
+
+
+def test_reopening_below_max_stage_reaches_nothing():
+    delta = stage_change_delta(
+        ResponseStage.REJECTED,
+        ResponseStage.PRECHECK,
+        previous_reached_stage=STAGE_INDEX[ResponseStage.INTERVIEW_2],
+        seconds_in_stage=None,
+    )
+    assert not [key for key in delta if key.startswith("reached.")]
+
+
+def test_terminal_stage_is_never_reached():
+    delta = stage_change_delta(
+        ResponseStage.CV_SELECTED,
+        ResponseStage.REJECTED,
+        previous_reached_stage=1,
+        seconds_in_stage=None,
+    )
+    assert not [key for key in delta if key.startswith("reached.")]
+
+
+def test_reopened_response_does_not_reach_stages_again():
+    reached_stage = next_reached_stage(1, ResponseStage.INTERVIEW_1)
+    reached_stage = next_reached_stage(reached_stage, ResponseStage.REJECTED)
+    # Reopening lowers max_stage to PRECHECK, but reached_stage stays put.
+    reached_stage = next_reached_stage(reached_stage, ResponseStage.PRECHECK)
+    assert reached_stage == STAGE_INDEX[ResponseStage.INTERVIEW_1]
+    delta = stage_change_delta(
+        ResponseStage.PRECHECK,
+        ResponseStage.INTERVIEW_1,
+        previous_reached_stage=reached_stage,
+        seconds_in_stage=None,
+    )
+    assert not [key for key in delta if key.startswith("reached.")]
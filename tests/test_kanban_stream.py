@@ -0,0 +1,60 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.core.config import settings
+from app.services.kanban import notify_card_listeners
+from app.services.kanban_stream import KanbanHub, KanbanSubscription
+
+
+def _card(request_id: ObjectId, role: str) -> dict:
+    return {
+        "_id": request_id,
+        "name": "Backend developer",
+        "status": "open",
+        "role": role,
+        "responses_by_stage": {},
+    }
+
+
+def test_memory_source_pushes_refreshed_cards(monkeypatch):
+    monkeypatch.setattr(settings, "kanban_stream_source", "memory")
+
+    async def scenario() -> list[dict]:
+        hub = KanbanHub()
+        assert await hub.start(None) == "memory"
+        subscription = hub.subscribe(None, KanbanSubscription(role="backend"))
+        request_id = ObjectId()
+        try:
+            notify_card_listeners([str(request_id)], [_card(request_id, "backend")])
+            # The card no longer matches the subscription's filter.
+            notify_card_listeners([str(request_id)], [_card(request_id, "frontend")])
+            # Never sent to this subscriber, so there is nothing to remove.
+            notify_card_listeners([str(ObjectId())], [])
+        finally:
+            await hub.stop()
+        messages = []
+        while not subscription.queue.empty():
+            messages.append(subscription.queue.get_nowait())
+        return messages
+
+    card, remove = asyncio.run(scenario())
+    assert card["type"] == "card"
+    assert card["card"]["name"] == "Backend developer"
+    assert remove["type"] == "remove"
+    assert remove["id"] == card["card"]["id"]
+
+
+def test_stopped_hub_stops_listening(monkeypatch):
+    monkeypatch.setattr(settings, "kanban_stream_source", "memory")
+
+    async def scenario() -> KanbanSubscription:
+        hub = KanbanHub()
+        await hub.start(None)
+        subscription = hub.subscribe(None, KanbanSubscription())
+        await hub.stop()
+        request_id = ObjectId()
+        notify_card_listeners([str(request_id)], [_card(request_id, "backend")])
+        return subscription
+
+    assert asyncio.run(scenario()).queue.empty()
@@ -0,0 +1,22 @@
+import asyncio
+import gc
+
+from app.utils.loader import DataLoader
+
+
+def test_load_calls_in_one_tick_share_a_batch():
+    calls = []
+
+    async def batch_load(keys):
+        calls.append(sorted(keys))
+        await asyncio.sleep(0)
+        # Batches only referenced by the loader must survive a collection.
+        gc.collect()
+        return {key: key * 2 for key in keys if key != 3}
+
+    async def scenario():
+        loader = DataLoader(batch_load)
+        return await asyncio.gather(loader.load(1), loader.load(2), loader.load(3))
+
+    assert asyncio.run(scenario()) == [2, 4, None]
+    assert calls == [[1, 2, 3]]